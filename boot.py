@@ -0,0 +1,24 @@
+# Runs once when the board starts up, before code.py.
+#
+# CIRCUITPY can only be written by one side at a time: your computer over
+# USB, or code.py. Normally it's your computer, so you can save code.py.
+#
+# Hold the pushbutton down while plugging the board in (or pressing
+# reset) and code.py gets to write instead, so it can record what the
+# sensors did to trace.bin (see lib/hohoho/recorder.py). Your computer
+# then sees CIRCUITPY as read only until the next time the board starts
+# without the button held.
+
+import board
+import digitalio
+import storage
+
+pushbutton = digitalio.DigitalInOut(board.D6)
+pushbutton.direction = digitalio.Direction.INPUT
+pushbutton.pull = digitalio.Pull.UP
+
+# The pushbutton reads low (False) while it is pressed
+if not pushbutton.value:
+    storage.remount("/", readonly=False)
+
+pushbutton.deinit()
@@ -28,12 +28,13 @@
 # Which itself is based on the Adafruit NEOPIXEL library examples
 #   https://github.com/adafruit/Adafruit_NeoPixel/tree/master/examples
 
-import board
-import digitalio
-import neopixel
-import pwmio
 import time
 
+# The shared code lives in lib/hohoho
+from hohoho.colors import WARM
+from hohoho.effects import linearfade_colorstrip
+from hohoho.hardware import setup_board_led, setup_colorstrip, setup_pir_sensor, setup_pushbutton
+
 # Declare global variables here. We could also initialize them but that is
 # done in the setup() function instead following the pattern of Arduino.
 
@@ -49,19 +50,12 @@ pushbutton = None
 # PIR sensor attached to D7
 pir_sensor = None
 
-# KB2040 onboard neopixel
-board_neopixel = None
-
 # LED strip attached to pins D3, D4, D5
-colorstrip_r = None
-colorstrip_g = None
-colorstrip_b = None
+colorstrip = None
 
-# See https://www.rapidtables.com/web/color/RGB_Color.html
-# A color definition for "gold"
-#COLOR = (0xFF, 0xD7, 0x00)
-# After playing around, I like this color -EZA
-COLOR = (0xFF, 0x30, 0x05)
+# The color of the light. See lib/hohoho/colors.py for others, like
+# GOLD, or make your own with https://www.rapidtables.com/web/color/RGB_Color.html
+COLOR = WARM
 
 def loop():
     """Gets called in an infinite loop from the main code.
@@ -85,11 +79,11 @@ def loop():
     time.sleep(.5)
 
     # Testing: Set the colorstrip to one color for a moment
-    #set_colorstrip((0xff, 0, 0), 1.0)
+    #colorstrip.set_color((0xff, 0, 0), 1.0)
     #time.sleep(2)
-    #set_colorstrip((0, 0xff, 0), 1.0)
+    #colorstrip.set_color((0, 0xff, 0), 1.0)
     #time.sleep(2)
-    #set_colorstrip((0, 0, 0xff), 1.0)
+    #colorstrip.set_color((0, 0, 0xff), 1.0)
     #time.sleep(2)
 
     # Wait for the pushbutton or the PIR sensor to activate
@@ -113,7 +107,7 @@ def loop():
     print("Turning on light.")
 
     # Fade in the color
-    linearfade_colorstrip(COLOR, 0, 1.0, 3)
+    linearfade_colorstrip(colorstrip, COLOR, 0, 1.0, 3)
 
     # Keep track of how long ago the PIR was triggered
     pir_last_detected_secs = 0
@@ -151,53 +145,10 @@ def loop():
 
     # Fade out the color to off
     print("Turning out light.")
-    linearfade_colorstrip(COLOR, 1.0, 0, 3)
+    linearfade_colorstrip(colorstrip, COLOR, 1.0, 0, 3)
 
     time.sleep(1)
 
-def set_onboard_neopixel(color):
-    """Sets the value of the onboard neopixel to a specific color
-
-        color : tuple
-            Three values for (red, green, blue) each from 0 - 255
-    """
-    global board_neopixel
-    board_neopixel[0] = color
-    board_neopixel.show()
-
-def linearfade_colorstrip(color, start_brightness, end_brightness, duration):
-    """Fade the colorstrip from one brightness level to another over linearly the specified time
-
-        color : tuple of (int, int, int)
-            Color to use for the fade operation
-        start_brightness : float
-            Value from 0 (off) to 1.0 (full on) to start the fade operation
-        end_brightness : float
-            Value from 0 (off) to 1.0 (full on) to end the fade operation.  The colorstrip
-            will be left at this value when the function exits.
-        duration : float
-            Amount of time in seconds that the fade should last.
-    """
-    interval = duration / 100
-    brightness_increment = (end_brightness - start_brightness) / 100
-    for i in range(0, 100):
-        brightness = start_brightness + (i * brightness_increment)
-        set_colorstrip(color, brightness)
-        time.sleep(interval)
-
-def set_colorstrip(color, brightness):
-    """Set the color strip to the specified color and brightness
-
-        color : tuple of (int, int, int)
-            An r,g,b color tuple with values 0-255 for each color
-        brightness : float
-            Intensity of the lightstrip. 1.0 is brightest, 0.0 is off
-    """
-    # Scale the 0-255 value for each color to 65535-0
-    colorstrip_r.duty_cycle = 65535-int(brightness * ((color[0] / 255.0) * 65535.0))  # Red
-    colorstrip_g.duty_cycle = 65535-int(brightness * ((color[1] / 255.0) * 65535.0))  # Green
-    colorstrip_b.duty_cycle = 65535-int(brightness * ((color[2] / 255.0) * 65535.0))  # Blue
-
 def setup():
     """One time initialization code.
     """
@@ -206,30 +157,16 @@ def setup():
     # with the 'global' keyword so that Python doesn't create a
     # local variable instead that disappears after the function exits.
     global board_led
-    global board_neopixel
     global pushbutton
     global pir_sensor
-    global colorstrip_r
-    global colorstrip_g
-    global colorstrip_b
-
-    board_led = digitalio.DigitalInOut(board.A3)
-    board_led.direction = digitalio.Direction.OUTPUT
-
-    board_neopixel = neopixel.NeoPixel(board.NEOPIXEL, 1)
-
-    pushbutton = digitalio.DigitalInOut(board.D6)
-    pushbutton.direction = digitalio.Direction.INPUT
-    pushbutton.pull = digitalio.Pull.UP
+    global colorstrip
 
-    pir_sensor = digitalio.DigitalInOut(board.D7)
-    pir_sensor.direction = digitalio.Direction.INPUT
+    board_led = setup_board_led()
+    pushbutton = setup_pushbutton()
+    pir_sensor = setup_pir_sensor()
 
-    # Duty cycle 100% means that the GPIO pins are high, meaning no
-    # current should flow through the LEDs, turning them off.
-    colorstrip_r = pwmio.PWMOut(board.D3, frequency=5000, duty_cycle=65535)
-    colorstrip_b = pwmio.PWMOut(board.D4, frequency=5000, duty_cycle=65535)
-    colorstrip_g = pwmio.PWMOut(board.D5, frequency=5000, duty_cycle=65535)
+    # The strip starts out dark
+    colorstrip = setup_colorstrip()
 
 # mainline code
 # Call 'setup()' once to initialize everything and 'loop()'
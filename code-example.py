@@ -18,11 +18,18 @@
 # Which itself is based on the Adafruit NEOPIXEL library examples
 #   https://github.com/adafruit/Adafruit_NeoPixel/tree/master/examples
 
-import board
-import digitalio
-import neopixel
-import pwmio
-import time
+# The shared code lives in lib/hohoho. Want to fade the strip? Try
+#   from hohoho.effects import fade_colorstrip
+# and 'yield from fade_colorstrip(colorstrip, PURPLE, 0, 1.0, 2)' in a task.
+from hohoho.button import Button, SHORT_PRESS, LONG_PRESS, DOUBLE_PRESS
+from hohoho.colors import PURPLE, RED, GREEN, BLUE, YELLOW, CYAN, MAGENTA, WHITE, BLACK
+from hohoho.colorwheel import colorwheel_table
+from hohoho.frames import FrameTimer
+from hohoho.hardware import (setup_board_led, setup_board_neopixel, setup_colorstrip,
+                             setup_pir_sensor, setup_pushbutton, set_onboard_neopixel)
+from hohoho.pir import pir_sensor_task
+from hohoho.timeline import Timeline, STEP, LINEAR
+from hohoho.scheduler import Scheduler, TICK_MS, run_task, ticks_ms
 
 # Declare global variables here. We could also initialize them but that is
 # done in the setup() function instead following the pattern of Arduino.
@@ -30,8 +37,10 @@ import time
 # Green LED attached to pin A3
 board_led = None
 
-# Pushbutton attached to D6
+# Pushbutton attached to D6, and the Button that turns its ups and downs
+# into short, long and double presses
 pushbutton = None
+button = None
 
 # PIR sensor attached to D7
 pir_sensor = None
@@ -40,181 +49,200 @@ pir_sensor = None
 board_neopixel = None
 
 # LED strip attached to pins D3, D4, D5
-colorstrip_r = None
-colorstrip_g = None
-colorstrip_b = None
-
-# A color definition you can use in your code
-# A few notes on the next line:
-# - A value inside of parenthesis is called a tuple.
-# - You can pass a tuple as a single argument in python.
-# - The values for a color can range from 0 to 255 in decimal (base 10)
-#   or you can use the values 0x00 to 0xFF in hexadecimal (base 16).
-# - Purple is 62.7% red, 12.5% green and 94.1% blue. Changing to values from
-#   0-255 yields PURPLE = (160, 32, 240)
-# - People often use hex for encoding colors so I'm going to use it.
-PURPLE = (0xA0, 0x20, 0xF0)
-
-# Here are some other standard colors
-# - Want more colors? Visit https://www.rapidtables.com/web/color/RGB_Color.html
-RED     = (0xFF, 0x00, 0x00)
-GREEN   = (0x00, 0xFF, 0x00)
-BLUE    = (0x00, 0x00, 0xFF)
-YELLOW  = (0xFF, 0xFF, 0x00)
-CYAN    = (0x00, 0xFF, 0xFF)
-MAGENTA = (0xFF, 0x00, 0xFF)
-WHITE   = (0xFF, 0xFF, 0xFF)
-BLACK   = (0x00, 0x00, 0x00) # Not actually black, turns the LED off
+colorstrip = None
 
-########################################################
-# Add your new code into loop() or define new constants
-# and globals below.
+# Every colorwheel() color packed into a bytearray, built once in setup()
+colorwheel_colors = None
 
+# Runs the tasks in this file so they can all take turns, created in setup()
+scheduler = None
 
-def loop():
-    """Gets called in an infinite loop from the main code.
-    """
+# The colors (PURPLE, RED, ...) are in lib/hohoho/colors.py, along with
+# a few notes on how colors are written down.
 
-    # Indentation is important in Python. Make sure everything lines up if you want it
-    # to live inside of a function or a loop.
-
-    # Prints "Hello world!" to the Serial (CircuitPython REPL) window in Mu Editor
-    print("Hello World!")
-
-    # Blink an LED just to show how that's done.
-    # Note that this LED is wired up with its ground lead to the MCU pin
-    # so that it turns on when the pin is low (False) and turns off when
-    # the pin is high (True)
-    board_led.value = False
-    time.sleep(1)
-    board_led.value = True
-    time.sleep(1)
-
-    # Blink the onboard neopixel to purple (see function defined below)
-    set_onboard_neopixel(PURPLE)
-    time.sleep(1)
-    set_onboard_neopixel(BLACK)
-    time.sleep(1)
-
-    # Check the pushbutton. If it is pressed, the value will be low (false)
-    pushbutton_value = pushbutton.value;
-    print("Pushbutton is:", pushbutton_value)
-    if pushbutton_value is False:
-        print("Detected pushbutton press!")
-        # blink the external LED 3 times
-        for i in range(0,3):
-                delay = .5
-                board_led.value = False
-                time.sleep(delay)
-                board_led.value = True
-                time.sleep(delay)
-
-    # Check the PIR sensor. If it is pressed, the value will be high
-    motion_detected = wait_for_pir_sensor(10) # Timeout after 10 seconds
-    if (motion_detected is True):
-        # blink the neopixel Cyan 3 times
-        for i in range(0,3):
-            delay = .5
-            set_onboard_neopixel(CYAN)
-            time.sleep(1)
-            set_onboard_neopixel(BLACK)
-            break
+########################################################
+# Add your new code into loop() or define new constants
+# and globals below.
 
+# A light show written as a list of steps instead of code. Each step
+# says which color and brightness to go to, how many seconds to take,
+# and how to get there:
+#   STEP   - jump straight to the color and stay there
+#   LINEAR - fade to it at a steady speed
+#   EASE_IN, EASE_OUT, EASE_IN_OUT - fade, but start and/or end slowly.
+#     Add them to the hohoho.timeline import above to use them.
+SHOW = [
+    # (color, brightness, seconds, how)
     # Set the colorstrip to one color for a moment
-    set_colorstrip(PURPLE, 1.0)
-    time.sleep(2)
-
-    # Use a loop to set some colors manually
-    for brightness in (1.0, .5, .1):
-        # Indentation is important in Python. Make sure everything lines
-        # up if you want it to live inside of a function or a loop.
-        delay = .25
-        set_colorstrip(RED, brightness)
-        time.sleep(delay)
-        set_colorstrip(GREEN, brightness)
-        time.sleep(delay)
-        set_colorstrip(BLUE, brightness)
-        time.sleep(delay)
-        set_colorstrip(YELLOW, brightness)
-        time.sleep(delay)
-        set_colorstrip(CYAN, brightness)
-        time.sleep(delay)
-        set_colorstrip(MAGENTA, brightness)
-        time.sleep(delay)
-        set_colorstrip(BLACK, brightness)
+    (PURPLE, 1.0, 2, STEP),
+]
 
+# Use a loop to add some colors. Indentation is important in Python.
+# Make sure everything lines up if you want it to live inside of a loop.
+for brightness in (1.0, .5, .1):
+    for color in (RED, GREEN, BLUE, YELLOW, CYAN, MAGENTA):
+        SHOW.append((color, brightness, .25, STEP))
 
+SHOW += [
     # Fade the strip in and out in one color
-    linearfade_colorstrip(PURPLE, 0, 1.0, 2)
-    time.sleep(1)
-    linearfade_colorstrip(PURPLE, 1.0, 0, 2)
+    (PURPLE, 0.0, 0, STEP),
+    (PURPLE, 1.0, 2, LINEAR),
+    (PURPLE, 1.0, 1, STEP),
+    (PURPLE, 0.0, 2, LINEAR),
+]
+
+# Rainbow effect for 10 seconds. Fading red to green to blue and back
+# to red goes all the way around the colorwheel.
+for i in range(0,5):
+    SHOW += [
+        (RED,   1.0, 0,     STEP),
+        (GREEN, 1.0, 2 / 3, LINEAR),
+        (BLUE,  1.0, 2 / 3, LINEAR),
+        (RED,   1.0, 2 / 3, LINEAR),
+    ]
+
+SHOW.append((BLACK, 0.0, 1, STEP))
+
+# SHOW with every frame worked out, built in setup()
+show = None
+
+# What colorstrip_show() plays. A short press of the pushbutton picks the
+# next effect, a double press the next color and a long press turns the
+# strip off until the next press.
+EFFECTS = ("show", "rainbow", "color")
+COLORS = (PURPLE, RED, GREEN, BLUE, YELLOW, CYAN, MAGENTA, WHITE)
+effect = 0
+color_index = 0
+strip_on = True
+effect_changed = False  # Tells colorstrip_show() to stop what it's doing
+
+# Set to True to print how much memory each effect allocates every 30
+# seconds. An effect that allocates nothing never makes the garbage
+# collector pause in the middle of it.
+GC_DEBUG = False
+allocs = None
 
-    # Rainbow effect for 10 seconds
-    for i in range(0,5):
-        rainbow(1.0, 2)
 
-    set_colorstrip(BLACK, 0.0)
+def loop():
+    """Gets called in an infinite loop from the main code.
 
-    time.sleep(1)
+    Each pass gives every task below a turn. To add your own, write a
+    new task function and add it to the scheduler in setup().
+    """
+    scheduler.run_once()
 
+def say_hello():
+    """Task: print a message and blink the onboard neopixel."""
+    while True:
+        # Indentation is important in Python. Make sure everything lines up if you want it
+        # to live inside of a function or a loop.
+
+        # Prints "Hello world!" to the Serial (CircuitPython REPL) window in Mu Editor
+        print("Hello World!")
+
+        # Blink the onboard neopixel to purple (see function defined below)
+        # Inside a task, 'yield 1000' waits one second like time.sleep(1)
+        # does, but lets the other tasks keep running in the meantime.
+        set_onboard_neopixel(board_neopixel, PURPLE)
+        yield 1000
+        set_onboard_neopixel(board_neopixel, BLACK)
+        yield 1000
+
+def watch_pushbutton():
+    """Task: change what the colorstrip does when the pushbutton is pressed.
+
+    Short press: next effect. Double press: next color. Long press: strip
+    off. The button is checked on every tick and nothing here waits, so
+    the PIR sensor and the colorstrip keep going the whole time.
+    """
+    global effect
+    global color_index
+    global strip_on
+    global effect_changed
 
-###################################################################
-# Add your new code above. No need to edit below this line.
-#
-def wait_for_pir_sensor(max_wait):
-    """Wait for the PIR sensor to be active.
+    while True:
+        # Check the pushbutton. If it is pressed, the value will be low (false)
+        button.update(pushbutton.value is False, ticks_ms())
+        gesture = button.get()
+        if gesture == SHORT_PRESS:
+            if strip_on:
+                effect = (effect + 1) % len(EFFECTS)
+            strip_on = True
+            print("Short press, playing", EFFECTS[effect])
+            effect_changed = True
+        elif gesture == DOUBLE_PRESS:
+            color_index = (color_index + 1) % len(COLORS)
+            effect = EFFECTS.index("color")
+            strip_on = True
+            print("Double press, color", COLORS[color_index])
+            effect_changed = True
+        elif gesture == LONG_PRESS:
+            strip_on = False
+            print("Long press, strip off")
+            effect_changed = True
+
+        # Note that this LED is wired up with its ground lead to the MCU pin
+        # so that it turns on when the pin is low (False) and turns off when
+        # the pin is high (True). Keep it on while the button is down.
+        if board_led.value == button.pressed:
+            board_led.value = not button.pressed
+        yield TICK_MS
+
+def watch_motion():
+    """Task: blink the onboard neopixel cyan when the PIR sensor sees motion."""
+    while True:
+        # Check the PIR sensor. If it is active, the value will be high
+        motion_detected = yield from pir_sensor_task(pir_sensor, 10) # Timeout after 10 seconds
+        if (motion_detected is True):
+            set_onboard_neopixel(board_neopixel, CYAN)
+            yield 1000
+            set_onboard_neopixel(board_neopixel, BLACK)
+
+def colorstrip_show():
+    """Task: show off some things the colorstrip can do.
+
+    Plays whichever of EFFECTS the pushbutton picked. The steps of "show"
+    are listed in SHOW above. setup() worked out every frame ahead of
+    time, so all this has to do is play them.
+    """
+    global effect_changed
 
-        max_wait : float
-            Time to wait for the sensor to become active in seconds
+    while True:
+        effect_changed = False
+        if not strip_on:
+            colorstrip.off()
+            task = wait_for_effect_change()
+        elif EFFECTS[effect] == "rainbow":
+            task = rainbow_task(1.0, 10)
+        elif EFFECTS[effect] == "color":
+            colorstrip.set_color(COLORS[color_index], 1.0)
+            task = wait_for_effect_change()
+        else:
+            task = show.play(colorstrip)
+        if allocs is not None:
+            task = allocs.track(EFFECTS[effect] if strip_on else "off", task)
+
+        # Like 'yield from task', but stop as soon as the button changes the effect
+        for delay in task:
+            if effect_changed:
+                break
+            yield delay
+
+def report_allocs():
+    """Task: print the memory numbers for each effect every 30 seconds."""
+    while True:
+        yield 30000
+        print(allocs.summary())
 
-    :rtype: True if the sensor detects something, False if it times out
-    """
-    global pir_sensor
+def wait_for_effect_change():
+    """Task: do nothing until the pushbutton changes the effect."""
+    while not effect_changed:
+        yield TICK_MS
 
-    delay = .25  # Wait 250 ms between checking the value
-    elapsed = 0
-    print("Waiting for PIR Sensor", end='')
-    while (elapsed < max_wait):
-        if (pir_sensor.value is True):
-            print("Detected!")
-            return True
-        time.sleep(delay)
-        elapsed += delay
-        print(".", end='')
-
-    print("Timeout")
-    return False
-
-def set_onboard_neopixel(color):
-    """Sets the value of the onboard neopixel to a specific color
-
-        color : tuple
-            Three values for (red, green, blue) each from 0 - 255
-    """
-    global board_neopixel
-    board_neopixel[0] = color
-    board_neopixel.show()
-
-def linearfade_colorstrip(color, start_brightness, end_brightness, duration):
-    """Fade the colorstrip from one brightness level to another over linearly the specified time
-
-        color : tuple of (int, int, int)
-            Color to use for the fade operation
-        start_brightness : float
-            Value from 0 (off) to 1.0 (full on) to start the fade operation
-        end_brightness : float
-            Value from 0 (off) to 1.0 (full on) to end the fade operation.  The colorstrip
-            will be left at this value when the function exits.
-        duration : float
-            Amount of time in seconds that the fade should last.
-    """
-    interval = duration / 100
-    brightness_increment = (end_brightness - start_brightness) / 100
-    for i in range(0, 100):
-        brightness = start_brightness + (i * brightness_increment)
-        set_colorstrip(color, brightness)
-        time.sleep(interval)
 
+###################################################################
+# Add your new code above. No need to edit below this line.
+#
 def rainbow(brightness, duration):
     """Make all LEDs on the strip change colors in a rainbow pattern over time.
 
@@ -223,25 +251,29 @@ def rainbow(brightness, duration):
 
         duration : float
             The number of seconds to run the rainbow effect.
-    """
-    interval = duration / 100.0
 
-    for j in range(0,255):
-        set_colorstrip(colorwheel(j), brightness)
-        time.sleep(interval)
+    :rtype: The number of colors skipped because the effect was running late
+    """
+    return run_task(rainbow_task(brightness, duration))
 
-def set_colorstrip(color, brightness):
-    """Set the color strip to the specified color and brightness
+def rainbow_task(brightness, duration):
+    """Task version of rainbow() that lets other tasks run during the effect.
 
-        color : tuple of (int, int, int)
-            An r,g,b color tuple with values 0-255 for each color
-        brightness : float
-            Intensity of the lightstrip. 1.0 is brightest, 0.0 is off
+    Use it from inside another task with 'yield from'. The arguments are
+    the same as rainbow().
     """
-    # Scale the 0-255 value for each color to 65535-0
-    colorstrip_r.duty_cycle = 65535-int(brightness * ((color[0] / 255.0) * 65535.0))  # Red
-    colorstrip_g.duty_cycle = 65535-int(brightness * ((color[1] / 255.0) * 65535.0))  # Green
-    colorstrip_b.duty_cycle = 65535-int(brightness * ((color[2] / 255.0) * 65535.0))  # Blue
+    # Step through the colorwheel, which ends on the same red it starts
+    # with, in exactly the time asked for. Reading the colors straight
+    # out of the table means no new tuples or floats are made each step.
+    timer = FrameTimer(duration, 255)
+    level = colorstrip.scaler.level(brightness)
+    while True:
+        i = (timer.next_frame() & 0xFF) * 3
+        colorstrip.set_rgb(colorwheel_colors[i], colorwheel_colors[i + 1], colorwheel_colors[i + 2], level)
+        if timer.done():
+            break
+        yield timer.wait_ms()
+    return timer.dropped
 
 def colorwheel(color_wheel_position):
     """Use the colorwheel model where a single value maps to an RGB color.
@@ -253,19 +285,9 @@ def colorwheel(color_wheel_position):
     # Did you accidentally pass a value out of range? Let me fix that for you.
     color_wheel_position = abs(int(color_wheel_position) % 256)
 
-    # 0-84 is in the red to green range
-    color_wheel_position = 255 - color_wheel_position
-    if (color_wheel_position < 85):
-        return (255 - color_wheel_position * 3, 0, color_wheel_position * 3);
-
-    # 85-169 is in the green to blue range
-    if (color_wheel_position < 170):
-        color_wheel_position -= 85;
-        return (0, color_wheel_position * 3, 255 - color_wheel_position * 3);
-
-    # 170-255 is in the blue to red range
-    color_wheel_position -= 170;
-    return (color_wheel_position * 3, 255 - color_wheel_position * 3, 0);
+    # The colors were all worked out in setup(), just look this one up
+    i = color_wheel_position * 3
+    return (colorwheel_colors[i], colorwheel_colors[i + 1], colorwheel_colors[i + 2])
 
 def setup():
     """One time initialization code.
@@ -277,28 +299,49 @@ def setup():
     global board_led
     global board_neopixel
     global pushbutton
+    global button
     global pir_sensor
-    global colorstrip_r
-    global colorstrip_g
-    global colorstrip_b
-
-    board_led = digitalio.DigitalInOut(board.A3)
-    board_led.direction = digitalio.Direction.OUTPUT
-
-    board_neopixel = neopixel.NeoPixel(board.NEOPIXEL, 1)
-
-    pushbutton = digitalio.DigitalInOut(board.D6)
-    pushbutton.direction = digitalio.Direction.INPUT
-    pushbutton.pull = digitalio.Pull.UP
-
-    pir_sensor = digitalio.DigitalInOut(board.D7)
-    pir_sensor.direction = digitalio.Direction.INPUT
-
-    # Duty cycle 100% means that the GPIO pins are high, meaning no
-    # current should flow through the LEDs, turning them off.
-    colorstrip_r = pwmio.PWMOut(board.D3, frequency=5000, duty_cycle=65535)
-    colorstrip_b = pwmio.PWMOut(board.D4, frequency=5000, duty_cycle=65535)
-    colorstrip_g = pwmio.PWMOut(board.D5, frequency=5000, duty_cycle=65535)
+    global colorstrip
+    global colorwheel_colors
+    global show
+    global scheduler
+    global allocs
+
+    board_led = setup_board_led()
+    board_neopixel = setup_board_neopixel()
+
+    pushbutton = setup_pushbutton()
+    button = Button()
+
+    pir_sensor = setup_pir_sensor()
+
+    # The RGB strip on D3, D4 and D5.
+    colorstrip = setup_colorstrip()
+
+    # Have a "smart" NeoPixel strip? Use this line instead, with the
+    # pin the strip is connected to and the number of LEDs it has.
+    # Everything else works the same.
+    #import board
+    #colorstrip = setup_colorstrip(board.D2, 60)
+
+    # Work out every colorwheel color once for rainbow()
+    colorwheel_colors = colorwheel_table()
+
+    # Work out every frame of the light show once, so playing it is cheap
+    show = Timeline(SHOW, colorstrip.scaler)
+
+    # Each task is its own little program. The scheduler takes turns
+    # running them, so add your own tasks here too.
+    scheduler = Scheduler()
+    scheduler.add(say_hello())
+    scheduler.add(watch_pushbutton())
+    scheduler.add(watch_motion())
+    scheduler.add(colorstrip_show())
+
+    if GC_DEBUG:
+        from hohoho.gcstats import AllocTracker
+        allocs = AllocTracker()
+        scheduler.add(report_allocs())
 
 # mainline code
 # Call 'setup()' once to initialize everything and 'loop()'
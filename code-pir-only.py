@@ -15,11 +15,16 @@
 # Which itself is based on the Adafruit NEOPIXEL library examples
 #   https://github.com/adafruit/Adafruit_NeoPixel/tree/master/examples
 
-import board
 import digitalio
-import neopixel
-import pwmio
-import time
+
+# The shared code lives in lib/hohoho
+from hohoho.button import Button, SHORT_PRESS, LONG_PRESS, DOUBLE_PRESS
+from hohoho.colors import BLACK, BLUE, GREEN, PURPLE, RED
+from hohoho.hardware import (setup_board_led, setup_board_neopixel, setup_colorstrip,
+                             setup_pir_sensor, setup_pushbutton, set_onboard_neopixel)
+from hohoho.log import Logger
+from hohoho.pir import pir_sensor_task
+from hohoho.scheduler import Scheduler, TICK_MS, ticks_ms
 
 # Declare global variables here. We could also initialize them but that is
 # done in the setup() function instead following the pattern of Arduino.
@@ -27,8 +32,18 @@ import time
 # Green LED attached to pin A3
 board_led = None
 
-# Pushbutton attached to D6
+# Pushbutton attached to D6, and the Button that turns its ups and downs
+# into short, long and double presses
 pushbutton = None
+button = None
+
+# How many more times blink_board_led() should blink, and how fast
+blinks_left = 0
+blink_ms = 500
+
+# Which of NEOPIXEL_COLORS the onboard neopixel shows. A double press
+# picks the next one.
+neopixel_color = 0
 
 # PIR sensor attached to D7
 pir_sensor = None
@@ -37,31 +52,17 @@ pir_sensor = None
 board_neopixel = None
 
 # LED strip attached to pins D3, D4, D5
-colorstrip_r = None
-colorstrip_g = None
-colorstrip_b = None
-
-# A color definition you can use in your code
-# A few notes on the next line:
-# - A value inside of parenthesis is called a tuple.
-# - You can pass a tuple as a single argument in python.
-# - The values for a color can range from 0 to 255 in decimal (base 10)
-#   or you can use the values 0x00 to 0xFF in hexadecimal (base 16).
-# - Purple is 62.7% red, 12.5% green and 94.1% blue. Changing to values from
-#   0-255 yields PURPLE = (160, 32, 240)
-# - People often use hex for encoding colors so I'm going to use it.
-PURPLE = (0xA0, 0x20, 0xF0)
-
-# Here are some other standard colors
-# - Want more colors? Visit https://www.rapidtables.com/web/color/RGB_Color.html
-RED     = (0xFF, 0x00, 0x00)
-GREEN   = (0x00, 0xFF, 0x00)
-BLUE    = (0x00, 0x00, 0xFF)
-YELLOW  = (0xFF, 0xFF, 0x00)
-CYAN    = (0x00, 0xFF, 0xFF)
-MAGENTA = (0xFF, 0x00, 0xFF)
-WHITE   = (0xFF, 0xFF, 0xFF)
-BLACK   = (0x00, 0x00, 0x00) # Not actually black, turns the LED off
+colorstrip = None
+
+# Runs the tasks in this file so they can all take turns, created in setup()
+scheduler = None
+
+# Messages for the Serial window, sent in batches
+log = None
+
+# Colors a double press steps through. The color definitions are in
+# lib/hohoho/colors.py.
+NEOPIXEL_COLORS = (BLACK, RED, GREEN, BLUE, PURPLE)
 
 def setup():
     """One time initialization code.
@@ -73,80 +74,113 @@ def setup():
     global board_led
     global board_neopixel
     global pushbutton
+    global button
     global pir_sensor
-    global colorstrip_r
-    global colorstrip_g
-    global colorstrip_b
+    global colorstrip
+    global scheduler
+    global log
 
-    board_led = digitalio.DigitalInOut(board.A3)
-    board_led.direction = digitalio.Direction.OUTPUT
+    board_led = setup_board_led()
+    board_neopixel = setup_board_neopixel()
 
-    board_neopixel = neopixel.NeoPixel(board.NEOPIXEL, 1)
+    pushbutton = setup_pushbutton()
+    button = Button()
 
-    pushbutton = digitalio.DigitalInOut(board.D6)
-    pushbutton.direction = digitalio.Direction.INPUT
-    pushbutton.pull = digitalio.Pull.UP
-
-    pir_sensor = digitalio.DigitalInOut(board.D7)
-    pir_sensor.direction = digitalio.Direction.INPUT
+    pir_sensor = setup_pir_sensor()
     pir_sensor.pull = digitalio.Pull.DOWN
 
-    colorstrip_r = pwmio.PWMOut(board.D3, frequency=5000, duty_cycle=0)
-    colorstrip_b = pwmio.PWMOut(board.D4, frequency=5000, duty_cycle=0)
-    colorstrip_g = pwmio.PWMOut(board.D5, frequency=5000, duty_cycle=0)
+    colorstrip = setup_colorstrip()
+    # Turn every color all the way on, so you can see the strip works,
+    # until a long press turns everything off.
+    colorstrip.write_rgb(65535, 65535, 65535)
+
+    log = Logger()
+    # The pushbutton is checked every tick, but only report it every 10 seconds
+    log.rate_limit("Pushbutton is: %s", 10000)
+
+    scheduler = Scheduler()
+    scheduler.add(log.flush_task())
+    scheduler.add(watch_pushbutton())
+    scheduler.add(watch_motion())
+    scheduler.add(blink_board_led())
 
 def loop():
     """Gets called in an infinite loop from the main code.
+
+    Each pass gives the pushbutton and PIR sensor tasks a turn.
     """
-    # Check the pushbutton. If it is pressed, the value will be low (false)
-    pushbutton_value = pushbutton.value;
-    print("Pushbutton is:", pushbutton_value)
-    if pushbutton_value is False:
-        print("Detected pushbutton press!")
-        # blink the external LED 3 times
-        for i in range(0,3):
-                delay = .5
-                board_led.value = False
-                time.sleep(delay)
-                board_led.value = True
-                time.sleep(delay)
-
-    # Check the PIR sensor. If it is pressed, the value will be high
-    motion_detected = wait_for_pir_sensor(10) # Timeout after 10 seconds
-    if (motion_detected is True):
-        for i in range(0,10):
-                delay = .1
-                board_led.value = False
-                time.sleep(delay)
-                board_led.value = True
-                time.sleep(delay)
-
-    time.sleep(1)
-
-def wait_for_pir_sensor(max_wait):
-    """Wait for the PIR sensor to be active.
-
-        max_wait : float
-            Time to wait for the sensor to become active in seconds
-
-    :rtype: True if the sensor detects something, False if it times out
+    scheduler.run_once()
+
+def watch_pushbutton():
+    """Task: check the pushbutton on every tick and act on its gestures.
+
+    A short press blinks the external LED 3 times, a double press
+    changes the color of the onboard neopixel and a long press turns
+    everything off. None of them stop the PIR sensor from being watched.
     """
-    global pir_sensor
+    global neopixel_color
+
+    while True:
+        # Check the pushbutton. If it is pressed, the value will be low (false)
+        pushbutton_value = pushbutton.value
+        log.info("Pushbutton is: %s", pushbutton_value)
+        button.update(pushbutton_value is False, ticks_ms())
+
+        gesture = button.get()
+        if gesture == SHORT_PRESS:
+            log.info("Detected pushbutton press!")
+            blink(3, 500)
+        elif gesture == DOUBLE_PRESS:
+            neopixel_color = (neopixel_color + 1) % len(NEOPIXEL_COLORS)
+            log.info("Double press, neopixel color %d", neopixel_color)
+            set_onboard_neopixel(board_neopixel, NEOPIXEL_COLORS[neopixel_color])
+        elif gesture == LONG_PRESS:
+            log.info("Long press, turning everything off")
+            blink(0, 500)
+            neopixel_color = 0
+            set_onboard_neopixel(board_neopixel, BLACK)
+            colorstrip.off()
+
+        yield TICK_MS
+
+def watch_motion():
+    """Task: blink the external LED quickly when the PIR sensor sees motion."""
+    while True:
+        # Check the PIR sensor. If it is pressed, the value will be high
+        motion_detected = yield from pir_sensor_task(pir_sensor, 10, log) # Timeout after 10 seconds
+        if (motion_detected is True):
+            blink(10, 100)
 
-    delay = .25  # Wait 250 ms between checking the value
-    elapsed = 0
-    print("Waiting for PIR Sensor", end='')
-    while (elapsed < max_wait):
-        if (pir_sensor.value is True):
-            print("Detected!")
-            return True
-        time.sleep(delay)
-        elapsed += delay
-        print(".", end='')
+        yield 1000
 
-    print("Timeout")
-    return False
+def blink(times, delay):
+    """Start blinking the external LED. blink_board_led() does the blinking.
 
+        times : int
+            Number of blinks. 0 stops blinking.
+        delay : int
+            Milliseconds the LED stays on, and then off, for each blink
+    """
+    global blinks_left
+    global blink_ms
+
+    blinks_left = times
+    blink_ms = delay
+
+def blink_board_led():
+    """Task: blink the external LED whenever blink() asks for it."""
+    global blinks_left
+
+    while True:
+        if blinks_left > 0:
+            blinks_left = blinks_left - 1
+            # This LED is wired so that it turns on when the pin is low (False)
+            board_led.value = False
+            yield blink_ms
+            board_led.value = True
+            yield blink_ms
+        else:
+            yield TICK_MS
 
 ###################################################################
 # No need to edit below this line.
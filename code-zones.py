@@ -0,0 +1,103 @@
+# A Christmas gift of hardware and code for Annie, Arthur, and Casey 2022
+#
+# More than one light from one board. Each zone is its own RGB strip with
+# its own PIR sensor, timeouts and color, and works just like code.py:
+# the light fades in when someone comes by and fades out after they have
+# gone. See lib/hohoho/zones.py.
+#
+# Copy this over code.py to use it. The wiring, all on the KB2040:
+#
+#   kitchen : strip R, G, B on D3, D4, D5  PIR on D7  pushbutton on D6
+#   hallway : strip R, G, B on D8, D9, D10 PIR on A0  no pushbutton
+#
+# The RP2040 makes PWM with 8 "slices" of two channels each, and a pin
+# can only use its own slice's channel. D3 to D10 are on separate
+# channels so these six strip pins work together. See "More than one
+# light" in README.md before adding a third zone.
+#
+# For more information, see README.md
+
+import board
+
+from hohoho.colors import GOLD, WARM
+from hohoho.frames import FrameTimer
+from hohoho.hardware import setup_board_led, setup_colorstrip
+from hohoho.log import Logger
+from hohoho.metrics import Metrics
+from hohoho.scheduler import Scheduler
+from hohoho.zones import Zone, ZoneGroup
+
+METRICS_REPORT_SECS = 60 * 5  # Print timing numbers this often. Set to 0 to turn off.
+TIMING_DEBUG = False  # Add the loop time and fade frame jitter to the timing numbers
+
+# Green LED attached to pin A3
+board_led = None
+
+# Every zone, and the task that watches all of their sensors
+zones = None
+
+# Runs the tasks so they can all take turns, created in setup()
+scheduler = None
+
+# Loop timing and fade frame jitter for all the zones together
+metrics = None
+
+# Messages for the Serial window, sent once a second
+log = None
+
+def loop():
+    """Gets called in an infinite loop from the main code."""
+    scheduler.run_once()
+    if scheduler.timing:
+        metrics.loop_us.add(scheduler.busy_us)
+
+def report_zones():
+    """Task: say how each zone is doing every few minutes."""
+    while True:
+        yield METRICS_REPORT_SECS * 1000
+        log.info("%s", zones.summary())
+
+def setup():
+    """One time initialization code.
+    """
+    global board_led
+    global zones
+    global scheduler
+    global metrics
+    global log
+
+    board_led = setup_board_led()
+    log = Logger()
+
+    # Each zone gets its own strip, sensor, timeouts and color. The
+    # hallway turns off sooner than the kitchen.
+    kitchen = Zone("kitchen", setup_colorstrip(pins=(board.D3, board.D4, board.D5)),
+                   board.D7, WARM, timeout_secs=60, min_on_secs=600,
+                   button_pin=board.D6)
+    hallway = Zone("hallway", setup_colorstrip(pins=(board.D8, board.D9, board.D10)),
+                   board.A0, GOLD, timeout_secs=30, min_on_secs=60)
+    zones = ZoneGroup((kitchen, hallway))
+
+    scheduler = Scheduler()
+    scheduler.add(log.flush_task())
+    zones.add_to(scheduler, log)
+
+    metrics = Metrics()
+    if TIMING_DEBUG:
+        # Reading the clock to the microsecond makes a long int each
+        # time, so the loop and every fade frame allocate while it is on
+        FrameTimer.jitter = metrics.jitter_us
+        scheduler.timing = True
+    if METRICS_REPORT_SECS > 0:
+        scheduler.add(metrics.report_task(METRICS_REPORT_SECS, log))
+        scheduler.add(report_zones())
+
+    log.info("Waiting for motion in %d zones", len(zones.zones))
+
+# mainline code
+# Call 'setup()' once to initialize everything and 'loop()'
+# in an infinite while loop after that.
+if __name__ == "__main__":
+    setup()
+    while True:
+        loop()
@@ -10,9 +10,12 @@
 #    Keep the light on
 #    While the proxemity sensor has been tripped in the last 60 seconds,
 #      If the pushbutton is pressed, break out of the loop
-#      Blink the neopixel
 #      Keep the light on for another 10 minutes
 #    Fade out the light
+#    If someone comes back while it fades out, fade back in from there
+#
+# The steps above are the states of lib/hohoho/controller.py, which
+# checks for motion and the pushbutton on every frame of every fade.
 #
 # For more information, see README.md
 #
@@ -28,175 +31,370 @@
 # Which itself is based on the Adafruit NEOPIXEL library examples
 #   https://github.com/adafruit/Adafruit_NeoPixel/tree/master/examples
 
-import board
-import digitalio
-import neopixel
-import pwmio
-import time
+# Note the time and free RAM before anything else loads, to see how
+# long starting up takes. See "Starting up faster" in README.md.
+from hohoho.bootstats import BootStats
+boot = BootStats()
+
+# Most of the code lives in lib/hohoho. Only what this script uses is
+# imported, so the rest never takes up any RAM.
+from hohoho.colors import WARM
+from hohoho.controller import (FADING_IN, FADING_OUT, FINISHED, IDLE, MOTION, ON,
+                               STATE_NAMES, TIMEOUT, LightController)
+from hohoho.frames import FrameTimer
+from hohoho.hardware import BUTTON_PIN, PIR_PIN, setup_board_led, setup_colorstrip
+from hohoho.inputs import BUTTON, PIR, InputEvent, create_inputs
+from hohoho.latency import LatencyTracer
+from hohoho.log import Logger, RunLengthTrace
+from hohoho.metrics import Metrics
+from hohoho.occupancy import OccupancyTracker
+from hohoho.scheduler import Scheduler, TICK_MS, ticks_ms
+boot.mark("imports")
 
 # Declare global variables here. We could also initialize them but that is
 # done in the setup() function instead following the pattern of Arduino.
 
 INITIAL_ON_SECS   = 60 * 10 # Keep the light on for at least this long
 PIR_TIMEOUT_SECS  = 60      # Wait this many seconds with no motion before turning off light
+METRICS_REPORT_SECS = 60 * 5  # Print timing numbers this often. Set to 0 to turn off.
+IDLE_SLEEP        = True    # Light sleep while the light is off instead of checking the pins
+TIMING_DEBUG      = False   # Add the loop time and fade frame jitter to the timing numbers
+GC_DEBUG          = False   # Add the memory the fades allocate to the timing numbers
+LIVE_SETTINGS     = False   # Read COLOR, INITIAL_ON_SECS and PIR_TIMEOUT_SECS from
+                            # settings.toml, and again whenever it is saved.
+                            # Saving code.py won't restart it then, see README.md
+RECORD_TRACE      = True    # Record the sensors and the light to trace.bin, when
+                            # boot.py lets code.py write to CIRCUITPY
+KEEP_HISTORY      = True    # Save a record of each time the light was on to the
+                            # history files, also when boot.py allows it
 
 # Green LED attached to pin A3
 board_led = None
 
-# Pushbutton attached to D6
-pushbutton = None
+# Events from the pushbutton attached to D6 and the PIR sensor attached to D7
+inputs = None
 
-# PIR sensor attached to D7
-pir_sensor = None
+# LED strip attached to pins D3, D4, D5
+colorstrip = None
 
-# KB2040 onboard neopixel
-board_neopixel = None
+# Runs the tasks below so they can all take turns, created in setup()
+scheduler = None
 
-# LED strip attached to pins D3, D4, D5
-colorstrip_r = None
-colorstrip_g = None
-colorstrip_b = None
+# Loop timing, fade frame jitter, motion to light latency and event counts
+metrics = None
 
-# See https://www.rapidtables.com/web/color/RGB_Color.html
-# A color definition for "gold"
-#COLOR = (0xFF, 0xD7, 0x00)
-# After playing around, I like this color -EZA
-COLOR = (0xFF, 0x30, 0x05)
+# Times each stage from the PIR sensor seeing motion to the light coming on
+tracer = None
 
-def loop():
-    """Gets called in an infinite loop from the main code.
-    """
-    global pushbutton
-    global pir_sensor
+# Puts the board in light sleep while waiting, if IDLE_SLEEP is on
+idle = None
 
-    # Indentation is important in Python. Make sure everything lines up if you want it
-    # to live inside of a function or a loop.
+# Memory allocated by each fade, if GC_DEBUG is on
+allocs = None
 
-    # Prints "Hello world!" to the Serial (CircuitPython REPL) window in Mu Editor
-    print("Default code for HO HO HO 2022")
+# Messages for the Serial window, sent once a second instead of one
+# print() at a time, and the '+'/'-' motion trace squeezed into runs
+# like "+x42 -x17".
+log = None
+motion_trace = None
 
-    # Blink an LED just to show how that's done.
-    # Note that this LED is wired up with its ground lead to the MCU pin
-    # so that it turns on when the pin is low (False) and turns off when
-    # the pin is high (True)
-    board_led.value = False
-    time.sleep(.5)
-    board_led.value = True
-    time.sleep(.5)
+# When the PIR sensor last saw motion, so light_show() knows when to turn off
+occupancy = None
 
-    # Testing: Set the colorstrip to one color for a moment
-    #set_colorstrip((0xff, 0, 0), 1.0)
-    #time.sleep(2)
-    #set_colorstrip((0, 0xff, 0), 1.0)
-    #time.sleep(2)
-    #set_colorstrip((0, 0, 0xff), 1.0)
-    #time.sleep(2)
-
-    # Wait for the pushbutton or the PIR sensor to activate
-    print("Waiting for pushbutton or motion", end='')
-    while True:
-        if pushbutton.value is False:
-            print()
-            print("Button press detected.")
-            break
+# Watches settings.toml for changes, if LIVE_SETTINGS is on
+settings = None
 
-        if pir_sensor.value is True:
-            print()
-            print("Motion detected.");
-            board_led.value = False
-            break
+# Saves every input edge and change of the light to trace.bin, if
+# RECORD_TRACE is on and the button was held down while starting up
+recorder = None
 
-        time.sleep(.25)
-        print(".", end="")
-    print()
+# Saves when the light was on, for how long and why, if KEEP_HISTORY is on
+# and the button was held down while starting up
+history = None
 
-    print("Turning on light.")
+# Fades the light in and out as people come and go, created in setup()
+controller = None
 
-    # Fade in the color
-    linearfade_colorstrip(COLOR, 0, 1.0, 3)
+# Shared between the tasks. watch_inputs() sets these and the others read them.
+motion_detected = False  # True while the PIR sensor sees motion
+ready_to_sleep = False   # light_show() has nothing to do until the button or motion
+trigger_ms = 0           # ticks_ms() of the latest button press or motion
 
-    # Keep track of how long ago the PIR was triggered
-    pir_last_detected_secs = 0
-    # Keep track of how many seconds have elapsed since the light turned on
-    elapsed_secs = 0
+# The color of the light. See lib/hohoho/colors.py for others, like
+# GOLD, or make your own with https://www.rapidtables.com/web/color/RGB_Color.html
+COLOR = WARM
 
+def loop():
+    """Gets called in an infinite loop from the main code.
 
-    print("Waiting to turn off light")
+    Each pass runs every task that is ready for a turn and then sleeps
+    until the next one is. Nothing in here should call time.sleep(),
+    use 'yield' in a task instead.
+    """
+    global ready_to_sleep
+
+    scheduler.run_once()
+    if ready_to_sleep:
+        # The pass that went to sleep would spoil the loop timing, so skip it
+        ready_to_sleep = False
+        idle_sleep()
+    elif scheduler.timing:
+        metrics.loop_us.add(scheduler.busy_us)
+
+def idle_sleep():
+    """Light sleep until the pushbutton is pressed, the PIR sensor sees
+    motion or the idle timeout passes.
+
+    The alarms need the pins to themselves, so the inputs are released
+    first and set up again after waking.
+    """
+    global inputs
+
+    # Something may have happened since watch_inputs() last looked.
+    # Going to sleep now would lose it, so let it be handled first.
+    inputs.update()
+    if len(inputs.events):
+        return
+
+    motion_trace.add("z")
+    log.flush()
+    # The new inputs start from what the pins were doing before sleeping,
+    # so a PIR sensor that is still seeing the same motion (or a button
+    # still held) isn't taken for a new event after every wake up.
+    active = inputs.active
+    inputs.deinit()
+    source = idle.sleep()
+    inputs = create_inputs(BUTTON_PIN, PIR_PIN, active=active)
+    if source == PIR:
+        # The edge happened while asleep, so time from about when it
+        # happened. Waking up and setting up the inputs again is the
+        # "wake" stage.
+        tracer.start(idle.edge_ms)
+        tracer.mark(0)
+    if source is not None and idle.released:
+        # The tap or the motion was over before we woke up, so the new
+        # inputs won't see it
+        inputs.events.put(source, True, idle.woke_ms)
+        inputs.events.put(source, False, idle.woke_ms)
+    idle.resumed()
+
+def watch_inputs():
+    """Task: handle pushbutton and PIR sensor events on every tick.
+
+    Other tasks look at motion_detected instead of reading the pins
+    themselves, and the controller is told about every press and every
+    time motion starts. Every change of the pins is queued up as an
+    event, so even a quick tap is never missed. Motion only counts once
+    the occupancy tracker has seen it last long enough, so a short
+    glitch on the PIR wire doesn't turn the light on.
+    """
+    global motion_detected
+    global trigger_ms
+
+    event = InputEvent()
+    starts = occupancy.starts
     while True:
-        if pushbutton.value is False:
-            print()
-            print("Button press detected.")
-            # exit the while loop
-            break
-
-        if pir_sensor.value is True:
-            print("+", end='')
-            board_led.value = False
-            pir_last_detected_secs = 0
+        inputs.update()
+        while inputs.events.get_into(event):
+            if recorder is not None:
+                recorder.input(event.source, event.pressed, event.timestamp)
+            if event.source == BUTTON:
+                # Only count the moment it goes down so holding it counts once.
+                if event.pressed:
+                    controller.button()
+                    if history is not None:
+                        history.button()
+                    tracer.cancel()
+                    trigger_ms = event.timestamp
+                    metrics.button_events += 1
+            else:
+                motion_detected = event.pressed
+                occupancy.motion(event.pressed, event.timestamp)
+                if event.pressed:
+                    metrics.pir_events += 1
+                if occupancy.starts != starts:
+                    starts = occupancy.starts
+                    motion_started()
+                elif not event.pressed and not occupancy.active:
+                    # Over too soon to count. Don't time the next motion
+                    # from this one, if it woke the board.
+                    tracer.cancel()
+        # Motion that has now lasted long enough
+        occupancy.update()
+        if occupancy.starts != starts:
+            starts = occupancy.starts
+            motion_started()
+        yield TICK_MS
+
+def motion_started():
+    """Tell the controller about motion the occupancy tracker accepted."""
+    global trigger_ms
+
+    if controller.state == IDLE:
+        # Already started if this motion woke the board
+        tracer.start(occupancy.last_motion_ms)
+        tracer.mark(1)
+    controller.motion()
+    if history is not None:
+        history.motion()
+    trigger_ms = occupancy.last_motion_ms
+
+def report_status():
+    """Task: keep a trace for the Serial window.
+
+    Adds '.' every quarter second while waiting, then '+' (motion) or
+    '-' (no motion) every second while the light is on. They show up
+    as runs like "+x42 -x17" rather than one character at a time.
+    """
+    while True:
+        if controller.state == FADING_IN or controller.state == ON:
+            motion_trace.add("+" if motion_detected else "-")
+            yield 1000
         else:
-            print("-", end='')
-            board_led.value = True
-            pir_last_detected_secs = pir_last_detected_secs + 1
-
-        if (elapsed_secs > INITIAL_ON_SECS and pir_last_detected_secs > PIR_TIMEOUT_SECS):
-            print()
-            print("Minimum time of %d seconds has expired." % (INITIAL_ON_SECS))
-            print("No motion for %d seconds." % (PIR_TIMEOUT_SECS))
-            # exit the while loop
-            break
+            if controller.state == IDLE:
+                motion_trace.add(".")
+            yield 250
 
-        time.sleep(1)
-        elapsed_secs = elapsed_secs + 1
+def light_show():
+    """Task: turn the light on when someone is nearby and off after they leave.
 
+    The controller decides what to do and draws the fades, see
+    lib/hohoho/controller.py. This gives it a turn on every frame and
+    reports what it did.
+    """
+    global ready_to_sleep
 
-    # Fade out the color to off
-    print("Turning out light.")
-    linearfade_colorstrip(COLOR, 1.0, 0, 3)
+    # Indentation is important in Python. Make sure everything lines up if you want it
+    # to live inside of a function or a loop.
 
-    time.sleep(1)
+    # Prints "Hello world!" to the Serial (CircuitPython REPL) window in Mu Editor
+    log.info("Default code for HO HO HO 2022")
 
-def set_onboard_neopixel(color):
-    """Sets the value of the onboard neopixel to a specific color
+    # Blink an LED just to show how that's done.
+    # Note that this LED is wired up with its ground lead to the MCU pin
+    # so that it turns on when the pin is low (False) and turns off when
+    # the pin is high (True)
+    board_led.value = False
+    boot.mark("first light")
+    log.info(boot.summary())
+    yield 500
+    board_led.value = True
+    yield 500
 
-        color : tuple
-            Three values for (red, green, blue) each from 0 - 255
-    """
-    global board_neopixel
-    board_neopixel[0] = color
-    board_neopixel.show()
-
-def linearfade_colorstrip(color, start_brightness, end_brightness, duration):
-    """Fade the colorstrip from one brightness level to another over linearly the specified time
-
-        color : tuple of (int, int, int)
-            Color to use for the fade operation
-        start_brightness : float
-            Value from 0 (off) to 1.0 (full on) to start the fade operation
-        end_brightness : float
-            Value from 0 (off) to 1.0 (full on) to end the fade operation.  The colorstrip
-            will be left at this value when the function exits.
-        duration : float
-            Amount of time in seconds that the fade should last.
+    # Testing: Set the colorstrip to one color for a moment
+    #colorstrip.set_color((0xff, 0, 0), 1.0)
+    #yield 2000
+    #colorstrip.set_color((0, 0xff, 0), 1.0)
+    #yield 2000
+    #colorstrip.set_color((0, 0, 0xff), 1.0)
+    #yield 2000
+
+    log.info("Waiting for pushbutton or motion")
+    while True:
+        before = controller.state
+        # With GC_DEBUG on, measure the fade frames, but not the logging
+        # and bookkeeping around them
+        fading = allocs is not None and (before == FADING_IN or before == FADING_OUT)
+        if fading:
+            allocs.start_step()
+        delay = controller.step()
+        if fading:
+            allocs.end_step(STATE_NAMES[before])
+        if controller.state != before:
+            state_changed(before)
+
+        # The board LED is on (low) while there is motion, the same as
+        # the '+' and '-' in the trace
+        if board_led.value != (not motion_detected):
+            board_led.value = not motion_detected
+
+        # Nothing to do until something happens, so loop() can sleep.
+        # Not while the PIR sensor's last change hasn't counted yet,
+        # since it might be motion and its edge has already gone by.
+        if controller.state == IDLE and not controller.pending() and not occupancy.update():
+            ready_to_sleep = IDLE_SLEEP
+        yield delay
+
+def state_changed(before):
+    """Say what the controller just did and keep the timing numbers.
+
+        before : int
+            The controller's state before it changed
     """
-    interval = duration / 100
-    brightness_increment = (end_brightness - start_brightness) / 100
-    for i in range(0, 100):
-        brightness = start_brightness + (i * brightness_increment)
-        set_colorstrip(color, brightness)
-        time.sleep(interval)
-
-def set_colorstrip(color, brightness):
-    """Set the color strip to the specified color and brightness
-
-        color : tuple of (int, int, int)
-            An r,g,b color tuple with values 0-255 for each color
-        brightness : float
-            Intensity of the lightstrip. 1.0 is brightest, 0.0 is off
+    state = controller.state
+    metrics.dropped_frames += controller.dropped
+    controller.dropped = 0
+    motion_trace.finish()
+    if recorder is not None:
+        recorder.state(state, controller.cause)
+    if allocs is not None and (state == FADING_IN or state == FADING_OUT):
+        allocs.stats(STATE_NAMES[state]).runs += 1
+    if history is not None:
+        history.state_changed(state, controller.cause)
+
+    if state == FADING_IN:
+        if before == IDLE:
+            log.info("Motion detected." if controller.cause == MOTION else "Button press detected.")
+            log.info("Turning on light.")
+            # The first step of the fade was drawn right away, so this is how
+            # long it took from the button or motion to the light changing.
+            metrics.latency_ms.add(ticks_ms() - trigger_ms)
+        else:
+            log.info("Motion detected. Turning the light back up.")
+    elif state == ON:
+        # Stays on for at least INITIAL_ON_SECS from now, and until there
+        # has been no motion for PIR_TIMEOUT_SECS. The tracker goes by the
+        # clock, so it doesn't matter how often we ask.
+        log.info("Waiting to turn off light")
+    elif state == FADING_OUT:
+        if controller.cause == TIMEOUT:
+            log.info("Minimum time of %d seconds has expired.", INITIAL_ON_SECS)
+            log.info("No motion for %d seconds.", occupancy.secs_since_motion())
+        else:
+            log.info("Button press detected.")
+        log.info("Turning out light.")
+    else:
+        if controller.cause != FINISHED:
+            log.info("Button press detected. Light off.")
+        log.info("Waiting for pushbutton or motion")
+
+def apply_settings(changes):
+    """Use new values from settings.toml without restarting.
+
+        changes : dict
+            Setting name -> new value, for the settings that changed
     """
-    # Scale the 0-255 value for each color to 65535-0
-    colorstrip_r.duty_cycle = 65535-int(brightness * ((color[0] / 255.0) * 65535.0))  # Red
-    colorstrip_g.duty_cycle = 65535-int(brightness * ((color[1] / 255.0) * 65535.0))  # Green
-    colorstrip_b.duty_cycle = 65535-int(brightness * ((color[2] / 255.0) * 65535.0))  # Blue
+    global COLOR
+    global INITIAL_ON_SECS
+    global PIR_TIMEOUT_SECS
+
+    from hohoho.settings import color_value
+
+    if "COLOR" in changes:
+        try:
+            COLOR = color_value(changes["COLOR"])
+            if controller is not None:
+                controller.set_color(COLOR)
+        except ValueError as error:
+            log.warning("COLOR: %s", error)
+    INITIAL_ON_SECS = seconds_setting(changes, "INITIAL_ON_SECS", INITIAL_ON_SECS)
+    PIR_TIMEOUT_SECS = seconds_setting(changes, "PIR_TIMEOUT_SECS", PIR_TIMEOUT_SECS)
+
+    # The occupancy tracker keeps going with the new times, so a light
+    # that is on stays on if it should
+    occupancy.timeout_ms = PIR_TIMEOUT_SECS * 1000
+    occupancy.min_on_ms = INITIAL_ON_SECS * 1000
+
+def seconds_setting(changes, name, current):
+    """The new value of a setting in seconds, or current if it didn't
+    change or isn't a whole number."""
+    if name not in changes:
+        return current
+    value = changes[name]
+    if not isinstance(value, int) or value < 0:
+        log.warning("%s must be a whole number of seconds, not %r", name, value)
+        return current
+    return value
 
 def setup():
     """One time initialization code.
@@ -206,30 +404,117 @@ def setup():
     # with the 'global' keyword so that Python doesn't create a
     # local variable instead that disappears after the function exits.
     global board_led
-    global board_neopixel
-    global pushbutton
-    global pir_sensor
-    global colorstrip_r
-    global colorstrip_g
-    global colorstrip_b
-
-    board_led = digitalio.DigitalInOut(board.A3)
-    board_led.direction = digitalio.Direction.OUTPUT
-
-    board_neopixel = neopixel.NeoPixel(board.NEOPIXEL, 1)
-
-    pushbutton = digitalio.DigitalInOut(board.D6)
-    pushbutton.direction = digitalio.Direction.INPUT
-    pushbutton.pull = digitalio.Pull.UP
-
-    pir_sensor = digitalio.DigitalInOut(board.D7)
-    pir_sensor.direction = digitalio.Direction.INPUT
-
-    # Duty cycle 100% means that the GPIO pins are high, meaning no
-    # current should flow through the LEDs, turning them off.
-    colorstrip_r = pwmio.PWMOut(board.D3, frequency=5000, duty_cycle=65535)
-    colorstrip_b = pwmio.PWMOut(board.D4, frequency=5000, duty_cycle=65535)
-    colorstrip_g = pwmio.PWMOut(board.D5, frequency=5000, duty_cycle=65535)
+    global inputs
+    global colorstrip
+    global scheduler
+    global metrics
+    global log
+    global motion_trace
+    global idle
+    global allocs
+    global occupancy
+    global settings
+    global tracer
+    global controller
+    global recorder
+    global history
+
+    board_led = setup_board_led()
+
+    # The pushbutton reads low (False) when pressed and the PIR sensor
+    # reads high (True) when it sees motion.
+    inputs = create_inputs(BUTTON_PIN, PIR_PIN)
+
+    # The RGB strip on D3, D4 and D5.
+    colorstrip = setup_colorstrip()
+
+    # Have a "smart" NeoPixel strip? Use this line instead, with the
+    # pin the strip is connected to and the number of LEDs it has.
+    # Everything else works the same.
+    #import board
+    #colorstrip = setup_colorstrip(board.D2, 60)
+
+    # Changes of the PIR pin shorter than 50 ms are ignored, and motion
+    # within 2 seconds of the last counts as the same visit.
+    occupancy = OccupancyTracker(PIR_TIMEOUT_SECS, INITIAL_ON_SECS,
+                                 hysteresis_ms=50, retrigger_ms=2000)
+
+    log = Logger()
+    motion_trace = RunLengthTrace(log)
+
+    if LIVE_SETTINGS:
+        from hohoho.settings import LiveSettings, disable_autoreload
+        settings = LiveSettings("settings.toml", {
+            "COLOR": COLOR,
+            "INITIAL_ON_SECS": INITIAL_ON_SECS,
+            "PIR_TIMEOUT_SECS": PIR_TIMEOUT_SECS,
+        })
+        apply_settings(settings.load())
+        settings.report_bad_lines(log)
+        # Saving settings.toml would restart everything, which is what
+        # this is here to avoid. Press Ctrl-D to run a changed code.py.
+        if disable_autoreload():
+            log.info("Autoreload is off. Press Ctrl-D in the Serial window to run changes to code.py.")
+
+    # Fades the light in and out. Motion and the pushbutton are checked
+    # on every frame, so a fade can be turned around or cut short.
+    controller = LightController(colorstrip, COLOR, occupancy, fade_secs=3)
+
+    if GC_DEBUG:
+        from hohoho.gcstats import AllocTracker
+        allocs = AllocTracker()
+
+    # Each task is its own little program. The scheduler takes turns running them.
+    scheduler = Scheduler()
+    scheduler.add(log.flush_task())
+    scheduler.add(watch_inputs())
+    scheduler.add(report_status())
+    scheduler.add(light_show())
+    if settings is not None:
+        scheduler.add(settings.watch_task(apply_settings, log))
+
+    # boot.py only lets code.py write to CIRCUITPY if the button was held
+    writable = False
+    if RECORD_TRACE or KEEP_HISTORY:
+        from hohoho.recorder import flash_writable
+        writable = flash_writable()
+        if not writable:
+            log.info("Not recording. Hold the button while starting up to record.")
+    if RECORD_TRACE and writable:
+        from hohoho.recorder import TraceRecorder
+        # Written in 512 byte blocks, when one fills up and every 5 minutes
+        recorder = TraceRecorder("trace.bin")
+        scheduler.add(recorder.flush_task(log))
+        log.info("Recording to trace.bin, boot %d", recorder.boot)
+    if KEEP_HISTORY and writable:
+        from hohoho.history import HistoryStore
+        # Written 16 sessions at a time, or every hour
+        history = HistoryStore("history")
+        scheduler.add(history.flush_task(log))
+        log.info("Saving history to history%d.bin", history.index)
+
+    # Keep track of how well everything keeps up
+    metrics = Metrics()
+    if TIMING_DEBUG:
+        # Reading the clock to the microsecond makes a long int each
+        # time, so the loop and every fade frame allocate while it is on
+        FrameTimer.jitter = metrics.jitter_us
+        scheduler.timing = True
+    # The controller marks the fade stage as it starts the fade in, and
+    # the strip marks the last stage itself, the first time it lights up
+    tracer = LatencyTracer(colorstrip, ("wake", "seen", "fade", "lit"))
+    controller.trace(tracer, 2)
+    metrics.latency = tracer
+    metrics.allocs = allocs
+    if METRICS_REPORT_SECS > 0:
+        scheduler.add(metrics.report_task(METRICS_REPORT_SECS, log))
+
+    if IDLE_SLEEP:
+        from hohoho.idle import IdleSleeper
+        idle = IdleSleeper(BUTTON_PIN, PIR_PIN)
+        metrics.idle = idle
+
+    boot.mark("setup")
 
 # mainline code
 # Call 'setup()' once to initialize everything and 'loop()'
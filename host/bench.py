@@ -0,0 +1,358 @@
+# Benchmarks for the code that runs while the light is on.
+#
+# Runs the real code.py and code-example.py against the fake hardware in
+# host/fakes, the same way host/sim.py does, and measures:
+#
+#   - colorstrip.set_color() and set_rgb() calls per second. set_color()
+#     is what the original set_colorstrip() function became.
+#   - colorwheel() calls per second, the lookup table in code-example.py
+#     and the math version in lib/hohoho/colorwheel.py
+#   - How far a fade's length is from the duration it was asked for, on
+#     the virtual clock inside code.py and on the computer's real clock
+#   - Input to light latency on the virtual clock: from the PIR sensor
+#     seeing motion to code.py's first light, from motion during a fade
+#     out to the light getting brighter again, and from a long press to
+#     code-example.py turning the strip off
+#   - Fades in 1, 2, 4 and 8 zones at once on the real clock: how far
+#     each zone's fade is from its length, frames dropped, and how long
+#     each pass of the scheduler takes, which should grow in step with
+#     the number of zones
+#
+#   python host/bench.py --out before.json
+#   ... change something ...
+#   python host/bench.py --compare before.json
+#
+# Calls per second depend on the computer and on the fake hardware,
+# which records every write, so only compare runs on the same computer.
+# The latencies are virtual time, and should come out the same on any
+# computer.
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+import sim  # Sets up the paths to lib and host/fakes
+from sim import hwsim
+
+import microcontroller
+from hohoho.colors import WARM
+from hohoho.colorwheel import colorwheel as colorwheel_math
+from hohoho.controller import IDLE, ON
+from hohoho.effects import FADE_STEPS, linearfade_colorstrip
+from hohoho.hardware import setup_colorstrip
+from hohoho.scheduler import Scheduler
+from hohoho.zones import Zone, ZoneGroup
+
+CALLS = 100000          # Calls made by each calls per second benchmark
+LATENCY_TRIALS = 20     # Motion or button presses timed for each latency
+REAL_FADE_SECS = 0.5    # Length of each fade timed on the real clock
+REAL_FADES = 3
+ZONE_COUNTS = (1, 2, 4, 8)  # Zones faded in together by bench_zones()
+ZONE_FADE_SECS = 1.0
+
+OFF = 65535  # Duty cycle of a strip pin with the LED off (active low)
+STRIP_PINS = ("D3", "D4", "D5")
+
+
+def load(script_name):
+    """Load one of the scripts and run its setup(), without its printing."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        script = sim.load_script(os.path.join(sim.REPO_DIR, script_name))
+        script.setup()
+    return script
+
+
+def run_quietly(script, seconds):
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim.run(script, seconds, setup=False)
+
+
+def calls_per_second(function, arguments):
+    """Call function once for each of CALLS arguments, cycling through them."""
+    count = len(arguments)
+    start = time.perf_counter()
+    for i in range(CALLS):
+        function(arguments[i % count])
+    return int(CALLS / (time.perf_counter() - start))
+
+
+def percentile(values, percent):
+    """Nearest rank percentile, the same way LatencyTracer works them out."""
+    ordered = sorted(values)
+    return ordered[max((len(ordered) * percent + 99) // 100, 1) - 1]
+
+
+def bench_colorstrip():
+    """set_color() and set_rgb() on code.py's colorstrip, stepping the
+    brightness the way a fade does."""
+    script = load("code.py")
+    colorstrip = script.colorstrip
+    brightnesses = [i / 100 for i in range(101)]
+    levels = [colorstrip.scaler.level(brightness) for brightness in brightnesses]
+    red, green, blue = WARM
+    results = {
+        "set_color calls/sec": calls_per_second(
+            lambda brightness: colorstrip.set_color(WARM, brightness), brightnesses),
+        "set_rgb calls/sec": calls_per_second(
+            lambda level: colorstrip.set_rgb(red, green, blue, level), levels),
+    }
+    del hwsim.writes[:]
+    return results
+
+
+def bench_colorwheel():
+    """colorwheel() from code-example.py and from lib/hohoho/colorwheel.py."""
+    script = load("code-example.py")
+    positions = list(range(256))
+    return {
+        "colorwheel table calls/sec": calls_per_second(script.colorwheel, positions),
+        "colorwheel math calls/sec": calls_per_second(colorwheel_math, positions),
+    }
+
+
+def strip_writes(after_ns):
+    """Writes to the strip's pins from after_ns on, as (time in ns, pin name, value)."""
+    return [write for write in hwsim.writes if write[0] >= after_ns and write[1] in STRIP_PINS]
+
+
+def first_light_ns(after_ns):
+    """When the strip was first set to anything but off, from after_ns on."""
+    for at_ns, pin_name, value in strip_writes(after_ns):
+        if value != OFF:
+            return at_ns
+    return None
+
+
+def bench_fade_timing():
+    """How long code.py's fade in really takes, and a fade on the real clock."""
+    script = load("code.py")
+    hwsim.set_input("D7", True, at=5)
+    run_quietly(script, 15)
+    fade = [at_ns for at_ns, pin_name, value in strip_writes(5000000000) if pin_name == "D3"]
+    # The fade in is the first 3 seconds of writes after the motion. Its
+    # step 0 would be off, which the strip already is, so the fade starts
+    # on step 1 and its first write is one step in.
+    fade = [at_ns for at_ns in fade if at_ns - fade[0] <= 3500000000]
+    virtual_error_ms = (fade[-1] - fade[0]) / 1e6 - 3000 * (FADE_STEPS - 1) / FADE_STEPS
+
+    # The same fade with time.sleep() really sleeping
+    hwsim.uninstall_clock()
+    errors = []
+    dropped = 0
+    for i in range(REAL_FADES):
+        start = time.perf_counter()
+        dropped += linearfade_colorstrip(script.colorstrip, WARM, 0, 1.0, REAL_FADE_SECS)
+        errors.append((time.perf_counter() - start - REAL_FADE_SECS) * 1000)
+    del hwsim.writes[:]
+    return {
+        "fade in error ms (virtual)": round(virtual_error_ms, 3),
+        "fade error ms (real clock, worst)": round(max(errors, key=abs), 3),
+        "fade dropped frames (real clock)": dropped,
+    }
+
+
+def bench_motion_latency():
+    """code.py: PIR sensor rising edge to the first non-zero duty cycle.
+
+    Each trial moves the motion a little later inside a tick, so the
+    numbers show the spread and not one lucky moment. code.py's
+    LatencyTracer splits the time into stages, which are added too.
+    The motion comes after the first idle timeout, so the board is
+    asleep and already knows how long waking up takes.
+    """
+    latencies = []
+    stages = {}
+    for trial in range(LATENCY_TRIALS):
+        script = load("code.py")
+        motion_ns = 65000000000 + trial * 3700000
+        hwsim.set_input("D7", True, at=motion_ns / 1e9)
+        run_quietly(script, 68)
+        lit_ns = first_light_ns(motion_ns)
+        latencies.append((lit_ns - motion_ns) / 1e6)
+        tracer = script.tracer
+        for i, stage in enumerate(tracer.stages):
+            stages.setdefault(stage, []).append(tracer.parts[i][0])
+    results = {
+        "motion to light ms p50": percentile(latencies, 50),
+        "motion to light ms p95": percentile(latencies, 95),
+        "motion to light ms p99": percentile(latencies, 99),
+        "motion to light ms max": max(latencies),
+    }
+    for stage in stages:
+        results["motion stage %s ms p50" % stage] = percentile(stages[stage], 50)
+    return results
+
+
+def bench_reversal_latency():
+    """code.py: motion while the light fades out, to the light getting
+    brighter again."""
+    latencies = []
+    for trial in range(LATENCY_TRIALS):
+        script = load("code.py")
+        # Turn on with the button, then let it time out as soon as it can
+        script.occupancy.min_on_ms = 0
+        script.occupancy.timeout_ms = 500
+        hwsim.set_input("D6", False, at=2)
+        hwsim.set_input("D6", True, at=2.1)
+        # The fade in ends at 5 seconds and the fade out starts at 5.5
+        motion_ns = 6500000000 + trial * 3700000
+        hwsim.set_input("D7", True, at=motion_ns / 1e9)
+        run_quietly(script, 8)
+        # Red gets brighter when its (active low) duty cycle goes down
+        last = OFF
+        for at_ns, pin_name, value in strip_writes(0):
+            if pin_name != "D3":
+                continue
+            if at_ns >= motion_ns and value < last:
+                latencies.append((at_ns - motion_ns) / 1e6)
+                break
+            last = value
+    return {
+        "fade out reversal ms p50": percentile(latencies, 50),
+        "fade out reversal ms max": max(latencies),
+    }
+
+
+def bench_button_latency():
+    """code-example.py: how long after a long press is reported (held for
+    Button.long_ms) the strip goes dark."""
+    latencies = []
+    for trial in range(LATENCY_TRIALS):
+        script = load("code-example.py")
+        press_ns = 5000000000 + trial * 3700000
+        hwsim.set_input("D6", False, at=press_ns / 1e9)
+        hwsim.set_input("D6", True, at=press_ns / 1e9 + 1.5)
+        run_quietly(script, 8)
+        long_press_ns = press_ns + script.button.long_ms * 1000000
+        duty = dict((pin_name, None) for pin_name in STRIP_PINS)
+        for at_ns, pin_name, value in hwsim.writes:
+            if pin_name in duty:
+                duty[pin_name] = value
+            if at_ns >= long_press_ns and all(value == OFF for value in duty.values()):
+                latencies.append((at_ns - long_press_ns) / 1e6)
+                break
+    return {
+        "long press to off ms p50": percentile(latencies, 50),
+        "long press to off ms max": max(latencies),
+    }
+
+
+def fade_zones(count):
+    """Fade in count zones at once on the real clock.
+
+    The zones have made up pins, Z0_R and so on, since the KB2040 doesn't
+    have enough for 8 of them. Everything else is what code-zones.py runs.
+
+    :rtype: tuple of (list of fade lengths in ms, dropped frames, list of
+            busy microseconds for each scheduler pass)
+    """
+    hwsim.reset()
+    hwsim.uninstall_clock()
+    zones = []
+    for i in range(count):
+        pins = [microcontroller.Pin("Z%d_%s" % (i, color)) for color in "RGB"]
+        pir_pin = microcontroller.Pin("Z%d_PIR" % i)
+        zones.append(Zone("zone %d" % i, setup_colorstrip(pins=pins), pir_pin, WARM,
+                          fade_secs=ZONE_FADE_SECS))
+        # Every sensor sees motion from the start
+        hwsim.set_input(pir_pin.name, True, at=0)
+    group = ZoneGroup(zones)
+    scheduler = Scheduler()
+    scheduler.timing = True
+    group.add_to(scheduler)
+
+    # Each fade is timed from when its zone starts fading in, since
+    # motion only counts once it has lasted the tracker's hysteresis_ms
+    starts = [None] * count
+    lengths = [None] * count
+    busy_us = []
+    while None in lengths:
+        scheduler.run_once()
+        busy_us.append(scheduler.busy_us)
+        now = time.perf_counter()
+        for i in range(count):
+            state = zones[i].controller.state
+            if starts[i] is None and state != IDLE:
+                starts[i] = now
+            if lengths[i] is None and state == ON:
+                lengths[i] = (now - starts[i]) * 1000
+    del hwsim.writes[:]
+    return lengths, group.dropped(), busy_us
+
+
+def bench_zones():
+    """Fade timing and scheduler cost with more and more zones."""
+    # A fade starts one step in, see bench_fade_timing()
+    expected_ms = ZONE_FADE_SECS * 1000 * (FADE_STEPS - 1) / FADE_STEPS
+    results = {}
+    for count in ZONE_COUNTS:
+        lengths, dropped, busy_us = fade_zones(count)
+        errors = [length - expected_ms for length in lengths]
+        results["zones %d fade error ms (worst)" % count] = round(max(errors, key=abs), 3)
+        results["zones %d dropped frames" % count] = dropped
+        results["zones %d busy us per pass p50" % count] = percentile(busy_us, 50)
+        results["zones %d busy us per pass p99" % count] = percentile(busy_us, 99)
+    return results
+
+
+BENCHMARKS = (bench_colorstrip, bench_colorwheel, bench_fade_timing,
+              bench_motion_latency, bench_reversal_latency, bench_button_latency,
+              bench_zones)
+
+
+def run_all():
+    """Run every benchmark.
+
+    :rtype: dict of result name -> number
+    """
+    results = {}
+    for benchmark in BENCHMARKS:
+        results.update(benchmark())
+    hwsim.uninstall_clock()
+    return results
+
+
+def compare(old, new):
+    """Print each result next to the one from an earlier run."""
+    for name in new:
+        if name not in old:
+            print("  %-36s %12s -> %12s" % (name, "-", new[name]))
+            continue
+        change = ""
+        if old[name]:
+            change = "%+.1f%%" % ((new[name] - old[name]) * 100 / abs(old[name]))
+        print("  %-36s %12s -> %12s %8s" % (name, old[name], new[name], change))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark code.py and code-example.py on fake hardware.")
+    parser.add_argument("--out", metavar="FILE", help="save the results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="show the change from results saved with --out")
+    args = parser.parse_args(argv)
+
+    results = run_all()
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f)["results"], results)
+    else:
+        for name in results:
+            print("  %-36s %12s" % (name, results[name]))
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({
+                "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results,
+            }, f, indent=2)
+        print("Saved to %s" % args.out)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+# Host benchmark for set_colorstrip()
+#
+# Compares the original float version of set_colorstrip() with the
+# fixed point version from lib/hohoho/colorscale.py, both when it is
+# given a float brightness and when it is given a level the way a fade
+# does. Run it on your computer with:
+#
+#   python host/bench_colorscale.py
+#
+# A desktop CPU has floating point hardware, so there the float version
+# can even win. The KB2040 does floats in software, so to see the real
+# difference copy this file onto the CIRCUITPY drive as code.py and
+# watch the Serial window.
+
+import sys
+import time
+
+ON_BOARD = sys.implementation.name == "circuitpython"
+
+if not ON_BOARD:
+    import os
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib"))
+
+from hohoho.colorscale import ColorScaler, FULL_LEVEL
+
+COLOR = (0xFF, 0x30, 0x05)
+CALLS = 2000 if ON_BOARD else 200000
+
+
+class Pin:
+    """Stands in for pwmio.PWMOut so the benchmark doesn't need a board."""
+
+    def __init__(self):
+        self.duty_cycle = 65535
+
+
+colorstrip_r = Pin()
+colorstrip_g = Pin()
+colorstrip_b = Pin()
+color_scaler = ColorScaler()
+
+
+def set_colorstrip_float(color, brightness):
+    colorstrip_r.duty_cycle = 65535-int(brightness * ((color[0] / 255.0) * 65535.0))  # Red
+    colorstrip_g.duty_cycle = 65535-int(brightness * ((color[1] / 255.0) * 65535.0))  # Green
+    colorstrip_b.duty_cycle = 65535-int(brightness * ((color[2] / 255.0) * 65535.0))  # Blue
+
+
+def set_colorstrip_table(color, brightness):
+    intensity = color_scaler.scale(color, brightness)
+    colorstrip_r.duty_cycle = 65535 - intensity[0]  # Red
+    colorstrip_g.duty_cycle = 65535 - intensity[1]  # Green
+    colorstrip_b.duty_cycle = 65535 - intensity[2]  # Blue
+
+
+def set_colorstrip_fixed(color, level):
+    intensity = color_scaler.scale_rgb(color[0], color[1], color[2], level)
+    colorstrip_r.duty_cycle = 65535 - intensity[0]  # Red
+    colorstrip_g.duty_cycle = 65535 - intensity[1]  # Green
+    colorstrip_b.duty_cycle = 65535 - intensity[2]  # Blue
+
+
+# The 100 steps of a fade from off to full on, as floats and as levels
+FADE_BRIGHTNESS = [i / 100 for i in range(100)]
+FADE_LEVELS = [(FULL_LEVEL * i + 50) // 100 for i in range(100)]
+
+
+def calls_per_second(function, brightness):
+    """Call function the way a fade does and report how many calls fit in a second."""
+    start = time.monotonic_ns()
+    for i in range(CALLS):
+        function(COLOR, brightness[i % 100])
+    elapsed = time.monotonic_ns() - start
+    return CALLS * 1000000000 // elapsed
+
+
+def max_error():
+    """Largest difference between the two versions over every color value and level."""
+    worst = 0
+    for level in range(256):
+        brightness = level / 255
+        for value in range(256):
+            set_colorstrip_float((value, value, value), brightness)
+            expected = colorstrip_r.duty_cycle
+            set_colorstrip_table((value, value, value), brightness)
+            worst = max(worst, abs(expected - colorstrip_r.duty_cycle))
+    return worst
+
+
+if __name__ == "__main__":
+    before = calls_per_second(set_colorstrip_float, FADE_BRIGHTNESS)
+    after = calls_per_second(set_colorstrip_table, FADE_BRIGHTNESS)
+    fixed = calls_per_second(set_colorstrip_fixed, FADE_LEVELS)
+    print("float set_colorstrip(): %d calls/sec" % before)
+    print("table set_colorstrip(): %d calls/sec" % after)
+    print("fixed point levels:     %d calls/sec" % fixed)
+    print("speedup: %.2fx, %.2fx with levels" % (after / before, fixed / before))
+    if not ON_BOARD:
+        # Checks 65536 combinations, which takes too long on the board
+        print("max duty cycle difference: %d of 65535" % max_error())
+        print("(python host/check_fixedpoint.py checks every value)")
@@ -0,0 +1,126 @@
+# Build a folder to copy onto the CIRCUITPY drive, with lib/hohoho
+# precompiled to .mpy files.
+#
+# CircuitPython compiles every .py file it imports each time the board
+# starts or you save a file. That takes time and, while it runs, a lot
+# of RAM. A .mpy file is already compiled, like lib/neopixel.mpy, so the
+# board only has to load it.
+#
+#   python host/build_mpy.py
+#
+# writes build/CIRCUITPY with code.py, the example scripts, settings.toml, lib/neopixel.mpy
+# and lib/hohoho/*.mpy. Copy everything in it to the CIRCUITPY drive, and
+# delete the .py files in CIRCUITPY/lib/hohoho if there are any:
+# CircuitPython loads a .py before a .mpy with the same name.
+#
+# It needs CircuitPython's mpy-cross for the version of CircuitPython on
+# the board, from https://adafruit-circuit-python.s3.amazonaws.com/index.html?prefix=bin/mpy-cross/
+# Put it on your PATH or pass it with --mpy-cross. MicroPython's mpy-cross
+# (the "mpy-cross" packages on PyPI) makes files CircuitPython won't load,
+# so the script checks the header of every file it makes against
+# lib/neopixel.mpy and stops if they don't match.
+#
+# To see what the .mpy files save, build with --source to copy the .py
+# files instead, and compare the "boot ms:" line code.py prints in the
+# Serial window after each.
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+
+HOST_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(HOST_DIR)
+LIB_DIR = os.path.join(REPO_DIR, "lib")
+PACKAGE = "hohoho"
+SCRIPTS = ("boot.py", "code.py", "code-default.py", "code-example.py", "code-pir-only.py",
+           "code-zones.py", "settings.toml")
+# Same .mpy format as this file, which is known to load on the board
+REFERENCE_MPY = os.path.join(LIB_DIR, "neopixel.mpy")
+
+
+def mpy_header(path):
+    """The first two bytes of a .mpy file: a letter and the format version."""
+    with open(path, "rb") as f:
+        return f.read(2)
+
+
+def compile_module(mpy_cross, source, target):
+    """Compile one .py file to a .mpy file with mpy-cross."""
+    result = subprocess.run([mpy_cross, "-o", target, "-s", os.path.basename(source), source],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit("mpy-cross failed on %s:\n%s" % (source, result.stderr))
+
+
+def build(out_dir, mpy_cross=None, source=False):
+    """Fill out_dir with everything that goes on the CIRCUITPY drive.
+
+        out_dir : str
+            Folder to build into. Anything already in it is replaced.
+        mpy_cross : str
+            The mpy-cross program to compile with
+        source : bool
+            Copy lib/hohoho as .py files instead of compiling them
+
+    :rtype: list of (file name, size in bytes) for lib/hohoho
+    """
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    package_out = os.path.join(out_dir, "lib", PACKAGE)
+    os.makedirs(package_out)
+
+    for script in SCRIPTS:
+        shutil.copy(os.path.join(REPO_DIR, script), out_dir)
+    shutil.copy(REFERENCE_MPY, os.path.join(out_dir, "lib"))
+
+    expected = mpy_header(REFERENCE_MPY)
+    package_dir = os.path.join(LIB_DIR, PACKAGE)
+    sizes = []
+    for name in sorted(os.listdir(package_dir)):
+        if not name.endswith(".py"):
+            continue
+        source_path = os.path.join(package_dir, name)
+        if source:
+            target = os.path.join(package_out, name)
+            shutil.copy(source_path, target)
+        else:
+            target = os.path.join(package_out, name[:-3] + ".mpy")
+            compile_module(mpy_cross, source_path, target)
+            header = mpy_header(target)
+            if header != expected:
+                raise SystemExit(
+                    "%s made a .mpy with header %r but the board needs %r like %s.\n"
+                    "Use CircuitPython's mpy-cross for the version on the board."
+                    % (mpy_cross, header, expected, os.path.basename(REFERENCE_MPY)))
+        sizes.append((name if source else name[:-3] + ".mpy", os.path.getsize(target)))
+    return sizes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a CIRCUITPY folder with lib/hohoho as .mpy files.")
+    parser.add_argument("--out", default=os.path.join(REPO_DIR, "build", "CIRCUITPY"),
+                        help="folder to build into (default build/CIRCUITPY)")
+    parser.add_argument("--mpy-cross", default="mpy-cross",
+                        help="CircuitPython's mpy-cross program (default: mpy-cross on the PATH)")
+    parser.add_argument("--source", action="store_true",
+                        help="copy lib/hohoho as .py files instead of compiling them")
+    args = parser.parse_args(argv)
+
+    mpy_cross = None
+    if not args.source:
+        mpy_cross = shutil.which(args.mpy_cross)
+        if mpy_cross is None:
+            raise SystemExit("Can't find %s. See the top of host/build_mpy.py for where to get it."
+                             % args.mpy_cross)
+
+    sizes = build(args.out, mpy_cross, args.source)
+    for name, size in sizes:
+        print("  lib/%s/%-16s %6d bytes" % (PACKAGE, name, size))
+    print("%d files, %d bytes in lib/%s. Copy %s to the CIRCUITPY drive."
+          % (len(sizes), sum(size for name, size in sizes), PACKAGE, args.out))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+# Check that the effects don't allocate memory while they draw.
+#
+# Runs every effect on the fake hardware in host/fakes, one frame at a
+# time, with lib/hohoho/gcstats.py measuring each frame. The first step
+# of an effect sets it up and may allocate, so it isn't counted. Every
+# frame after that should allocate nothing. Run it with:
+#
+#   python host/check_allocs.py
+#
+# It prints each effect's numbers and exits with an error if an effect
+# kept more than SLACK_BYTES.
+#
+# On a computer gcstats can only see memory a frame keeps, like a list
+# that grows every frame, not a float that is made and dropped again
+# (see the top of lib/hohoho/gcstats.py). To see those too, turn on
+# GC_DEBUG in code.py or code-example.py on a board.
+#
+# Each effect runs twice and only the second run is checked. Python on
+# a computer makes an object for an int the first time a counter goes
+# past 256, which would otherwise look like the frame allocated it. A
+# few of those ints are still around when the effect ends, which is what
+# SLACK_BYTES allows for. Keeping anything every frame adds up to much
+# more than that, even a list that grows by one small int per frame.
+
+import contextlib
+import io
+import os
+import sys
+
+import sim  # Sets up the paths to lib and host/fakes
+from sim import hwsim
+
+import board
+from hohoho.calibration import Calibration
+from hohoho.colors import WARM
+from hohoho.controller import ON, LightController
+from hohoho.effects import fade_colorstrip
+from hohoho.gcstats import AllocTracker
+from hohoho.hardware import setup_colorstrip
+from hohoho.occupancy import OccupancyTracker
+
+FADE_SECS = 1
+RAINBOW_SECS = 2
+NEOPIXELS = 60
+SLACK_BYTES = 256  # Most an effect may keep after it ends
+
+
+def controller_fade(colorstrip):
+    """Task: the fade code.py does when the pushbutton turns the light on."""
+    controller = LightController(colorstrip, WARM, OccupancyTracker(60), FADE_SECS)
+    controller.button()
+    while controller.state != ON:
+        yield controller.step()
+
+
+def effects():
+    """Every effect to check, as (name, function that starts it)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        example = sim.load_script(os.path.join(sim.REPO_DIR, "code-example.py"))
+        example.setup()
+    pwm = setup_colorstrip()
+    calibrated = setup_colorstrip(calibration=Calibration("RBG", gamma=2.2, min_duty=3000))
+    neopixels = setup_colorstrip(board.D2, NEOPIXELS)
+    return [
+        ("fade", lambda: fade_colorstrip(pwm, WARM, 0, 1.0, FADE_SECS)),
+        ("fade calibrated", lambda: fade_colorstrip(calibrated, WARM, 0, 1.0, FADE_SECS)),
+        ("fade neopixel", lambda: fade_colorstrip(neopixels, WARM, 0, 1.0, FADE_SECS)),
+        ("controller fade", lambda: controller_fade(pwm)),
+        ("rainbow", lambda: example.rainbow_task(1.0, RAINBOW_SECS)),
+        ("show", lambda: example.show.play(example.colorstrip)),
+    ]
+
+
+def run(allocs, name, start):
+    """Run one effect to the end on the virtual clock, tracking every
+    step after its first."""
+    task = start()
+    hwsim.clock.advance_ns(next(task) * 1000000)
+    for delay in allocs.track(name, task):
+        hwsim.clock.advance_ns(delay * 1000000)
+
+
+def check():
+    """Run every effect. Returns a list of problems, empty if there are none."""
+    allocs = AllocTracker()
+    if not allocs.enabled:
+        return ["no way to measure memory here, %s" % allocs.summary()]
+    started = effects()
+    # After effects(), since loading a script starts hwsim over
+    hwsim.recording = False
+    problems = []
+    for name, start in started:
+        run(allocs, name, start)
+        allocs.reset()
+        run(allocs, name, start)
+        effect = allocs.stats(name)
+        print(effect.summary())
+        if effect.allocated > SLACK_BYTES:
+            problems.append("%s kept %d bytes, %d at most in one frame"
+                            % (name, effect.allocated, effect.max_step))
+    return problems
+
+
+if __name__ == "__main__":
+    problems = check()
+    for problem in problems:
+        print(problem)
+    if problems:
+        sys.exit("%d problems" % len(problems))
+    print("ok")
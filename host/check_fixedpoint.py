@@ -0,0 +1,77 @@
+# Check the fixed point color math against the original float math.
+#
+# lib/hohoho/colorscale.py scales colors with whole numbers only. This
+# works out every color value at many brightnesses both ways and checks
+# that the duty cycles never differ by more than MAX_DIFFERENCE, and
+# that off and full on come out exactly the same. Run it with:
+#
+#   python host/check_fixedpoint.py
+#
+# It prints what it checked and exits with an error if anything is off.
+#
+# The float math here uses your computer's 64 bit floats. The board
+# only has 32 bit floats, which were already off by a little more than
+# this in the original code, so the fixed point version is the steadier
+# of the two there.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib"))
+
+from hohoho.colorscale import FULL_LEVEL, MAX_DUTY, ColorScaler, scale_intensity
+from hohoho.effects import FADE_STEPS
+
+MAX_DIFFERENCE = 1       # Largest duty cycle difference allowed, of 65535
+BRIGHTNESS_STEPS = 1000  # Check brightness 0.0, 0.001, 0.002 ... 1.0
+
+
+def float_intensity(value, brightness):
+    """The original set_colorstrip() math, before the active low inversion."""
+    return int(brightness * ((value / 255.0) * 65535.0))
+
+
+def fade_brightnesses():
+    """Every brightness fade_colorstrip() draws going from off to full on."""
+    scaler = ColorScaler()
+    end = scaler.level(1.0)
+    return [((end * i + FADE_STEPS // 2) // FADE_STEPS) / FULL_LEVEL for i in range(FADE_STEPS + 1)]
+
+
+def check():
+    """Compare both versions. Returns a list of problems, empty if there are none."""
+    scaler = ColorScaler()
+    problems = []
+    worst = 0
+    checked = 0
+    brightnesses = [i / BRIGHTNESS_STEPS for i in range(BRIGHTNESS_STEPS + 1)]
+    for brightness in brightnesses + fade_brightnesses():
+        for value in range(256):
+            expected = float_intensity(value, brightness)
+            got = scaler.scale((value, value, value), brightness)[0]
+            checked += 1
+            difference = abs(expected - got)
+            worst = max(worst, difference)
+            if difference > MAX_DIFFERENCE:
+                problems.append("value %d brightness %r: float %d, fixed %d" % (value, brightness, expected, got))
+            elif brightness in (0.0, 1.0) and difference:
+                problems.append("value %d brightness %r should match exactly: float %d, fixed %d"
+                                % (value, brightness, expected, got))
+
+    # The split multiply has to give the same answer as one big multiply
+    for level in range(0, FULL_LEVEL + 1, 7):
+        for intensity in (0, 1, 257, 32767, 32768, 65278, MAX_DUTY):
+            if scale_intensity(intensity, level) != (intensity * level) >> 16:
+                problems.append("scale_intensity(%d, %d) is not exact" % (intensity, level))
+
+    print("checked %d color values, largest difference %d of %d" % (checked, worst, MAX_DUTY))
+    return problems
+
+
+if __name__ == "__main__":
+    problems = check()
+    for problem in problems[:20]:
+        print(problem)
+    if problems:
+        sys.exit("%d problems" % len(problems))
+    print("ok")
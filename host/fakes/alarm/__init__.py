@@ -0,0 +1,37 @@
+# Fake alarm module for running the scripts on a computer.
+#
+# light_sleep_until_alarms() moves the virtual clock forward to the
+# first scripted input change or time that would set off one of the
+# alarms, plus hwsim.wake_latency_ns for the time waking up takes.
+
+import hwsim
+
+from alarm import pin, time  # noqa: F401 (alarm.pin and alarm.time are part of the module)
+
+wake_alarm = None
+
+
+def _fire_time_ns(an_alarm):
+    if isinstance(an_alarm, time.TimeAlarm):
+        return max(hwsim.clock.now_ns, int(an_alarm.monotonic_time * 1000000000))
+    default = an_alarm.pull and not an_alarm.value
+    if not an_alarm.edge and hwsim.input_value(an_alarm.pin.name, default) == an_alarm.value:
+        return hwsim.clock.now_ns
+    return hwsim.next_change(an_alarm.pin.name, an_alarm.value, default)
+
+
+def light_sleep_until_alarms(*alarms):
+    global wake_alarm
+
+    first = None
+    first_ns = None
+    for an_alarm in alarms:
+        at_ns = _fire_time_ns(an_alarm)
+        if at_ns is not None and (first_ns is None or at_ns < first_ns):
+            first = an_alarm
+            first_ns = at_ns
+    if first is None:
+        raise RuntimeError("None of the alarms can ever go off, the board would sleep forever")
+    hwsim.clock.now_ns = first_ns + hwsim.wake_latency_ns
+    wake_alarm = first
+    return first
@@ -0,0 +1,9 @@
+# Fake alarm.pin module for running the scripts on a computer.
+
+
+class PinAlarm:
+    def __init__(self, pin, value, edge=False, pull=False):
+        self.pin = pin
+        self.value = value
+        self.edge = edge
+        self.pull = pull
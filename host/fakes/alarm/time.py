@@ -0,0 +1,8 @@
+# Fake alarm.time module for running the scripts on a computer.
+
+
+class TimeAlarm:
+    def __init__(self, *, monotonic_time=None, epoch_time=None):
+        if monotonic_time is None:
+            raise ValueError("Only monotonic_time is supported here")
+        self.monotonic_time = monotonic_time
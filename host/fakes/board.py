@@ -0,0 +1,18 @@
+# Fake board module for running the scripts on a computer.
+#
+# Only the pins the KB2040 has are defined, so a typo in a pin name
+# fails here the same way it would on the board.
+
+import microcontroller
+
+_PIN_NAMES = (
+    "A0", "A1", "A2", "A3",
+    "D0", "D1", "D2", "D3", "D4", "D5", "D6", "D7", "D8", "D9", "D10",
+    "MISO", "MOSI", "SCK", "SCL", "SDA", "RX", "TX", "NEOPIXEL",
+)
+
+for _name in _PIN_NAMES:
+    globals()[_name] = microcontroller.Pin(_name)
+del _name
+
+board_id = "adafruit_kb2040"
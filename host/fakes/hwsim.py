@@ -0,0 +1,177 @@
+# Shared state for the fake hardware modules.
+#
+# The fake board, digitalio, keypad, pwmio and neopixel modules in this folder
+# all talk to this module. It keeps a virtual clock that time.sleep()
+# moves forward instead of waiting, a list of scripted input changes
+# (the PIR seeing someone at 5 seconds, the button pressed at 700
+# seconds, ...) and a log of everything written to an output.
+#
+# Most people will use it through host/sim.py rather than directly.
+
+import sys
+import time
+
+# Functions from the real time module, put back by uninstall_clock()
+_real_time = {}
+
+
+class SimulationOver(Exception):
+    """Raised by time.sleep() once the virtual clock passes VirtualClock.end_ns."""
+
+
+class VirtualClock:
+    """A clock that only moves when someone sleeps.
+
+    Once installed, time.sleep(), time.monotonic() and time.monotonic_ns()
+    use this clock, so a 10 minute wait finishes instantly.
+    """
+
+    def __init__(self):
+        self.now_ns = 0
+        # Set this and sleep() raises SimulationOver once the clock gets
+        # there, to stop a script that never returns from loop()
+        self.end_ns = None
+
+    def monotonic_ns(self):
+        return self.now_ns
+
+    def monotonic(self):
+        return self.now_ns / 1000000000
+
+    def sleep(self, seconds):
+        if seconds < 0:
+            raise ValueError("sleep length must be non-negative")
+        self.now_ns += int(seconds * 1000000000)
+        if self.end_ns is not None and self.now_ns >= self.end_ns:
+            raise SimulationOver()
+
+    def advance_ns(self, ns):
+        self.now_ns += ns
+
+
+clock = VirtualClock()
+
+# How long the fake alarm module takes to wake up from light sleep
+wake_latency_ns = 2000000
+
+# Whether code can write to CIRCUITPY, like boot.py's storage.remount().
+# It can't unless boot.py says so, which is how a board starts.
+flash_readonly = True
+
+# Every write to an output as (time in ns, pin name, value)
+writes = []
+
+# Set to False to stop adding to writes, for host/check_allocs.py, which
+# would otherwise count the log's memory as the effect's
+recording = True
+
+# Scripted changes for each input pin name: sorted list of (time in ns, value)
+_inputs = {}
+
+
+def install_clock():
+    """Make the time module use the virtual clock."""
+    if _real_time:
+        return
+    for name in ("sleep", "monotonic", "monotonic_ns"):
+        _real_time[name] = getattr(time, name)
+        setattr(time, name, getattr(clock, name))
+
+
+def uninstall_clock():
+    """Put the real time functions back."""
+    for name, function in _real_time.items():
+        setattr(time, name, function)
+    _real_time.clear()
+
+
+def reset():
+    """Start over at time 0 with no writes and no scripted inputs."""
+    global flash_readonly, recording
+
+    clock.now_ns = 0
+    clock.end_ns = None
+    flash_readonly = True
+    recording = True
+    del writes[:]
+    _inputs.clear()
+    # ticks_ms() counts from when hohoho.scheduler was imported, and
+    # would take the clock going back to 0 for it starting over. Count
+    # from 0 again, as if it had just been imported at time 0.
+    scheduler = sys.modules.get("hohoho.scheduler")
+    if scheduler is not None:
+        scheduler._ticks_base = 0
+        scheduler._ticks_last = 0
+
+
+def set_input(pin_name, value, at=None):
+    """Script an input pin to change.
+
+        pin_name : str
+            Name of the board pin, for example "D7"
+        value : bool
+            The level the pin reads from then on
+        at : float
+            Virtual time in seconds. Defaults to now.
+    """
+    at_ns = clock.now_ns if at is None else int(at * 1000000000)
+    changes = _inputs.setdefault(pin_name, [])
+    changes.append((at_ns, value))
+    changes.sort(key=lambda change: change[0])
+
+
+def input_value(pin_name, default):
+    """The level an input pin reads right now.
+
+        pin_name : str
+            Name of the board pin
+        default : bool
+            What the pin reads before its first scripted change, which
+            depends on its pull resistor
+    """
+    value = default
+    for at_ns, changed_value in _inputs.get(pin_name, ()):
+        if at_ns > clock.now_ns:
+            break
+        value = changed_value
+    return value
+
+
+def changes(pin_name, after_ns, until_ns):
+    """The scripted changes of an input pin after after_ns, up to and
+    including until_ns, as a list of (time in ns, value)."""
+    return [(at_ns, value) for at_ns, value in _inputs.get(pin_name, ())
+            if after_ns < at_ns <= until_ns]
+
+
+def next_change(pin_name, value, default):
+    """When an input pin next changes to value after the current virtual time.
+
+        pin_name : str
+            Name of the board pin
+        value : bool
+            The level to wait for
+        default : bool
+            What the pin reads before its first scripted change
+
+    :rtype: time in ns, or None if it never does
+    """
+    level = input_value(pin_name, default)
+    for at_ns, changed_value in _inputs.get(pin_name, ()):
+        if at_ns <= clock.now_ns:
+            continue
+        if changed_value == value and level != value:
+            return at_ns
+        level = changed_value
+    return None
+
+
+def record(pin_name, value):
+    """Log a write to an output at the current virtual time."""
+    if recording:
+        writes.append((clock.now_ns, pin_name, value))
+
+
+def writes_to(pin_name):
+    """All writes to one output as (time in ns, value)."""
+    return [(at_ns, value) for at_ns, name, value in writes if name == pin_name]
@@ -0,0 +1,107 @@
+# Fake keypad module for running the scripts on a computer.
+#
+# On the board, Keys scans its pins in the background. Here the changes
+# hwsim.set_input() scripted are turned into events whenever the events
+# are looked at, each stamped with supervisor.ticks_ms() of the moment
+# it was scripted for. Like the real one, a key that is already pressed
+# when Keys starts shows up as a press, and a key that starts out
+# released makes no event at all.
+
+import hwsim
+import supervisor
+
+_TICKS_MASK = (1 << 29) - 1
+
+
+class Event:
+    def __init__(self, key_number=0, pressed=True):
+        self.key_number = key_number
+        self.pressed = pressed
+        self.released = not pressed
+        self.timestamp = 0
+
+    def __repr__(self):
+        return "<Event: key_number %d %s>" % (
+            self.key_number, "pressed" if self.pressed else "released")
+
+
+class EventQueue:
+    def __init__(self, keys, max_events):
+        self._keys = keys
+        self._max_events = max_events
+        self._events = []  # (key_number, pressed, timestamp), oldest first
+        self.overflowed = False
+
+    def _put(self, key_number, pressed, timestamp):
+        if len(self._events) == self._max_events:
+            self.overflowed = True
+            return
+        self._events.append((key_number, pressed, timestamp))
+
+    def get_into(self, event):
+        self._keys._scan()
+        if not self._events:
+            return False
+        event.key_number, event.pressed, event.timestamp = self._events.pop(0)
+        event.released = not event.pressed
+        return True
+
+    def get(self):
+        event = Event()
+        if self.get_into(event):
+            return event
+        return None
+
+    def clear(self):
+        del self._events[:]
+        self.overflowed = False
+
+    def __len__(self):
+        self._keys._scan()
+        return len(self._events)
+
+    def __bool__(self):
+        return len(self) > 0
+
+
+class Keys:
+    def __init__(self, pins, *, value_when_pressed, pull=True, interval=0.02, max_events=64):
+        self._pins = tuple(pins)
+        self._value_when_pressed = value_when_pressed
+        # pull=True pulls the other way from value_when_pressed
+        self._default = pull and not value_when_pressed
+        self.key_count = len(self._pins)
+        self.events = EventQueue(self, max_events)
+        self._scanned_ns = hwsim.clock.now_ns
+        self._pressed = [False] * self.key_count
+        now = supervisor.ticks_ms()
+        for i in range(self.key_count):
+            if self._level(i) == value_when_pressed:
+                self._pressed[i] = True
+                self.events._put(i, True, now)
+
+    def _level(self, i):
+        return hwsim.input_value(self._pins[i].name, self._default)
+
+    def _scan(self):
+        # Every scripted change since the last scan, in the order they happened
+        now_ns = hwsim.clock.now_ns
+        changes = []
+        for i in range(self.key_count):
+            for at_ns, value in hwsim.changes(self._pins[i].name, self._scanned_ns, now_ns):
+                changes.append((at_ns, i, value == self._value_when_pressed))
+        self._scanned_ns = now_ns
+        changes.sort(key=lambda change: change[0])
+        for at_ns, i, pressed in changes:
+            if pressed != self._pressed[i]:
+                self._pressed[i] = pressed
+                self.events._put(i, pressed, (at_ns // 1000000) & _TICKS_MASK)
+
+    def deinit(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.deinit()
@@ -0,0 +1,12 @@
+# Fake microcontroller module for running the scripts on a computer.
+
+
+class Pin:
+    """A named pin. Each fake module looks up scripted inputs and logs
+    outputs by this name."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return "board.%s" % self.name
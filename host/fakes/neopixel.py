@@ -0,0 +1,56 @@
+# Fake neopixel module for running the scripts on a computer.
+#
+# Each show() logs a copy of all the pixels in hwsim.writes.
+
+import hwsim
+
+RGB = "RGB"
+GRB = "GRB"
+RGBW = "RGBW"
+GRBW = "GRBW"
+
+
+class NeoPixel:
+    def __init__(self, pin, n, *, bpp=3, brightness=1.0, auto_write=True, pixel_order=None):
+        self.pin = pin
+        self.n = n
+        self.bpp = bpp
+        self.brightness = brightness
+        self.auto_write = auto_write
+        self.pixel_order = pixel_order
+        self._pixels = [(0,) * bpp for i in range(n)]
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, index):
+        return self._pixels[index]
+
+    def __setitem__(self, index, color):
+        if isinstance(index, slice):
+            for i, value in zip(range(*index.indices(self.n)), color):
+                self._pixels[i] = self._color(value)
+        else:
+            self._pixels[index] = self._color(color)
+        if self.auto_write:
+            self.show()
+
+    def fill(self, color):
+        color = self._color(color)
+        for i in range(self.n):
+            self._pixels[i] = color
+        if self.auto_write:
+            self.show()
+
+    def show(self):
+        hwsim.record(self.pin.name, tuple(self._pixels))
+
+    def deinit(self):
+        pass
+
+    def _color(self, color):
+        if isinstance(color, int):
+            return ((color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF)
+        if len(color) != self.bpp:
+            raise ValueError("Expected tuple of length %d, got %d" % (self.bpp, len(color)))
+        return tuple(color)
@@ -0,0 +1,9 @@
+# Fake neopixel_write module for running the scripts on a computer.
+#
+# Each call logs a copy of the bytes sent in hwsim.writes.
+
+import hwsim
+
+
+def neopixel_write(digitalinout, buf):
+    hwsim.record(digitalinout.pin.name, bytes(buf))
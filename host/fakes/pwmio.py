@@ -0,0 +1,34 @@
+# Fake pwmio module for running the scripts on a computer.
+#
+# Every duty_cycle write is logged in hwsim.writes with its virtual time.
+
+import hwsim
+
+
+class PWMOut:
+    def __init__(self, pin, *, duty_cycle=0, frequency=500, variable_frequency=False):
+        self.pin = pin
+        self.frequency = frequency
+        self.variable_frequency = variable_frequency
+        self._duty_cycle = 0
+        self.duty_cycle = duty_cycle
+
+    @property
+    def duty_cycle(self):
+        return self._duty_cycle
+
+    @duty_cycle.setter
+    def duty_cycle(self, value):
+        if not 0 <= value <= 65535:
+            raise ValueError("duty_cycle must be between 0 and 65535 inclusive (16 bit resolution)")
+        self._duty_cycle = value
+        hwsim.record(self.pin.name, value)
+
+    def deinit(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.deinit()
@@ -0,0 +1,21 @@
+# Fake storage module for running the scripts on a computer.
+#
+# Files are written to the computer's current folder. Whether code is
+# allowed to write them is hwsim.flash_readonly, which remount() changes
+# the way boot.py would on the board.
+
+import hwsim
+
+
+class VfsMount:
+    @property
+    def readonly(self):
+        return hwsim.flash_readonly
+
+
+def getmount(mount_path):
+    return VfsMount()
+
+
+def remount(mount_path, readonly=False, *, disable_concurrent_write_protection=False):
+    hwsim.flash_readonly = readonly
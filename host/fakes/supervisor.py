@@ -0,0 +1,26 @@
+# Fake supervisor module for running the scripts on a computer.
+#
+# ticks_ms() counts the time module's milliseconds, so it follows the
+# virtual clock while it is installed, and starts over at 2**29 like the
+# real one. The serial connection is always there.
+
+import time
+
+_TICKS_MASK = (1 << 29) - 1
+
+
+class Runtime:
+    def __init__(self):
+        self.serial_connected = True
+        self.autoreload = True
+
+
+runtime = Runtime()
+
+
+def ticks_ms():
+    return (time.monotonic_ns() // 1000000) & _TICKS_MASK
+
+
+def disable_autoreload():
+    runtime.autoreload = False
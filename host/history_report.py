@@ -0,0 +1,141 @@
+# Add up the history files code.py saves.
+#
+# lib/hohoho/history.py saves a record each time the light comes on and
+# goes back off. Copy history0.bin, history1.bin and so on from CIRCUITPY
+# (or point this straight at the drive) to see them day by day:
+#
+#   python host/history_report.py /media/CIRCUITPY
+#   python host/history_report.py history*.bin --sessions
+#   python host/history_report.py /media/CIRCUITPY --csv days.csv
+#
+# The board doesn't know the date, so a day is each 24 hours since the
+# board started: "boot 3 day 0" is the first day after the third start.
+# "button on" counts sessions the pushbutton started instead of the PIR
+# sensor, and "button off" ones it ended before the timeout did.
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import sim  # Sets up the paths to lib and host/fakes
+
+from hohoho.history import OFF_BY_BUTTON, ON_BY_BUTTON, REVERSED, read_history
+
+DAY_SECS = 24 * 60 * 60
+COLUMNS = ("boot", "day", "sessions", "on h", "motions", "button on", "button off",
+           "reversals", "first", "last")
+
+
+def history_files(paths):
+    """The history files named on the command line, or in the folders named.
+
+    :rtype: list of str
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "history*.bin"))))
+        else:
+            files.append(path)
+    return files
+
+
+def read_all(files):
+    """Every record in the files, oldest first.
+
+    :rtype: list of (flags, boot, start_s, on_s, motions, buttons)
+    """
+    records = []
+    for path in files:
+        with open(path, "rb") as f:
+            records.extend(read_history(f.read()))
+    records.sort(key=lambda record: (record[1], record[2]))
+    return records
+
+
+def hours_text(secs):
+    """Seconds as hours:minutes."""
+    return "%d:%02d" % (secs // 3600, secs % 3600 // 60)
+
+
+def days(records):
+    """Add up the records for each day after each boot.
+
+    :rtype: list of dict, one per day with any sessions, in COLUMNS order
+    """
+    totals = {}
+    for flags, boot, start_s, on_s, motions, buttons in records:
+        key = (boot, start_s // DAY_SECS)
+        day = totals.get(key)
+        if day is None:
+            day = totals[key] = {"boot": boot, "day": key[1], "sessions": 0, "on_s": 0,
+                                 "motions": 0, "button on": 0, "button off": 0,
+                                 "reversals": 0, "first": start_s, "last": start_s}
+        day["sessions"] += 1
+        day["on_s"] += on_s
+        day["motions"] += motions
+        day["button on"] += 1 if flags & ON_BY_BUTTON else 0
+        day["button off"] += 1 if flags & OFF_BY_BUTTON else 0
+        day["reversals"] += 1 if flags & REVERSED else 0
+        day["first"] = min(day["first"], start_s)
+        day["last"] = max(day["last"], start_s)
+    return [totals[key] for key in sorted(totals)]
+
+
+def row(day):
+    """One day's totals as text, in COLUMNS order."""
+    return (str(day["boot"]), str(day["day"]), str(day["sessions"]), hours_text(day["on_s"]),
+            str(day["motions"]), str(day["button on"]), str(day["button off"]),
+            str(day["reversals"]), hours_text(day["first"] % DAY_SECS),
+            hours_text(day["last"] % DAY_SECS))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Add up the history files code.py saves.")
+    parser.add_argument("paths", nargs="+", help="history files, or folders that have them")
+    parser.add_argument("--sessions", action="store_true", help="list every session too")
+    parser.add_argument("--csv", metavar="FILE", help="save the daily totals as CSV")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    files = history_files(args.paths)
+    records = read_all(files)
+    totals = days(records)
+    wall = time.perf_counter() - started
+
+    if args.sessions:
+        for flags, boot, start_s, on_s, motions, buttons in records:
+            how = []
+            if flags & ON_BY_BUTTON:
+                how.append("button on")
+            if flags & OFF_BY_BUTTON:
+                how.append("button off")
+            if flags & REVERSED:
+                how.append("reversed")
+            print("  boot %d day %d %s  on %s  motions=%d buttons=%d %s" % (
+                boot, start_s // DAY_SECS, hours_text(start_s % DAY_SECS), hours_text(on_s),
+                motions, buttons, " ".join(how)))
+        print()
+
+    print("  ".join("%10s" % name for name in COLUMNS))
+    for day in totals:
+        print("  ".join("%10s" % text for text in row(day)))
+    sessions = len(records)
+    overrides = sum(1 for record in records if record[0] & (ON_BY_BUTTON | OFF_BY_BUTTON))
+    print()
+    print("%d sessions from %d files in %.1f ms, the button overrode the PIR sensor in %d (%d%%)"
+          % (sessions, len(files), wall * 1000, overrides,
+             overrides * 100 // sessions if sessions else 0))
+
+    if args.csv:
+        with open(args.csv, "w") as f:
+            f.write(",".join(COLUMNS) + "\n")
+            for day in totals:
+                f.write(",".join(row(day)) + "\n")
+        print("Saved to %s" % args.csv)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+# Replay a trace.bin recorded by code.py on a computer.
+#
+# lib/hohoho/recorder.py saves every pushbutton and PIR sensor edge and
+# every change of the light on the board. This reads the file back and
+# feeds the edges through the same OccupancyTracker and LightController
+# code.py uses, on the virtual clock from host/fakes. Waits are skipped
+# over instead of stepped through, so days of recording replay in a
+# second or two.
+#
+#   python host/replay.py trace.bin              # replay every boot
+#   python host/replay.py trace.bin --list       # print every record
+#   python host/replay.py trace.bin --timeout-secs 30 --min-on-secs 120
+#
+# For each boot it prints how many of the recorded state changes the
+# replay made too, and how far apart in time they were. Different
+# timeouts show what the light would have done with them instead. A
+# mismatch with the same timeouts as the board means the code changed
+# since the trace was recorded, or the recording lost something.
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+
+import sim  # Sets up the paths to lib and host/fakes
+from sim import hwsim
+
+from hohoho.colors import WARM
+from hohoho.controller import IDLE, ON, STATE_NAMES, LightController
+from hohoho.hardware import setup_colorstrip
+from hohoho.occupancy import OccupancyTracker
+from hohoho.recorder import BUTTON_EDGE, CAUSES, PIR_EDGE, STATE, read_trace
+
+# code.py's settings, unless changed with the command line options
+TIMEOUT_SECS = 60
+MIN_ON_SECS = 600
+FADE_SECS = 3
+
+
+def clock_text(ms):
+    """ticks_ms() as hours:minutes:seconds since the board started."""
+    seconds, ms = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return "%d:%02d:%02d.%03d" % (hours, minutes, seconds, ms)
+
+
+def record_text(kind, value):
+    """What one record says, in words."""
+    if kind == PIR_EDGE:
+        return "PIR motion" if value else "PIR still"
+    if kind == BUTTON_EDGE:
+        return "button down" if value else "button up"
+    if kind == STATE:
+        return "light %s (%s)" % (STATE_NAMES[value & 3], CAUSES[value >> 2])
+    return "unknown record %d=%d" % (kind, value)
+
+
+def boots(blocks):
+    """Group the records of read_trace() by the boot they were recorded in.
+
+    :rtype: list of (boot, list of (ticks_ms, kind, value)), oldest first
+    """
+    grouped = []
+    for sequence, boot, records in blocks:
+        if not grouped or grouped[-1][0] != boot:
+            grouped.append((boot, []))
+        grouped[-1][1].extend(records)
+    return grouped
+
+
+def replay(records, timeout_secs, min_on_secs, fade_secs):
+    """Feed the recorded edges to a LightController on the virtual clock.
+
+        records : list of (ticks_ms, kind, value)
+            One boot's records
+
+    :rtype: list of (ticks_ms, state, cause) for each change the replay made
+    """
+    edges = [record for record in records if record[1] != STATE]
+    if not edges:
+        return []
+    hwsim.reset()
+    hwsim.install_clock()
+    occupancy = OccupancyTracker(timeout_secs, min_on_secs, hysteresis_ms=50, retrigger_ms=2000)
+    controller = LightController(setup_colorstrip(), WARM, occupancy, fade_secs)
+
+    changes = []
+    i = 0
+    starts = 0
+    now = edges[0][0]
+    while True:
+        hwsim.clock.now_ns = now * 1000000
+        # Hand over the edges that have happened by now, like watch_inputs()
+        while i < len(edges) and edges[i][0] <= now:
+            timestamp, kind, value = edges[i]
+            if kind == PIR_EDGE:
+                occupancy.motion(value == 1, timestamp)
+            elif value:
+                controller.button()
+            i += 1
+        # Motion counts once it has lasted long enough
+        settle_ms = occupancy.update(now)
+        if occupancy.starts != starts:
+            starts = occupancy.starts
+            controller.motion()
+
+        before = controller.state
+        delay = controller.step()
+        if controller.state != before:
+            changes.append((now, controller.state, controller.cause))
+
+        # Skip straight to the next time anything can happen
+        if controller.pending() or controller.state not in (IDLE, ON):
+            wait = delay
+        elif controller.state == IDLE:
+            wait = None
+        else:
+            wait = occupancy.ms_until_empty(now)
+            if wait is not None:
+                wait = max(wait, 1)
+        if settle_ms and (wait is None or settle_ms < wait):
+            wait = settle_ms
+        next_edge = edges[i][0] if i < len(edges) else None
+        if wait is None:
+            if next_edge is None:
+                break
+            now = next_edge
+        elif next_edge is None:
+            now += wait
+        else:
+            now = min(now + wait, next_edge)
+        # The fake strip keeps every write. Nobody needs them here.
+        del hwsim.writes[:]
+    return changes
+
+
+def compare(recorded, replayed):
+    """Match up the recorded and replayed state changes in order.
+
+    :rtype: tuple of (changes matched, list of time differences in ms,
+            index of the first change that didn't match or None)
+    """
+    differences = []
+    for i in range(min(len(recorded), len(replayed))):
+        if recorded[i][1:] != replayed[i][1:]:
+            return i, differences, i
+        differences.append(replayed[i][0] - recorded[i][0])
+    matched = len(differences)
+    if len(recorded) != len(replayed):
+        return matched, differences, matched
+    return matched, differences, None
+
+
+def on_ms(changes, end_ms):
+    """How long the light was anything but off."""
+    total = 0
+    since = None
+    for timestamp, state, cause in changes:
+        if state != IDLE and since is None:
+            since = timestamp
+        elif state == IDLE and since is not None:
+            total += timestamp - since
+            since = None
+    if since is not None:
+        total += max(end_ms - since, 0)
+    return total
+
+
+def report(boot, records, args):
+    """Replay one boot and print how it compares with the recording."""
+    recorded = [(timestamp, value & 3, CAUSES[value >> 2])
+                for timestamp, kind, value in records if kind == STATE]
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        replayed = replay(records, args.timeout_secs, args.min_on_secs, args.fade_secs)
+    wall = time.perf_counter() - started
+
+    span_ms = records[-1][0] - records[0][0] if records else 0
+    end_ms = records[-1][0] if records else 0
+    edges = sum(1 for record in records if record[1] != STATE)
+    print("Boot %d: %d records, %d edges, %s recorded, replayed in %.3f seconds" % (
+        boot, len(records), edges, clock_text(span_ms), wall))
+    matched, differences, mismatch = compare(recorded, replayed)
+    text = "  %d of %d recorded state changes replayed" % (matched, len(recorded))
+    if differences:
+        worst = max(differences, key=abs)
+        text += ", timing off by %d ms at most" % worst
+    print(text)
+    print("  light on for %s recorded, %s replayed" % (
+        clock_text(on_ms(recorded, end_ms)), clock_text(on_ms(replayed, end_ms))))
+    if mismatch is not None:
+        for name, changes in (("recorded", recorded), ("replayed", replayed)):
+            if mismatch < len(changes):
+                timestamp, state, cause = changes[mismatch]
+                print("  first difference, %s: %s light %s (%s)" % (
+                    name, clock_text(timestamp), STATE_NAMES[state], cause))
+            else:
+                print("  first difference, %s: nothing more" % name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a trace.bin recorded by code.py.")
+    parser.add_argument("trace", help="the trace file, copied from CIRCUITPY")
+    parser.add_argument("--list", action="store_true", help="print every record instead")
+    parser.add_argument("--timeout-secs", type=int, default=TIMEOUT_SECS,
+                        help="PIR_TIMEOUT_SECS to replay with (default %(default)s)")
+    parser.add_argument("--min-on-secs", type=int, default=MIN_ON_SECS,
+                        help="INITIAL_ON_SECS to replay with (default %(default)s)")
+    parser.add_argument("--fade-secs", type=float, default=FADE_SECS,
+                        help="fade length to replay with (default %(default)s)")
+    args = parser.parse_args(argv)
+
+    for boot, records in boots(read_trace(args.trace)):
+        if args.list:
+            print("Boot %d" % boot)
+            for timestamp, kind, value in records:
+                print("  %s  %s" % (clock_text(timestamp), record_text(kind, value)))
+        else:
+            report(boot, records, args)
+    hwsim.uninstall_clock()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+# Run code.py (or any of the other scripts) on a computer.
+#
+# The fake hardware modules in host/fakes stand in for board, digitalio,
+# keypad, pwmio, neopixel and the rest. time.sleep() moves a virtual
+# clock forward instead of waiting, so a whole evening of the light runs
+# in well under a second. Scripted inputs play the part of the
+# pushbutton and PIR sensor. Scripts that wait inside loop(), like
+# code-default.py, are stopped at the first sleep after the time is up.
+#
+#   python host/sim.py code.py --seconds 900 --input D7=1@5 --input D7=0@20
+#
+# runs code.py for 15 virtual minutes with motion from 5 to 20 seconds.
+# Remember that the pushbutton reads 0 while it is pressed:
+#
+#   python host/sim.py code.py --seconds 30 --input D6=0@10 --input D6=1@10.2
+#
+# A board takes a while to start, so setup() can be called later than
+# time 0. This one starts with the button held down and motion going on:
+#
+#   python host/sim.py code.py --setup-at 5 --input D6=0@0 --input D6=1@7 --input D7=1@0
+#
+# From Python:
+#
+#   import sim
+#   script = sim.load_script("code.py")
+#   sim.hwsim.set_input("D7", True, at=5)
+#   sim.run(script, seconds=900)
+#   print(sim.hwsim.writes_to("D3"))
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+import time
+
+HOST_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(HOST_DIR)
+
+# Make the fake hardware and the scripts' lib folder importable
+for _path in (os.path.join(REPO_DIR, "lib"), os.path.join(HOST_DIR, "fakes")):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+import hwsim  # noqa: E402 (needs the path set up above)
+
+_loaded = 0
+
+
+def load_script(path):
+    """Import one of the scripts without running its mainline code.
+
+    Every call starts a fresh virtual clock and a fresh copy of the
+    script, so the globals from a previous run don't leak in.
+
+        path : str
+            Path to the script, for example "code.py"
+
+    :rtype: module
+    """
+    global _loaded
+
+    hwsim.reset()
+    hwsim.install_clock()
+    # Don't call it "code", that is the name of a module in Python itself
+    _loaded += 1
+    spec = importlib.util.spec_from_file_location("sim_script_%d" % _loaded, path)
+    script = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(script)
+    return script
+
+
+def run(script, seconds, setup=True):
+    """Call setup() once and then loop() until the virtual clock reaches seconds.
+
+    Scripts like code-default.py wait inside loop() and may never return
+    from it. Once the clock reaches seconds, the next time.sleep() stops
+    them wherever they are.
+
+        script : module
+            A script from load_script()
+        seconds : float
+            How long to run in virtual time
+        setup : bool
+            Set to False if setup() has already been called
+
+    :rtype: Number of times loop() was called
+    """
+    end_ns = int(seconds * 1000000000)
+    loops = 0
+    hwsim.clock.end_ns = end_ns
+    try:
+        if setup:
+            script.setup()
+        while hwsim.clock.now_ns < end_ns:
+            before_ns = hwsim.clock.now_ns
+            loops += 1
+            script.loop()
+            if hwsim.clock.now_ns == before_ns:
+                # loop() didn't sleep at all. Move time along so the run ends.
+                hwsim.clock.advance_ns(1000000)
+    except hwsim.SimulationOver:
+        pass
+    finally:
+        hwsim.clock.end_ns = None
+    return loops
+
+
+def _parse_input(text):
+    # "D7=1@5.5" -> ("D7", True, 5.5)
+    pin_name, rest = text.split("=", 1)
+    value, at = rest.split("@", 1)
+    return pin_name, value.strip() not in ("0", "false", "False"), float(at)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a HO HO HO script against fake hardware.")
+    parser.add_argument("script", help="script to run, for example code.py")
+    parser.add_argument("--seconds", type=float, default=60, help="virtual seconds to run")
+    parser.add_argument("--input", action="append", default=[], metavar="PIN=VALUE@SECS",
+                        help="change an input pin at a virtual time, for example D7=1@5")
+    parser.add_argument("--setup-at", type=float, default=0, metavar="SECS",
+                        help="virtual time to call setup() at, as if the board took that long to start")
+    parser.add_argument("--quiet", action="store_true", help="hide what the script prints")
+    parser.add_argument("--writes", metavar="FILE",
+                        help="save every output write as CSV: seconds,pin,value")
+    args = parser.parse_args(argv)
+
+    script = load_script(args.script)
+    for text in args.input:
+        pin_name, value, at = _parse_input(text)
+        hwsim.set_input(pin_name, value, at)
+    hwsim.clock.now_ns = int(args.setup_at * 1000000000)
+
+    started = time.perf_counter()
+    output = io.StringIO() if args.quiet else sys.stdout
+    with contextlib.redirect_stdout(output):
+        loops = run(script, args.seconds)
+    wall = time.perf_counter() - started
+
+    print()
+    print("Ran %.1f virtual seconds in %.3f real seconds (%d calls to loop())"
+          % (hwsim.clock.now_ns / 1e9, wall, loops))
+    counts = {}
+    for at_ns, pin_name, value in hwsim.writes:
+        counts[pin_name] = counts.get(pin_name, 0) + 1
+    for pin_name in sorted(counts):
+        print("  %-8s %6d writes, last value %s"
+              % (pin_name, counts[pin_name], hwsim.writes_to(pin_name)[-1][1]))
+
+    if args.writes:
+        with open(args.writes, "w") as f:
+            for at_ns, pin_name, value in hwsim.writes:
+                f.write("%.6f,%s,%s\n" % (at_ns / 1e9, pin_name, value))
+    hwsim.uninstall_clock()
+
+
+if __name__ == "__main__":
+    main()
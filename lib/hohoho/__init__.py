@@ -0,0 +1,8 @@
+# HO HO HO 2022 support library
+#
+# Helpers shared by code.py and the example scripts. CircuitPython looks
+# for libraries in the lib/ folder on the CIRCUITPY drive, the same place
+# neopixel.mpy lives, so "from hohoho import ..." works on the board.
+#
+# Each helper lives in its own module. Import only the ones you use so
+# that the rest never take up any RAM.
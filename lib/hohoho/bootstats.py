@@ -0,0 +1,81 @@
+# How long the board takes to start up, and how much RAM is left.
+#
+# time.monotonic() starts counting when the board powers up (or resets),
+# so reading it at the very top of code.py says how long CircuitPython
+# took to get there. Each mark() also records gc.mem_free() so you can
+# see how much RAM each step of starting up used:
+#
+#   boot = BootStats()          # first thing in code.py
+#   ... imports ...
+#   boot.mark("imports")
+#   setup()
+#   boot.mark("setup")
+#   ... the light turns on ...
+#   boot.mark("first light")
+#   print(boot.summary())
+#
+# prints something like:
+#
+#   boot ms: start=812 imports=1034 (free 98112) setup=1101 (free 91200) first light=1103 (free 91200)
+#
+# On a computer there is no gc.mem_free(), so the free numbers are left out.
+
+import gc
+import time
+
+
+def mem_free():
+    """Bytes of RAM free right now, after collecting garbage.
+
+    :rtype: int, or None when not running on CircuitPython
+    """
+    gc.collect()
+    free = getattr(gc, "mem_free", None)
+    return free() if free is not None else None
+
+
+class BootStats:
+    """Times and free RAM at each step of starting up.
+
+    Creating one records the first step, "start".
+    """
+
+    def __init__(self):
+        self.names = []
+        self.times_ms = []
+        self.free = []
+        self.mark("start")
+
+    def mark(self, name):
+        """Record that a step of starting up just finished.
+
+        Only the first mark with each name counts, so it is safe to call
+        from code that runs more than once.
+
+            name : str
+                What just finished, for example "imports"
+        """
+        if name in self.names:
+            return
+        self.names.append(name)
+        self.times_ms.append(time.monotonic_ns() // 1000000)
+        self.free.append(mem_free())
+
+    def ms(self, name):
+        """Milliseconds from power on to the named step.
+
+        :rtype: int, or None if it hasn't been marked
+        """
+        if name not in self.names:
+            return None
+        return self.times_ms[self.names.index(name)]
+
+    def summary(self):
+        """Every step on one line."""
+        parts = []
+        for i in range(len(self.names)):
+            if self.free[i] is None:
+                parts.append("%s=%d" % (self.names[i], self.times_ms[i]))
+            else:
+                parts.append("%s=%d (free %d)" % (self.names[i], self.times_ms[i], self.free[i]))
+        return "boot ms: " + " ".join(parts)
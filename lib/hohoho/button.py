@@ -0,0 +1,142 @@
+# Short, long and double presses of the pushbutton.
+#
+# Reading pushbutton.value only says whether the button is down right
+# now. A Button is told each time the button goes up or down, with the
+# time it happened, and works out what the person meant:
+#
+#   SHORT_PRESS  - pressed and let go, and not pressed again soon after
+#   DOUBLE_PRESS - two short presses close together
+#   LONG_PRESS   - held down for a while. This is reported while the
+#                  button is still down, so you know to let go.
+#
+# It never waits, so call update() from a task on every tick and then
+# ask get() whether a gesture finished:
+#
+#   button = Button()
+#   ...
+#   button.update(pushbutton.value is False, ticks_ms())
+#   gesture = button.get()
+#   if gesture == LONG_PRESS:
+#       colorstrip.off()
+#
+# A mechanical button "bounces" and switches on and off a few times
+# within a few milliseconds when it is pressed. Changes closer together
+# than debounce_ms to the last one are ignored.
+
+from hohoho.scheduler import ticks_ms
+
+NO_GESTURE = 0
+SHORT_PRESS = 1
+LONG_PRESS = 2
+DOUBLE_PRESS = 3
+
+GESTURE_NAMES = ("none", "short", "long", "double")
+
+DEBOUNCE_MS = 20   # Ignore changes closer together than this
+LONG_MS = 1000     # Held at least this long is a long press
+DOUBLE_MS = 300    # Pressed again within this long of letting go is a double press
+
+_QUEUE_SIZE = 8
+
+
+class Button:
+    """Turns pushbutton ups and downs into gestures.
+
+        debounce_ms : int
+            Ignore changes closer together than this
+        long_ms : int
+            Held at least this long is a long press
+        double_ms : int
+            A second press within this long after letting go is a double
+            press. A short press is only reported once this has passed.
+    """
+
+    def __init__(self, debounce_ms=DEBOUNCE_MS, long_ms=LONG_MS, double_ms=DOUBLE_MS):
+        self.debounce_ms = debounce_ms
+        self.long_ms = long_ms
+        self.double_ms = double_ms
+        self.pressed = False      # The button is down, after debouncing
+        self.bounces = 0          # Changes ignored by debouncing
+        self._changed_ms = None   # When the last change was accepted
+        self._pressed_ms = 0      # When the button last went down
+        self._released_ms = 0     # When it was last let go
+        self._long_sent = False   # LONG_PRESS was already reported for this press
+        self._maybe_double = False  # A short press is waiting to see if a second one comes
+        self._second = False      # This press is the second half of a double press
+        # Gestures waiting for get(), oldest first
+        self._gestures = bytearray(_QUEUE_SIZE)
+        self._head = 0
+        self._count = 0
+
+    def update(self, pressed, now=None):
+        """Tell the button what the pin is doing now, and check the timers.
+
+        Call this on every tick, even when nothing changed, or long and
+        short presses will be late.
+
+            pressed : bool
+                True while the button is down
+            now : int
+                ticks_ms() for this reading. Defaults to now.
+        """
+        if now is None:
+            now = ticks_ms()
+        if pressed != self.pressed:
+            self.change(pressed, now)
+        self.check(now)
+
+    def change(self, pressed, timestamp):
+        """Tell the button it went down or up at a given time, for example
+        from an InputEvent. Then call check() on every tick."""
+        if pressed == self.pressed:
+            return
+        if self._changed_ms is not None and timestamp - self._changed_ms < self.debounce_ms:
+            self.bounces += 1
+            return
+        self._changed_ms = timestamp
+        self.pressed = pressed
+        if pressed:
+            self._pressed_ms = timestamp
+            self._long_sent = False
+            self._second = self._maybe_double
+            self._maybe_double = False
+        elif self._long_sent:
+            pass
+        elif self._second:
+            self._second = False
+            self._put(DOUBLE_PRESS)
+        else:
+            self._released_ms = timestamp
+            self._maybe_double = True
+
+    def check(self, now=None):
+        """Report the gestures that only time can finish."""
+        if now is None:
+            now = ticks_ms()
+        if self.pressed and not self._long_sent and now - self._pressed_ms >= self.long_ms:
+            self._long_sent = True
+            self._second = False
+            self._put(LONG_PRESS)
+        if self._maybe_double and now - self._released_ms > self.double_ms:
+            self._maybe_double = False
+            self._put(SHORT_PRESS)
+
+    def get(self):
+        """Remove the oldest finished gesture.
+
+        :rtype: SHORT_PRESS, LONG_PRESS, DOUBLE_PRESS or NO_GESTURE
+        """
+        if self._count == 0:
+            return NO_GESTURE
+        gesture = self._gestures[self._head]
+        self._head = (self._head + 1) % _QUEUE_SIZE
+        self._count -= 1
+        return gesture
+
+    def _put(self, gesture):
+        if self._count == _QUEUE_SIZE:
+            # Nobody is reading them, so forget the oldest one
+            self._head = (self._head + 1) % _QUEUE_SIZE
+            self._count -= 1
+        self._gestures[(self._head + self._count) % _QUEUE_SIZE] = gesture
+        self._count += 1
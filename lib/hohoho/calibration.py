@@ -0,0 +1,116 @@
+# Making the strip show the colors you asked for.
+#
+# The LEDs in a cheap strip don't match each other or your eyes:
+#
+#   channel_order - Which color of light each wire on the strip really
+#                   drives. This strip is printed "R G B" but its G wire
+#                   is blue and its B wire is green, so it is "RBG".
+#   gamma         - Eyes notice small changes in dim light much more than
+#                   in bright light, so a color value of 128 looks much
+#                   brighter than half of 255. A gamma above 1.0 makes the
+#                   low values dimmer so the steps look even.
+#   white_point   - At 3.3V the red LEDs are much brighter than the blue
+#                   ones, so WHITE looks pink. Turn down the brighter
+#                   colors until (0xFF, 0xFF, 0xFF) looks white.
+#   min_duty      - Below some duty cycle an LED doesn't light at all.
+#                   Any color value above 0 is lifted to at least this,
+#                   so a little blue in a color doesn't vanish.
+#
+# The gamma, white point and minimum duty cycle are worked into one curve
+# per color when the ColorScaler is made. The curve is used after the
+# brightness is applied, so a fade follows the gamma too, and a little
+# blue in a dim color still gets min_duty instead of going dark. Using
+# the curve costs a few more whole number steps for each color each time
+# the strip changes. A Calibration that only sets channel_order has no
+# curves and costs nothing. setup_colorstrip() wires each color to the
+# right pin:
+#
+#   calibration = Calibration("RBG", gamma=2.2, white_point=(1.0, 0.8, 0.9))
+#   colorstrip = setup_colorstrip(calibration=calibration)
+#
+# Colors like WARM were picked by eye on the strip without any gamma or
+# white point, so changing those makes them look different.
+
+import array
+
+from hohoho.colorscale import MAX_DUTY
+
+COLOR_NAMES = "RGB"
+CURVE_POINTS = 257  # One every 256 steps of intensity, and one for MAX_DUTY
+
+
+def _three(value):
+    # One number for all three colors, or a tuple with one for each
+    if isinstance(value, (int, float)):
+        return (value, value, value)
+    return tuple(value)
+
+
+class Calibration:
+    """How to turn color values into duty cycles for one strip.
+
+        channel_order : str
+            The color of light on each of the strip's wires, in the order
+            they are printed on the strip. "RGB" if they match.
+        gamma : float or tuple of (float, float, float)
+            1.0 for none. Can be different for red, green and blue.
+        white_point : float or tuple of (float, float, float)
+            Brightest each color goes, from 0.0 to 1.0
+        min_duty : int or tuple of (int, int, int)
+            Smallest duty cycle, from 0 to MAX_DUTY, that a color value
+            above 0 gets
+    """
+
+    def __init__(self, channel_order="RGB", gamma=1.0, white_point=1.0, min_duty=0):
+        if sorted(channel_order) != sorted(COLOR_NAMES):
+            raise ValueError("channel_order needs R, G and B once each, not %r" % channel_order)
+        self.channel_order = channel_order
+        self.gamma = _three(gamma)
+        self.white_point = _three(white_point)
+        self.min_duty = _three(min_duty)
+
+    def pins(self, first, second, third):
+        """Sort the strip's pins into red, green and blue.
+
+            first, second, third : microcontroller.Pin
+                The pins wired to the strip, in the order printed on it
+
+        :rtype: tuple of (red pin, green pin, blue pin)
+        """
+        wires = (first, second, third)
+        order = self.channel_order
+        return (wires[order.index("R")], wires[order.index("G")], wires[order.index("B")])
+
+    def curve(self, channel):
+        """Build the curve for one color.
+
+        Point i of the curve is the duty cycle for an intensity of i * 256,
+        where the intensity is the color value times the brightness, from
+        0 to MAX_DUTY. ColorScaler goes in a straight line between points.
+
+            channel : int
+                0 for red, 1 for green, 2 for blue
+
+        :rtype: array of CURVE_POINTS unsigned 16 bit ints, or None if
+            this color doesn't need correcting
+        """
+        gamma = self.gamma[channel]
+        white = self.white_point[channel]
+        low = self.min_duty[channel]
+        if gamma == 1 and white == 1 and low == 0:
+            # Nothing to change. Skips the float powers on the board.
+            return None
+        span = (MAX_DUTY - low) * white
+        curve = array.array("H", [0] * CURVE_POINTS)
+        last = CURVE_POINTS - 1
+        for i in range(1, CURVE_POINTS):
+            curve[i] = low + int(span * (i / last) ** gamma + 0.5)
+        return curve
+
+    def curves(self):
+        """The red, green and blue curves for a ColorScaler, or None if
+        no color needs one."""
+        curves = (self.curve(0), self.curve(1), self.curve(2))
+        if curves == (None, None, None):
+            return None
+        return curves
@@ -0,0 +1,27 @@
+# Color definitions you can use in your code.
+#
+# A few notes on these:
+# - A value inside of parenthesis is called a tuple.
+# - You can pass a tuple as a single argument in python.
+# - The values for a color can range from 0 to 255 in decimal (base 10)
+#   or you can use the values 0x00 to 0xFF in hexadecimal (base 16).
+# - Purple is 62.7% red, 12.5% green and 94.1% blue. Changing to values from
+#   0-255 yields PURPLE = (160, 32, 240)
+# - People often use hex for encoding colors so I'm going to use it.
+#
+# Want more colors? Visit https://www.rapidtables.com/web/color/RGB_Color.html
+
+PURPLE  = (0xA0, 0x20, 0xF0)
+RED     = (0xFF, 0x00, 0x00)
+GREEN   = (0x00, 0xFF, 0x00)
+BLUE    = (0x00, 0x00, 0xFF)
+YELLOW  = (0xFF, 0xFF, 0x00)
+CYAN    = (0x00, 0xFF, 0xFF)
+MAGENTA = (0xFF, 0x00, 0xFF)
+WHITE   = (0xFF, 0xFF, 0xFF)
+BLACK   = (0x00, 0x00, 0x00) # Not actually black, turns the LED off
+
+# A color definition for "gold"
+GOLD = (0xFF, 0xD7, 0x00)
+# After playing around, I like this color -EZA
+WARM = (0xFF, 0x30, 0x05)
@@ -0,0 +1,158 @@
+# Integer color scaling for the analog LED strip.
+#
+# The RP2040 has no floating point hardware, so every float multiply and
+# divide is done in software and every float result takes up memory that
+# the garbage collector has to clean up later. A fade calls
+# set_colorstrip() hundreds of times, so instead of doing the math each
+# time we do it once in setup() and store the answers in tables.
+#
+# Brightness is kept as a fixed point number: a whole number "level" where
+# FULL_LEVEL (65536) means 1.0 and 32768 means 0.5. Scaling a color is then
+# a table lookup, a multiply and a shift. The float brightness that
+# set_colorstrip() takes is turned into a level once with level().
+#
+# A Calibration can add a curve for each color, applied after the
+# brightness, see lib/hohoho/calibration.py.
+
+import array
+
+MAX_DUTY = 65535     # Largest value pwmio.PWMOut.duty_cycle accepts
+FULL_LEVEL = 65536   # Brightness level for 1.0, full on. 0 is off.
+
+
+def channel_table():
+    """Build a table that maps a 0-255 color value to a 0-65535 intensity.
+
+    :rtype: array of 256 unsigned 16 bit ints
+    """
+    # 255 * 257 == 65535, so this stretches 8 bits to 16 bits exactly
+    return array.array("H", [value * 257 for value in range(256)])
+
+
+def apply_curve(intensity, curve, floor):
+    """Look up an intensity on a Calibration curve.
+
+    The curve has a point every 256 steps, so the top 8 bits of the
+    intensity pick two points and the bottom 8 bits say how far to go
+    from one to the next. Anything above 0 comes out at least floor.
+
+        intensity : int
+            From 0 to MAX_DUTY
+        curve : array
+            From Calibration.curve()
+        floor : int
+            The Calibration's min_duty for this color
+
+    :rtype: int from 0 to MAX_DUTY
+    """
+    if not intensity:
+        return 0
+    if intensity == MAX_DUTY:
+        return curve[-1]
+    i = intensity >> 8
+    start = curve[i]
+    value = start + (((curve[i + 1] - start) * (intensity & 0xFF)) >> 8)
+    return value if value > floor else floor
+
+
+def scale_intensity(intensity, level):
+    """Multiply a 0-65535 intensity by a brightness level, rounding down.
+
+    intensity * level can be as big as 2**32, which is too big for a
+    small int on the board and would make a long int every time. Split
+    level into its top and bottom 8 bits instead and multiply by each
+    half separately. Neither product is bigger than 2**24, and the
+    answer is exactly (intensity * level) >> 16.
+
+        intensity : int
+            From 0 to MAX_DUTY
+        level : int
+            From 0 to FULL_LEVEL
+
+    :rtype: int from 0 to MAX_DUTY
+    """
+    return (intensity * (level >> 8) + ((intensity * (level & 0xFF)) >> 8)) >> 8
+
+
+class ColorScaler:
+    """Lookup tables that turn a color and brightness into PWM intensities.
+
+    There is one table per channel so each color can have its own curve.
+    Build one of these in setup() and reuse it.
+
+        calibration : Calibration
+            Gamma, white point and minimum duty cycle to apply after the
+            brightness. Leave it out for straight lines from 0 to MAX_DUTY.
+    """
+
+    def __init__(self, calibration=None):
+        self.tables = (channel_table(), channel_table(), channel_table())
+        # One curve per color, or None when there is nothing to correct
+        self.curves = None
+        self.floors = (0, 0, 0)
+        if calibration is not None:
+            self.curves = calibration.curves()
+            self.floors = calibration.min_duty
+        # scale() writes its answer here so it doesn't allocate anything
+        self.out = array.array("H", (0, 0, 0))
+
+    def level(self, brightness):
+        """Turn a float brightness into a fixed point brightness level.
+
+        This is the only float math in scaling a color, so code that
+        changes the brightness every frame, like a fade, should work out
+        levels once up front and step between them with whole numbers.
+
+        brightness : float
+            Intensity of the lightstrip. 1.0 is brightest, 0.0 is off
+
+        :rtype: int from 0 to FULL_LEVEL
+        """
+        if brightness <= 0:
+            return 0
+        if brightness >= 1:
+            return FULL_LEVEL
+        return int(brightness * FULL_LEVEL + 0.5)
+
+    def scale(self, color, brightness):
+        """Scale a color by a float brightness. A thin wrapper around scale_rgb().
+
+        color : tuple of (int, int, int)
+            An r,g,b color tuple with values 0-255 for each color
+        brightness : float
+            Intensity of the lightstrip. 1.0 is brightest, 0.0 is off
+
+        :rtype: array of (red, green, blue) intensities from 0 (off) to
+            MAX_DUTY (full on). The same array is reused on every call.
+        """
+        return self.scale_rgb(color[0], color[1], color[2], self.level(brightness))
+
+    def scale_rgb(self, red, green, blue, level):
+        """Like scale(), but with only whole number math and no tuple.
+
+            red, green, blue : int
+                Color values from 0-255
+            level : int
+                Brightness from 0 to FULL_LEVEL, for example from level()
+
+        :rtype: array of (red, green, blue) intensities, reused on every call
+        """
+        # scale_intensity() written out three times, since calling a
+        # function costs more than the math does
+        high = level >> 8
+        low = level & 0xFF
+        red_table, green_table, blue_table = self.tables
+        out = self.out
+        value = red_table[red]
+        out[0] = (value * high + ((value * low) >> 8)) >> 8
+        value = green_table[green]
+        out[1] = (value * high + ((value * low) >> 8)) >> 8
+        value = blue_table[blue]
+        out[2] = (value * high + ((value * low) >> 8)) >> 8
+        curves = self.curves
+        if curves is not None:
+            floors = self.floors
+            for i in range(3):
+                if curves[i] is not None:
+                    out[i] = apply_curve(out[i], curves[i], floors[i])
+        return out
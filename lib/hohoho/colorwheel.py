@@ -0,0 +1,49 @@
+# The colorwheel as a lookup table.
+#
+# Working out a colorwheel color takes a few comparisons and some math,
+# and returns a brand new tuple each time. A rainbow needs all 256 of
+# them over and over, so they are worked out once and packed into a
+# bytearray: 3 bytes (red, green, blue) per position, 768 bytes in all.
+#
+#   wheel = colorwheel_table()
+#   i = position * 3
+#   red, green, blue = wheel[i], wheel[i + 1], wheel[i + 2]
+
+
+def colorwheel(color_wheel_position):
+    """Use the colorwheel model where a single value maps to an RGB color.
+
+        color_wheel_position : int
+            Value from 0-255 representing a single color on the colorwheel.
+            The colors are a transition r - g - b - back to r.
+    """
+    # Did you accidentally pass a value out of range? Let me fix that for you.
+    color_wheel_position = abs(int(color_wheel_position) % 256)
+
+    # 0-84 is in the red to green range
+    color_wheel_position = 255 - color_wheel_position
+    if (color_wheel_position < 85):
+        return (255 - color_wheel_position * 3, 0, color_wheel_position * 3)
+
+    # 85-169 is in the green to blue range
+    if (color_wheel_position < 170):
+        color_wheel_position -= 85
+        return (0, color_wheel_position * 3, 255 - color_wheel_position * 3)
+
+    # 170-255 is in the blue to red range
+    color_wheel_position -= 170
+    return (color_wheel_position * 3, 255 - color_wheel_position * 3, 0)
+
+
+def colorwheel_table():
+    """Work out every colorwheel color once.
+
+    :rtype: bytearray of 256 * 3 bytes, red, green and blue for each position
+    """
+    table = bytearray(256 * 3)
+    for position in range(256):
+        red, green, blue = colorwheel(position)
+        table[position * 3] = red
+        table[position * 3 + 1] = green
+        table[position * 3 + 2] = blue
+    return table
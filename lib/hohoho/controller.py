@@ -0,0 +1,191 @@
+# The night light as a state machine.
+#
+# The light is always in one of four states:
+#
+#   IDLE       - off, waiting for motion or the pushbutton
+#   FADING_IN  - getting brighter
+#   ON         - full on until nobody has been around for a while
+#   FADING_OUT - getting dimmer
+#
+# step() is called over and over, once a frame while fading, and looks
+# at what happened since the last call before drawing anything. So
+# unlike a fade that has to finish before anything else is checked:
+#
+#   - Motion during FADING_OUT turns the fade around, starting from the
+#     brightness the light is at, and the next frame is already brighter.
+#   - The pushbutton during FADING_OUT turns the light off right away.
+#   - The pushbutton while the light is coming on or on starts fading it
+#     out, and while it is off fades it in.
+#
+#   controller = LightController(colorstrip, WARM, occupancy)
+#   controller.motion()     # when the PIR sensor sees someone
+#   controller.button()     # when the pushbutton goes down
+#   while True:
+#       yield controller.step()   # inside a task
+#
+# Turning around takes only as long as the part of the fade that is
+# left: a light that had dimmed to 80% takes a fifth of FADE_SECS to get
+# back to full.
+
+from hohoho.colorscale import FULL_LEVEL
+from hohoho.effects import FADE_STEPS
+from hohoho.frames import FrameTimer
+from hohoho.scheduler import TICK_MS
+
+IDLE = 0
+FADING_IN = 1
+ON = 2
+FADING_OUT = 3
+
+STATE_NAMES = ("idle", "fading in", "on", "fading out")
+
+FADE_SECS = 3  # A fade from off to full on, or back, takes this long
+
+# Why the state last changed, in LightController.cause
+MOTION = "motion"
+BUTTON = "button"
+TIMEOUT = "timeout"
+FINISHED = "finished"
+
+
+class LightController:
+    """Turns the colorstrip on and off as people come and go.
+
+        colorstrip : PWMStrip or NeoPixelStrip
+            The strip to control
+        color : tuple of (int, int, int)
+            Color of the light
+        occupancy : OccupancyTracker
+            Says when nobody has been around for long enough to turn off
+        fade_secs : float
+            Length of a fade all the way from off to full on
+    """
+
+    def __init__(self, colorstrip, color, occupancy, fade_secs=FADE_SECS):
+        self.colorstrip = colorstrip
+        self.occupancy = occupancy
+        self.fade_ms = int(fade_secs * 1000)
+        self.red, self.green, self.blue = color
+        self.state = IDLE
+        self.cause = None     # MOTION, BUTTON, TIMEOUT or FINISHED: why state last changed
+        self.level = 0        # Brightness level showing now, 0 to FULL_LEVEL
+        self.reversals = 0    # Fades that were turned around halfway
+        self.cuts = 0         # Fade outs the pushbutton cut short
+        self.dropped = 0      # Fade frames skipped because they were late
+        self._motion = False  # motion() was called since the last step()
+        self._button = False  # button() was called since the last step()
+        self._timer = None
+        self._start_level = 0
+        self._change = 0
+        self._tracer = None   # LatencyTracer to mark, see trace()
+        self._trace_stage = 0
+
+    def motion(self):
+        """The PIR sensor started seeing motion."""
+        self._motion = True
+
+    def button(self):
+        """The pushbutton went down."""
+        self._button = True
+
+    def trace(self, tracer, stage):
+        """Mark a stage of a LatencyTracer each time the light starts
+        fading in from off, just before the first frame is drawn.
+
+            tracer : LatencyTracer
+                The tracer to mark. Nothing is marked unless it was started.
+            stage : int
+                Index of the stage in the tracer's stages
+        """
+        self._tracer = tracer
+        self._trace_stage = stage
+
+    def pending(self):
+        """True if motion() or button() was called and step() hasn't seen it yet."""
+        return self._motion or self._button
+
+    def set_color(self, color):
+        """Change the color of the light. It shows right away if the light is on."""
+        self.red, self.green, self.blue = color
+        if self.state != IDLE:
+            self._draw(self.level)
+
+    def step(self):
+        """Handle what happened since the last call and draw the next frame.
+
+        :rtype: int milliseconds to wait before calling again
+        """
+        motion = self._motion
+        button = self._button
+        self._motion = False
+        self._button = False
+        state = self.state
+
+        if state == IDLE:
+            if motion or button:
+                if self._tracer is not None:
+                    self._tracer.mark(self._trace_stage)
+                self._fade(FULL_LEVEL, FADING_IN, MOTION if motion else BUTTON)
+            else:
+                return TICK_MS
+        elif state == FADING_IN:
+            if button:
+                self._fade(0, FADING_OUT, BUTTON)
+        elif state == ON:
+            if button:
+                self._fade(0, FADING_OUT, BUTTON)
+            elif not self.occupancy.occupied():
+                self._fade(0, FADING_OUT, TIMEOUT)
+            else:
+                return TICK_MS
+        elif state == FADING_OUT:
+            if button:
+                # Straight to off, no more fading
+                self.cuts += 1
+                self._draw(0)
+                self._change_state(IDLE, BUTTON)
+                return TICK_MS
+            if motion:
+                self.reversals += 1
+                self._fade(FULL_LEVEL, FADING_IN, MOTION)
+
+        return self._next_frame()
+
+    def _fade(self, target, state, cause):
+        # Fade from wherever the light is now. A part of a fade takes
+        # that part of fade_ms, in that part of FADE_STEPS steps.
+        change = target - self.level
+        distance = change if change > 0 else -change
+        frames = max(1, FADE_STEPS * distance // FULL_LEVEL)
+        # Frame 0 would draw the level that is already showing, so start
+        # on frame 1 and change the light right away
+        self._timer = FrameTimer(self.fade_ms * distance // FULL_LEVEL / 1000, frames,
+                                 first_frame=1)
+        self._start_level = self.level
+        self._change = change
+        self._change_state(state, cause)
+
+    def _next_frame(self):
+        timer = self._timer
+        frames = timer.frames
+        i = timer.next_frame()
+        # Rounded to the nearest level. The last frame lands on the target.
+        self._draw(self._start_level + (self._change * i + frames // 2) // frames)
+        if not timer.done():
+            return timer.wait_ms()
+        self.dropped += timer.dropped
+        if self.state == FADING_IN:
+            # Stay on for at least the occupancy tracker's min_on_secs from now
+            self.occupancy.start()
+            self._change_state(ON, FINISHED)
+        else:
+            self._change_state(IDLE, FINISHED)
+        return TICK_MS
+
+    def _draw(self, level):
+        self.level = level
+        self.colorstrip.set_rgb(self.red, self.green, self.blue, level)
+
+    def _change_state(self, state, cause):
+        self.state = state
+        self.cause = cause
@@ -0,0 +1,64 @@
+# Fading the colorstrip.
+#
+# fade_colorstrip() is a task, so other tasks keep running during the
+# fade. linearfade_colorstrip() does the same fade and doesn't return
+# until it is done, like the original version that called time.sleep().
+#
+#   yield from fade_colorstrip(colorstrip, WARM, 0, 1.0, 3)   # inside a task
+#   linearfade_colorstrip(colorstrip, WARM, 1.0, 0, 3)        # anywhere else
+
+from hohoho.frames import FrameTimer
+from hohoho.scheduler import run_task
+
+FADE_STEPS = 100
+
+
+def linearfade_colorstrip(colorstrip, color, start_brightness, end_brightness, duration):
+    """Fade the colorstrip from one brightness level to another over linearly the specified time
+
+        colorstrip : PWMStrip or NeoPixelStrip
+            The strip to fade
+        color : tuple of (int, int, int)
+            Color to use for the fade operation
+        start_brightness : float
+            Value from 0 (off) to 1.0 (full on) to start the fade operation
+        end_brightness : float
+            Value from 0 (off) to 1.0 (full on) to end the fade operation.  The colorstrip
+            will be left at this value when the function exits.
+        duration : float
+            Amount of time in seconds that the fade should last.
+
+    :rtype: The number of steps skipped because the fade was running late
+    """
+    return run_task(fade_colorstrip(colorstrip, color, start_brightness, end_brightness, duration))
+
+
+def fade_colorstrip(colorstrip, color, start_brightness, end_brightness, duration):
+    """Task version of linearfade_colorstrip() that lets other tasks run during the fade.
+
+    Use it from inside another task with 'yield from'. The arguments are
+    the same as linearfade_colorstrip().
+    """
+    # Each step has a deadline counted from the start of the fade, so time
+    # spent setting the color doesn't make the fade run long. The last
+    # step is end_brightness and is always drawn.
+    #
+    # The brightness is worked out as a fixed point level once, and each
+    # step moves a whole number part of the way from start_level to the
+    # end. The color is taken apart once too, so drawing a step does no
+    # float math and makes no new objects for the garbage collector.
+    scaler = colorstrip.scaler
+    red, green, blue = color
+    start_level = scaler.level(start_brightness)
+    change = scaler.level(end_brightness) - start_level
+    steps = FADE_STEPS
+    half = steps // 2
+    timer = FrameTimer(duration, steps)
+    while True:
+        i = timer.next_frame()
+        # Rounded to the nearest level. The last step lands on end_brightness.
+        colorstrip.set_rgb(red, green, blue, start_level + (change * i + half) // steps)
+        if timer.done():
+            break
+        yield timer.wait_ms()
+    return timer.dropped
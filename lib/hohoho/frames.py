@@ -0,0 +1,105 @@
+# Frame timing for fades and other effects.
+#
+# Sleeping for duration/100 after each step of a fade makes the fade run
+# long, because drawing each step takes time too and that time is never
+# subtracted. Instead, every frame gets a deadline measured from the
+# moment the effect started. If the effect falls behind, frames are
+# skipped to catch up, and the last frame is always drawn so the effect
+# ends exactly where it was asked to.
+#
+#   timer = FrameTimer(3, 100)       # 100 steps over 3 seconds
+#   while True:
+#       frame = timer.next_frame()   # 0, 1, 2 ... 100
+#       colorstrip.set_color(COLOR, frame / 100)
+#       if timer.done():
+#           break
+#       yield timer.wait_ms()
+#   print("Dropped", timer.dropped, "frames")
+
+import time
+
+from hohoho.scheduler import ticks_ms
+
+
+class FrameTimer:
+    """Works out which frame of an effect should be drawn right now.
+
+    Frame 0 is drawn at the start and frame 'frames' (the end value) is
+    drawn once duration has passed, so there are frames + 1 in total.
+
+    The timing is done in ticks_ms() milliseconds, which are small ints,
+    so drawing a frame doesn't make anything for the garbage collector.
+    Keep duration in milliseconds times frames under about a billion.
+
+        duration : float
+            How long the effect should last in seconds
+        frames : int
+            Number of steps between the start and the end value
+        first_frame : int
+            Frame to start on. Use 1 when frame 0 is what is already
+            showing, so the first frame drawn is a change. The effect then
+            ends sooner by that many frames.
+    """
+
+    # Set this to a metrics.Histogram to record how many microseconds
+    # late every frame of every effect is drawn. Measuring that finely
+    # needs time.monotonic_ns(), which does allocate, so leave it None
+    # unless you want the numbers.
+    jitter = None
+
+    def __init__(self, duration, frames, first_frame=0):
+        self.frames = frames
+        self.duration_ms = int(duration * 1000)
+        # Start the clock as if the frames before first_frame already happened
+        ahead_ms = first_frame * self.duration_ms // frames if frames else 0
+        self.start_ms = ticks_ms() - ahead_ms
+        self.start_ns = None
+        if self.jitter is not None:
+            self.start_ns = time.monotonic_ns() - ahead_ms * 1000000
+        self.frame = first_frame - 1  # Last frame handed out by next_frame()
+        self.dropped = 0   # Frames skipped because we were running late
+
+    def next_frame(self):
+        """Move on to the frame whose deadline has most recently passed.
+
+        :rtype: int frame number, or None when the effect is finished
+        """
+        if self.frame >= self.frames:
+            return None
+        elapsed_ms = ticks_ms() - self.start_ms
+        if elapsed_ms >= self.duration_ms:
+            due = self.frames
+        else:
+            due = elapsed_ms * self.frames // self.duration_ms
+            if due <= self.frame:
+                # Woke up a little early, draw the next frame anyway
+                due = self.frame + 1
+        self.dropped += due - self.frame - 1
+        self.frame = due
+        if self.jitter is not None and self.start_ns is not None:
+            self._add_jitter(due)
+        return due
+
+    def _add_jitter(self, due):
+        elapsed_ns = time.monotonic_ns() - self.start_ns
+        duration_ns = self.duration_ms * 1000000
+        late_ns = elapsed_ns - due * duration_ns // self.frames if self.frames else 0
+        self.jitter.add(late_ns // 1000)
+
+    def wait_ms(self):
+        """Milliseconds to wait before the next frame is due.
+
+        Always at least 1 so other tasks get a turn even when running late.
+
+        :rtype: int
+        """
+        if self.frame >= self.frames:
+            return 1
+        # Round up so the frame is never drawn early
+        deadline_ms = (self.start_ms
+                       + ((self.frame + 1) * self.duration_ms + self.frames - 1) // self.frames)
+        return max(1, deadline_ms - ticks_ms())
+
+    def done(self):
+        """True once the last frame has been handed out."""
+        return self.frame >= self.frames
@@ -0,0 +1,179 @@
+# How much memory each effect allocates, and when garbage collection runs.
+#
+# Every new object (a float, a tuple, a long int...) takes a little RAM.
+# When RAM runs low, CircuitPython stops everything to collect garbage,
+# and if that happens in the middle of a fade the light stutters. An
+# effect that allocates nothing while it draws never causes that.
+#
+# AllocTracker runs an effect one step at a time and reads gc.mem_alloc()
+# around each step. Allocated memory only goes down when garbage is
+# collected, so a step where it went down had a collection in it, and
+# how long that step took is the pause you would have seen.
+#
+#   allocs = AllocTracker()
+#   dropped = yield from allocs.track("fade in", fade_colorstrip(colorstrip, WARM, 0, 1.0, 3))
+#   print(allocs.summary())
+#
+# prints something like:
+#
+#   fade in runs=1 steps=101 bytes=0 max=0 gcs=0
+#
+# Code that draws an effect a frame at a time without being a task of
+# its own, like LightController.step(), can measure just those frames:
+#
+#   allocs.start_step()
+#   delay = controller.step()
+#   allocs.end_step("fading in")
+#
+# Regular Python on a computer has no gc.mem_alloc(), so there it reads
+# tracemalloc instead, which AllocTracker() starts. Python on a computer
+# frees most objects as soon as nothing uses them, and makes a new object
+# for every int above 256, which the board doesn't. So there it can only
+# tell how much memory each step kept: a list that grows every frame
+# shows up, a float made and dropped again doesn't. Memory going down
+# is just something being freed, not a garbage collection.
+# host/check_allocs.py uses it to check the effects.
+
+import gc
+import time
+
+from hohoho.metrics import Histogram
+
+_mem_alloc = getattr(gc, "mem_alloc", None)
+_tracemalloc = None
+if _mem_alloc is None:
+    try:
+        import tracemalloc as _tracemalloc
+    except ImportError:
+        pass
+    else:
+        def _mem_alloc():
+            return _tracemalloc.get_traced_memory()[0]
+
+_PAUSE_BOUNDS = (100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000)
+
+
+class EffectAllocs:
+    """Memory numbers for one effect, added up over every time it ran.
+
+        name : str
+            Label used in summary()
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.runs = 0
+        self.steps = 0
+        self.allocated = 0   # Bytes allocated by all the steps together
+        self.max_step = 0    # Most bytes allocated by a single step
+        self.collections = 0  # Steps that had a garbage collection in them
+        # How long the steps with a garbage collection took
+        self.pause_us = Histogram(name + " gc us", _PAUSE_BOUNDS)
+
+    def summary(self):
+        """One short line like 'fade in runs=2 steps=202 bytes=0 max=0 gcs=0'."""
+        text = "%s runs=%d steps=%d bytes=%d max=%d gcs=%d" % (
+            self.name, self.runs, self.steps, self.allocated, self.max_step, self.collections)
+        if self.collections:
+            text += " | " + self.pause_us.summary()
+        return text
+
+
+class AllocTracker:
+    """Measures the memory every tracked effect allocates, step by step."""
+
+    def __init__(self):
+        self.enabled = _mem_alloc is not None
+        if _tracemalloc is not None and not _tracemalloc.is_tracing():
+            _tracemalloc.start()
+        self.effects = {}  # name -> EffectAllocs
+        self.order = []    # Names in the order they were first tracked
+        self._before = 0       # Memory in use at start_step()
+        self._started_ns = 0   # time.monotonic_ns() at start_step()
+
+    def stats(self, name):
+        """The EffectAllocs for an effect, made the first time it is asked for."""
+        effect = self.effects.get(name)
+        if effect is None:
+            effect = EffectAllocs(name)
+            self.effects[name] = effect
+            self.order.append(name)
+        return effect
+
+    def track(self, name, task):
+        """Task: run another task, measuring each step between its yields.
+
+        Use it with 'yield from' in place of the task it runs.
+
+            name : str
+                The effect's name in summary()
+            task : generator
+                The effect to run
+
+        :rtype: Whatever the task returned
+        """
+        if not self.enabled:
+            result = yield from task
+            return result
+        effect = self.stats(name)
+        effect.runs += 1
+        mem_alloc = _mem_alloc
+        while True:
+            # Read the clock before the memory, since reading it allocates
+            started_ns = time.monotonic_ns()
+            before = mem_alloc()
+            try:
+                delay = next(task)
+            except StopIteration as stop:
+                self._add(effect, before, mem_alloc(), started_ns)
+                return stop.args[0] if stop.args else None
+            self._add(effect, before, mem_alloc(), started_ns)
+            yield delay
+
+    def start_step(self):
+        """Note the memory in use before one step of an effect, see end_step()."""
+        if not self.enabled:
+            return
+        # Read the clock before the memory, since reading it allocates
+        self._started_ns = time.monotonic_ns()
+        self._before = _mem_alloc()
+
+    def end_step(self, name):
+        """Count everything allocated since start_step() as one step of an effect.
+
+            name : str
+                The effect's name in summary()
+        """
+        if not self.enabled:
+            return
+        after = _mem_alloc()
+        self._add(self.stats(name), self._before, after, self._started_ns)
+
+    def _add(self, effect, before, after, started_ns):
+        effect.steps += 1
+        if after >= before:
+            allocated = after - before
+            effect.allocated += allocated
+            if allocated > effect.max_step:
+                effect.max_step = allocated
+        elif _tracemalloc is not None:
+            # Something a step before this one made was freed. Take it
+            # back off, so allocated is what the effect still keeps.
+            effect.allocated += after - before
+        else:
+            # Memory was given back, so garbage was collected during this step
+            effect.collections += 1
+            effect.pause_us.add((time.monotonic_ns() - started_ns) // 1000)
+
+    def reset(self):
+        """Forget every effect's numbers."""
+        self.effects = {}
+        self.order = []
+
+    def summary(self):
+        """Every tracked effect on one line."""
+        if not self.enabled:
+            return "allocs: no gc.mem_alloc() or tracemalloc here"
+        if not self.order:
+            return "allocs: nothing tracked yet"
+        return " | ".join(self.effects[name].summary() for name in self.order)
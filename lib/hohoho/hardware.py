@@ -0,0 +1,121 @@
+# Setting up the parts wired to the board.
+#
+# Every script needs the same LED, pushbutton, PIR sensor and colorstrip
+# on the same pins, so they are set up here once:
+#
+#   board_led = setup_board_led()
+#   colorstrip = setup_colorstrip()
+#
+# The pins are the ones in the Wiring section of README.md. Modules only
+# some scripts need, like neopixel, are imported inside the function that
+# uses them, so scripts that don't call it never load them.
+
+import board
+import digitalio
+
+from hohoho.calibration import Calibration
+
+BOARD_LED_PIN = board.A3   # Green LED, on when the pin is low
+BUTTON_PIN = board.D6      # Pushbutton, reads low while pressed
+PIR_PIN = board.D7         # PIR sensor, reads high while it sees motion
+# The strip's wires, in the order they are printed on it: R, G, B
+STRIP_PINS = (board.D3, board.D4, board.D5)
+
+# The strip is printed "R G B" but G is really blue and B is really green.
+# Add gamma, white_point or min_duty here to correct the colors, see
+# lib/hohoho/calibration.py.
+STRIP_CALIBRATION = Calibration(channel_order="RBG")
+
+
+def setup_board_led():
+    """The green LED on A3, turned off.
+
+    Note that this LED is wired up with its ground lead to the MCU pin
+    so that it turns on when the pin is low (False) and turns off when
+    the pin is high (True).
+
+    :rtype: digitalio.DigitalInOut
+    """
+    board_led = digitalio.DigitalInOut(BOARD_LED_PIN)
+    board_led.switch_to_output(value=True)
+    return board_led
+
+
+def setup_board_neopixel():
+    """The KB2040's onboard neopixel.
+
+    :rtype: neopixel.NeoPixel
+    """
+    import neopixel
+
+    return neopixel.NeoPixel(board.NEOPIXEL, 1)
+
+
+def set_onboard_neopixel(board_neopixel, color):
+    """Sets the value of the onboard neopixel to a specific color
+
+        board_neopixel : neopixel.NeoPixel
+            From setup_board_neopixel()
+        color : tuple
+            Three values for (red, green, blue) each from 0 - 255
+    """
+    board_neopixel[0] = color
+    board_neopixel.show()
+
+
+def setup_pushbutton():
+    """The pushbutton on D6. Its value is False while it is pressed.
+
+    :rtype: digitalio.DigitalInOut
+    """
+    pushbutton = digitalio.DigitalInOut(BUTTON_PIN)
+    pushbutton.direction = digitalio.Direction.INPUT
+    pushbutton.pull = digitalio.Pull.UP
+    return pushbutton
+
+
+def setup_pir_sensor():
+    """The PIR sensor on D7. Its value is True while it sees motion.
+
+    :rtype: digitalio.DigitalInOut
+    """
+    pir_sensor = digitalio.DigitalInOut(PIR_PIN)
+    pir_sensor.direction = digitalio.Direction.INPUT
+    return pir_sensor
+
+
+def setup_colorstrip(neopixel_pin=None, count=0, calibration=STRIP_CALIBRATION, pins=STRIP_PINS):
+    """The LED strip, dark to start with.
+
+        neopixel_pin : microcontroller.Pin
+            Leave this out for the plain RGB strip on D3, D4 and D5. For a
+            "smart" NeoPixel strip, the pin its data wire is connected to.
+        count : int
+            Number of LEDs on a NeoPixel strip
+        calibration : Calibration
+            Color corrections for the strip. A NeoPixel strip uses its
+            pixel_order instead of channel_order.
+        pins : tuple of microcontroller.Pin
+            The RGB strip's wires, in the order they are printed on it.
+            Change this for a second strip, see lib/hohoho/zones.py.
+
+    :rtype: PWMStrip or NeoPixelStrip
+    """
+    from hohoho.colorscale import ColorScaler
+
+    # All the color corrections are worked out now,
+    # so they cost nothing when the color changes.
+    scaler = ColorScaler(calibration)
+
+    if neopixel_pin is not None:
+        from hohoho.neostrip import NeoPixelStrip
+
+        return NeoPixelStrip(neopixel_pin, count, scaler=scaler)
+
+    from hohoho.strip import PWMStrip
+
+    # The LEDs are on when the pins are low (active_low), so the strip
+    # starts out dark with the pins high.
+    red_pin, green_pin, blue_pin = calibration.pins(*pins)
+    return PWMStrip(red_pin=red_pin, green_pin=green_pin, blue_pin=blue_pin,
+                    frequency=5000, active_low=True, scaler=scaler)
@@ -0,0 +1,275 @@
+# Keeping track of when the light was used, day after day.
+#
+# Every time the light comes on and goes back off is a "session". The
+# HistoryStore saves one small record for each session: when it started,
+# how long the light was on, how many times the PIR sensor saw motion,
+# and whether the pushbutton turned the light on or off instead of the
+# PIR sensor. host/history_report.py adds them up by day.
+#
+#   history = HistoryStore("history")
+#   history.state_changed(controller.state, controller.cause)  # every change
+#   history.motion()                                           # PIR sensor edges
+#   history.button()                                           # button presses
+#   scheduler.add(history.flush_task(log))
+#
+# Writing to flash makes the loop wait, and flash wears out after enough
+# writes. So finished sessions are kept in RAM, STAGED of them at a time,
+# and written together: when that fills up, and every FLUSH_SECS. Files
+# are only ever added to, never rewritten, so each write goes to fresh
+# flash.
+#
+# The records go in FILES files called history0.bin, history1.bin and
+# so on, RECORDS_PER_FILE records each. When the last one fills up the
+# oldest one is emptied and used again, so the history never takes more
+# than FILES * RECORDS_PER_FILE * RECORD_SIZE bytes, 64 KB. At a dozen
+# sessions a day that is most of a year.
+#
+# Each record is RECORD_SIZE bytes:
+#
+#   magic     1 byte   0xA5, so a half written record can be spotted
+#   flags     1 byte   ON_BY_BUTTON, OFF_BY_BUTTON, REVERSED
+#   boot      2 bytes  Counts up every time the board starts
+#   start_s   4 bytes  Seconds since the board started, at the session's start
+#   on_s      4 bytes  Seconds the light was on
+#   motions   2 bytes  Times the PIR sensor started seeing motion
+#   buttons   2 bytes  Times the pushbutton was pressed
+#
+# The boot number is kept in a file of its own, history.boot, which is
+# written once each time the board starts. Taking it from the newest
+# record instead would give a boot that finished no sessions the same
+# number as the next one.
+#
+# The board has no clock that knows the date, so times are counted from
+# when the board started. Like lib/hohoho/recorder.py, this needs boot.py
+# to let code.py write to CIRCUITPY.
+
+import os
+import struct
+
+from hohoho.controller import BUTTON, FADING_IN, FADING_OUT, IDLE
+from hohoho.scheduler import ticks_ms
+
+FILES = 4               # Files in the set before the oldest is reused
+RECORDS_PER_FILE = 1024  # Records in each file, 16 KB
+STAGED = 16             # Sessions kept in RAM before writing them out
+FLUSH_SECS = 3600       # Write out finished sessions at least this often
+
+MAGIC = 0xA5
+RECORD = "<BBHLLHH"
+RECORD_SIZE = struct.calcsize(RECORD)
+BOOT = "<H"  # The whole of the boot file
+
+# Bits in a record's flags
+ON_BY_BUTTON = 1   # The pushbutton turned the light on
+OFF_BY_BUTTON = 2  # The pushbutton turned it off before the timeout did
+REVERSED = 4       # Motion turned a fade out back around at least once
+
+_LONGEST = 0xFFFF  # Most motions or buttons a record can count
+
+
+def history_path(prefix, index):
+    """The name of one file in the set, like "history2.bin"."""
+    return "%s%d.bin" % (prefix, index)
+
+
+def boot_path(prefix):
+    """The name of the file that counts the boots, like "history.boot"."""
+    return "%s.boot" % prefix
+
+
+class HistoryStore:
+    """Saves a record of each time the light was on, in a rotating set of files.
+
+        prefix : str
+            Start of each file's name, for example "history"
+        files : int
+            Files in the set
+        records_per_file : int
+            Records each file holds before moving on to the next
+    """
+
+    def __init__(self, prefix, files=FILES, records_per_file=RECORDS_PER_FILE):
+        self.prefix = prefix
+        self.files = files
+        self.records_per_file = records_per_file
+        self.staged = bytearray(STAGED * RECORD_SIZE)
+        self.count = 0           # Records waiting in staged
+        self.sessions = 0        # Sessions finished since starting
+        self.writes = 0          # Times staged records were written out
+        self.errors = 0          # Writes that failed. Saving stops after one.
+        self.warned = False      # flush_task() has said so
+        self.boot = 0
+        self.index = 0           # The file being added to
+        self.in_file = 0         # Records already in it
+        # The session going on now
+        self._open = False
+        self._started_ms = 0
+        self._flags = 0
+        self._motions = 0
+        self._buttons = 0
+        newest_boot = self._resume()
+        self._count_boot(newest_boot)
+
+    def _resume(self):
+        # Carry on adding to the file with the newest last record.
+        # Returns that record's boot, or None if there are no records.
+        record = bytearray(RECORD_SIZE)
+        newest = None
+        for index in range(self.files):
+            path = history_path(self.prefix, index)
+            try:
+                size = os.stat(path)[6]
+                if size < RECORD_SIZE:
+                    continue
+                with open(path, "rb") as f:
+                    f.seek(size - size % RECORD_SIZE - RECORD_SIZE)
+                    f.readinto(record)
+            except OSError:
+                continue
+            magic, flags, boot, start_s = struct.unpack_from("<BBHL", record)
+            if magic == MAGIC and (newest is None or (boot, start_s) > newest[0]):
+                newest = ((boot, start_s), index, size)
+        if newest is None:
+            return None
+        (boot, start_s), index, size = newest
+        self.index = index
+        self.in_file = size // RECORD_SIZE
+        if size % RECORD_SIZE:
+            # Cut off partway through a record. Start on a fresh file
+            # rather than put the next records out of step.
+            self.in_file = self.records_per_file
+        return boot
+
+    def _count_boot(self, newest_boot):
+        # This boot is the one after the number in the boot file, or
+        # after the newest record if that is later, say when the boot
+        # file is missing
+        path = boot_path(self.prefix)
+        last = newest_boot
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            if len(data) == struct.calcsize(BOOT):
+                stored = struct.unpack(BOOT, data)[0]
+                if last is None or stored > last:
+                    last = stored
+        except OSError:
+            pass
+        if last is not None:
+            self.boot = (last + 1) & 0xFFFF
+        try:
+            with open(path, "wb") as f:
+                f.write(struct.pack(BOOT, self.boot))
+        except OSError:
+            # Read only, or the drive is full
+            self.errors += 1
+
+    def state_changed(self, state, cause, now=None):
+        """Follow the LightController from one state to the next.
+
+            state : int
+                The controller's new state
+            cause : str
+                The controller's cause, MOTION, BUTTON, TIMEOUT or FINISHED
+        """
+        if now is None:
+            now = ticks_ms()
+        if not self._open:
+            if state == FADING_IN:
+                self._open = True
+                self._started_ms = now
+                self._flags = ON_BY_BUTTON if cause == BUTTON else 0
+            return
+        if state == FADING_OUT and cause == BUTTON:
+            self._flags |= OFF_BY_BUTTON
+        elif state == FADING_IN:
+            self._flags |= REVERSED
+        elif state == IDLE:
+            if cause == BUTTON:
+                # Cut short while fading out
+                self._flags |= OFF_BY_BUTTON
+            self._open = False
+            self._stage(now)
+            # The next session counts from here. Motion or a press that
+            # starts it is seen before the state changes, so it counts.
+            self._motions = 0
+            self._buttons = 0
+
+    def motion(self):
+        """The PIR sensor started seeing motion."""
+        if self._motions < _LONGEST:
+            self._motions += 1
+
+    def button(self):
+        """The pushbutton was pressed."""
+        if self._buttons < _LONGEST:
+            self._buttons += 1
+
+    def _stage(self, now):
+        if self.errors:
+            return
+        struct.pack_into(RECORD, self.staged, self.count * RECORD_SIZE, MAGIC, self._flags,
+                         self.boot, self._started_ms // 1000, (now - self._started_ms) // 1000,
+                         self._motions, self._buttons)
+        self.count += 1
+        self.sessions += 1
+        if self.count == STAGED:
+            self.flush()
+
+    def flush(self):
+        """Add the staged records to the files."""
+        if not self.count or self.errors:
+            return
+        view = memoryview(self.staged)
+        written = 0
+        try:
+            while written < self.count:
+                if self.in_file >= self.records_per_file:
+                    self._rotate()
+                part = min(self.count - written, self.records_per_file - self.in_file)
+                with open(history_path(self.prefix, self.index), "ab") as f:
+                    f.write(view[written * RECORD_SIZE:(written + part) * RECORD_SIZE])
+                written += part
+                self.in_file += part
+        except OSError:
+            # Read only, or the drive is full
+            self.errors += 1
+            return
+        self.count = 0
+        self.writes += 1
+
+    def _rotate(self):
+        # Empty the oldest file and start adding to it
+        self.index = (self.index + 1) % self.files
+        with open(history_path(self.prefix, self.index), "wb"):
+            pass
+        self.in_file = 0
+
+    def flush_task(self, log=None, interval_secs=FLUSH_SECS):
+        """Task: write out finished sessions every interval_secs.
+
+            log : Logger
+                Where to say if writing failed, or None to keep quiet
+        """
+        while True:
+            yield interval_secs * 1000
+            self.flush()
+            if self.errors and not self.warned and log is not None:
+                log.warning("Can't write %s files, history stopped", self.prefix)
+                self.warned = True
+
+
+def read_history(data):
+    """Turn the bytes of one history file into records.
+
+        data : bytes
+            The whole file
+
+    :rtype: list of (flags, boot, start_s, on_s, motions, buttons)
+    """
+    records = []
+    for offset in range(0, len(data) - RECORD_SIZE + 1, RECORD_SIZE):
+        record = struct.unpack_from(RECORD, data, offset)
+        if record[0] == MAGIC:
+            records.append(record[1:])
+    return records
@@ -0,0 +1,119 @@
+# Light sleep while waiting for the pushbutton or the PIR sensor.
+#
+# While the light is off there is nothing to do but wait, sometimes for
+# hours. Checking the pins every few milliseconds keeps the processor
+# running flat out the whole time. Instead, the alarm module can stop
+# the processor until a pin changes:
+#
+#   idle = IdleSleeper(board.D6, board.D7)
+#   inputs.deinit()                  # the alarms need the pins to themselves
+#   source = idle.sleep()            # BUTTON, PIR or None if it timed out
+#   inputs = create_inputs(board.D6, board.D7)
+#
+# Waking up takes a little while, so a very quick tap of the button can
+# be over before the code runs again. sleep() checks for that and sets
+# released so the press isn't lost.
+#
+# When the board is plugged into a computer, CircuitPython only pretends
+# to sleep so the Serial window keeps working. It behaves the same but
+# doesn't save any power.
+#
+# Wake up latency can't be measured from a pin alarm, since nothing
+# records when the pin changed. A time alarm wakes at a known time
+# though, and goes through the same wake up, so every sleep() has one
+# and wake_late_ms counts how late the board woke for it. After a pin
+# wakes the board, edge_ms is a guess at when the pin changed: woke_ms
+# less the average of wake_late_ms. Until the first time alarm there is
+# nothing to go by, so it is just woke_ms.
+
+import alarm
+import digitalio
+import time
+
+from hohoho.inputs import BUTTON, PIR
+from hohoho.metrics import Histogram
+from hohoho.scheduler import ticks_ms
+
+IDLE_TIMEOUT_SECS = 60  # Wake up this often even if nothing happens
+
+_LATENCY_BOUNDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class IdleSleeper:
+    """Sleeps until the pushbutton goes down, the PIR sensor sees motion, or
+    timeout_secs pass.
+
+        button_pin : microcontroller.Pin
+            Pushbutton pin. Reads low while pressed, uses the internal pull up.
+        pir_pin : microcontroller.Pin
+            PIR sensor pin. Reads high while motion is detected.
+        timeout_secs : int
+            Longest time to sleep, so the logs and metrics still get sent
+    """
+
+    def __init__(self, button_pin, pir_pin, timeout_secs=IDLE_TIMEOUT_SECS):
+        self.button_pin = button_pin
+        self.pir_pin = pir_pin
+        self.timeout_secs = timeout_secs
+        self.woke_ms = 0        # ticks_ms() when the last sleep() woke up
+        self.edge_ms = 0        # About when the pin that woke it changed
+        self.released = False   # The pin that woke the board already went back
+        self.sleeps = 0
+        self.button_wakes = 0
+        self.pir_wakes = 0
+        self.timeout_wakes = 0
+        self.asleep_ms = 0      # Total time spent in sleep()
+        # How late the board woke for the time alarm
+        self.wake_late_ms = Histogram("wake late ms", _LATENCY_BOUNDS)
+        # Time from waking up to resumed() being called
+        self.resume_ms = Histogram("resume ms", _LATENCY_BOUNDS)
+
+    def sleep(self):
+        """Light sleep until something happens. The pins must not be in use.
+
+        :rtype: BUTTON, PIR, or None if it woke up because of the timeout
+        """
+        # The button pulls D6 low (a falling edge) and the PIR sensor
+        # drives D7 high (a rising edge).
+        button_alarm = alarm.pin.PinAlarm(self.button_pin, value=False, edge=True, pull=True)
+        pir_alarm = alarm.pin.PinAlarm(self.pir_pin, value=True, edge=True)
+        started_ms = ticks_ms()
+        deadline_ms = started_ms + self.timeout_secs * 1000
+        time_alarm = alarm.time.TimeAlarm(monotonic_time=time.monotonic() + self.timeout_secs)
+
+        woke_by = alarm.light_sleep_until_alarms(button_alarm, pir_alarm, time_alarm)
+
+        self.woke_ms = ticks_ms()
+        self.sleeps += 1
+        self.asleep_ms += self.woke_ms - started_ms
+        self.released = False
+        self.edge_ms = self.woke_ms - self.wake_late_ms.average()
+        if woke_by is button_alarm:
+            self.button_wakes += 1
+            self.released = self._read(self.button_pin, True) is True
+            return BUTTON
+        if woke_by is pir_alarm:
+            self.pir_wakes += 1
+            self.released = self._read(self.pir_pin, False) is False
+            return PIR
+        self.timeout_wakes += 1
+        self.wake_late_ms.add(self.woke_ms - deadline_ms)
+        return None
+
+    def resumed(self):
+        """Call once the inputs are set up again, to time how long that took."""
+        self.resume_ms.add(ticks_ms() - self.woke_ms)
+
+    def _read(self, pin, pull_up):
+        reader = digitalio.DigitalInOut(pin)
+        if pull_up:
+            reader.pull = digitalio.Pull.UP
+        value = reader.value
+        reader.deinit()
+        return value
+
+    def summary(self):
+        """One short line about the sleeps so far."""
+        return "sleeps=%d button=%d pir=%d timeout=%d asleep=%ds | %s | %s" % (
+            self.sleeps, self.button_wakes, self.pir_wakes, self.timeout_wakes,
+            self.asleep_ms // 1000, self.wake_late_ms.summary(), self.resume_ms.summary())
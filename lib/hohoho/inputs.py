@@ -0,0 +1,319 @@
+# Pushbutton and PIR sensor events.
+#
+# Reading pushbutton.value every so often only tells you what the pin is
+# doing right now. A quick tap that starts and ends between two reads is
+# never seen. Instead, this module turns each change of a pin into an
+# event with a timestamp and keeps the events in a queue until the main
+# loop gets around to reading them.
+#
+# On CircuitPython the keypad module watches the pins in the background
+# and remembers every change even while your code is busy. If keypad is
+# missing, the pins are read each time update() is called instead. The
+# FakeInputs class has no pins at all so the queue can be tried out on
+# a computer.
+#
+#   inputs = create_inputs(board.D6, board.D7)
+#   event = InputEvent()
+#   ...
+#   inputs.update()
+#   while inputs.events.get_into(event):
+#       if event.source == BUTTON and event.pressed:
+#           print("Button pressed at", event.timestamp)
+
+import array
+
+from hohoho.scheduler import ticks_from_board, ticks_ms
+
+# Event sources
+BUTTON = 0
+PIR = 1
+
+QUEUE_SIZE = 32  # Events kept before new ones are dropped
+
+
+class InputEvent:
+    """One change of the pushbutton or PIR sensor.
+
+        source : int
+            BUTTON or PIR
+        pressed : bool
+            True when the button went down or motion started, False
+            when the button was let go or motion stopped
+        timestamp : int
+            ticks_ms() when the change happened
+    """
+
+    def __init__(self, source=BUTTON, pressed=False, timestamp=0):
+        self.source = source
+        self.pressed = pressed
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return "<InputEvent: source=%d pressed=%s timestamp=%d>" % (
+            self.source, self.pressed, self.timestamp)
+
+
+class EventQueue:
+    """A fixed size queue of input events.
+
+    The events are stored in arrays that are allocated up front, so
+    adding and removing events never allocates memory. Like
+    keypad.EventQueue, when the queue is full new events are dropped and
+    the overflowed flag is set.
+
+        size : int
+            Number of events the queue can hold
+    """
+
+    def __init__(self, size=QUEUE_SIZE):
+        self.size = size
+        self.sources = bytearray(size)
+        self.pressed = bytearray(size)
+        self.timestamps = array.array("L", [0] * size)
+        self.head = 0  # Index of the oldest event
+        self.count = 0
+        self.overflowed = False
+        self.dropped = 0
+
+    def __len__(self):
+        return self.count
+
+    def put(self, source, pressed, timestamp):
+        """Add an event to the end of the queue.
+
+        :rtype: True if it was added, False if the queue was full
+        """
+        if self.count == self.size:
+            self.overflowed = True
+            self.dropped += 1
+            return False
+        i = (self.head + self.count) % self.size
+        self.sources[i] = source
+        self.pressed[i] = 1 if pressed else 0
+        self.timestamps[i] = timestamp
+        self.count += 1
+        return True
+
+    def get_into(self, event):
+        """Remove the oldest event and copy it into an InputEvent you already have.
+
+        :rtype: True if an event was copied, False if the queue was empty
+        """
+        if self.count == 0:
+            return False
+        i = self.head
+        event.source = self.sources[i]
+        event.pressed = self.pressed[i] == 1
+        event.timestamp = self.timestamps[i]
+        self.head = (i + 1) % self.size
+        self.count -= 1
+        return True
+
+    def get(self):
+        """Remove the oldest event and return it as a new InputEvent.
+
+        :rtype: InputEvent or None if the queue is empty
+        """
+        event = InputEvent()
+        if self.get_into(event):
+            return event
+        return None
+
+    def clear(self):
+        """Throw away every event and reset the overflowed flag."""
+        self.head = 0
+        self.count = 0
+        self.overflowed = False
+
+
+def _read(pin, pull_up):
+    # The level of a pin, for a moment before something else uses it
+    import digitalio
+
+    reader = digitalio.DigitalInOut(pin)
+    if pull_up:
+        reader.pull = digitalio.Pull.UP
+    value = reader.value
+    reader.deinit()
+    return value
+
+
+class KeypadInputs:
+    """Inputs captured in the background by the keypad module.
+
+        button_pin : microcontroller.Pin
+            Pushbutton pin. Reads low while pressed, uses the internal pull up.
+        pir_pin : microcontroller.Pin
+            PIR sensor pin. Reads high while motion is detected.
+        active : bytearray
+            What the button and PIR sensor were doing before, see create_inputs()
+    """
+
+    def __init__(self, button_pin, pir_pin, size=QUEUE_SIZE, active=None):
+        import keypad
+
+        self.events = EventQueue(size)
+        self.active = bytearray(active if active is not None else 2)
+        if active is not None:
+            # keypad reports a pin that is already active when it starts,
+            # but not one that isn't, so a release that happened since
+            # the old inputs would never come. Look at the pins first.
+            now = ticks_ms()
+            levels = (_read(button_pin, True) is False, _read(pir_pin, False) is True)
+            for source in (BUTTON, PIR):
+                if self.active[source] and not levels[source]:
+                    self.active[source] = 0
+                    self.events.put(source, False, now)
+        # keypad needs one Keys object for each kind of "pressed" value
+        self._keys = (
+            keypad.Keys((button_pin,), value_when_pressed=False, pull=True, max_events=size),
+            keypad.Keys((pir_pin,), value_when_pressed=True, pull=False, max_events=size),
+        )
+        self._key_event = keypad.Event()
+
+    def update(self):
+        """Move the events keypad has collected into the events queue."""
+        key_event = self._key_event
+        for source in (BUTTON, PIR):
+            keys = self._keys[source]
+            while keys.events.get_into(key_event):
+                pressed = 1 if key_event.pressed else 0
+                # keypad reports a pin that is already active when it
+                # starts. Skip that if active says it was active before.
+                if pressed == self.active[source]:
+                    continue
+                self.active[source] = pressed
+                self.events.put(source, key_event.pressed, ticks_from_board(key_event.timestamp))
+            if keys.events.overflowed:
+                keys.events.clear()
+                self.events.overflowed = True
+
+    def is_active(self, source):
+        """True while the button is held down or the PIR sensor sees motion."""
+        return self.active[source] == 1
+
+    def deinit(self):
+        """Release the pins so they can be used for something else."""
+        for keys in self._keys:
+            keys.deinit()
+
+
+class PollingInputs:
+    """Inputs read with digitalio each time update() is called.
+
+    Used when the keypad module isn't available. Call update() often,
+    since changes that come and go between calls are missed.
+
+        button_pin : microcontroller.Pin
+            Pushbutton pin. Reads low while pressed, uses the internal pull up.
+        pir_pin : microcontroller.Pin
+            PIR sensor pin. Reads high while motion is detected.
+        active : bytearray
+            What the button and PIR sensor were doing before, see create_inputs()
+    """
+
+    def __init__(self, button_pin, pir_pin, size=QUEUE_SIZE, active=None):
+        import digitalio
+
+        self.events = EventQueue(size)
+        self.active = bytearray(active if active is not None else 2)
+
+        self.pushbutton = digitalio.DigitalInOut(button_pin)
+        self.pushbutton.direction = digitalio.Direction.INPUT
+        self.pushbutton.pull = digitalio.Pull.UP
+
+        self.pir_sensor = digitalio.DigitalInOut(pir_pin)
+        self.pir_sensor.direction = digitalio.Direction.INPUT
+
+    def update(self):
+        """Read both pins and queue an event for each one that changed."""
+        now = ticks_ms()
+        self._check(BUTTON, self.pushbutton.value is False, now)
+        self._check(PIR, self.pir_sensor.value is True, now)
+
+    def is_active(self, source):
+        """True while the button is held down or the PIR sensor sees motion."""
+        return self.active[source] == 1
+
+    def _check(self, source, active, now):
+        if active != (self.active[source] == 1):
+            self.active[source] = 1 if active else 0
+            self.events.put(source, active, now)
+
+    def deinit(self):
+        """Release the pins so they can be used for something else."""
+        self.pushbutton.deinit()
+        self.pir_sensor.deinit()
+
+
+class FakeInputs:
+    """Inputs with no hardware behind them, for trying things out on a computer.
+
+    Call press(), release(), motion() and still() to make events happen.
+    """
+
+    def __init__(self, size=QUEUE_SIZE):
+        self.events = EventQueue(size)
+        self.active = bytearray(2)
+
+    def update(self):
+        """Nothing to read, events are added as soon as they happen."""
+        pass
+
+    def is_active(self, source):
+        """True while the button is held down or the PIR sensor sees motion."""
+        return self.active[source] == 1
+
+    def set(self, source, active, timestamp=None):
+        """Change an input, adding an event if it really changed.
+
+            source : int
+                BUTTON or PIR
+            active : bool
+                True for button held down or motion detected
+            timestamp : int
+                When it happened. Defaults to ticks_ms().
+        """
+        if active == (self.active[source] == 1):
+            return
+        self.active[source] = 1 if active else 0
+        self.events.put(source, active, ticks_ms() if timestamp is None else timestamp)
+
+    def press(self, timestamp=None):
+        self.set(BUTTON, True, timestamp)
+
+    def release(self, timestamp=None):
+        self.set(BUTTON, False, timestamp)
+
+    def motion(self, timestamp=None):
+        self.set(PIR, True, timestamp)
+
+    def still(self, timestamp=None):
+        self.set(PIR, False, timestamp)
+
+    def deinit(self):
+        pass
+
+
+def create_inputs(button_pin, pir_pin, size=QUEUE_SIZE, active=None):
+    """Watch the pushbutton and PIR sensor the best way this board can.
+
+        button_pin : microcontroller.Pin
+            Pushbutton pin, for example board.D6
+        pir_pin : microcontroller.Pin
+            PIR sensor pin, for example board.D7
+        size : int
+            Number of events to keep before dropping new ones
+        active : bytearray
+            The active flags of the inputs these replace, for example
+            after sleeping. Leave it out and a button already held down
+            or motion already going on shows up as a new event. Pass it
+            and only changes since the old inputs make events, including
+            a button let go or motion that stopped in between.
+
+    :rtype: KeypadInputs, or PollingInputs if keypad isn't available
+    """
+    try:
+        return KeypadInputs(button_pin, pir_pin, size, active)
+    except ImportError:
+        return PollingInputs(button_pin, pir_pin, size, active)
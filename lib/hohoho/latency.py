@@ -0,0 +1,139 @@
+# How long from motion to light, one step at a time.
+#
+# Metrics.latency_ms times from an event to the start of the fade. This
+# goes all the way to the light really coming on, and splits the time
+# into stages so you can see which one costs the most:
+#
+#   tracer = LatencyTracer(colorstrip, ("wake", "seen", "fade", "lit"))
+#   tracer.start(idle.edge_ms)      # the PIR sensor's rising edge
+#   tracer.mark(0)                  # awake, with the inputs set up again
+#   tracer.mark(1)                  # watch_inputs() handled the event
+#   controller.trace(tracer, 2)     # the controller marks the fade in starting
+#
+# When the board was already awake for the edge, the wake stage is
+# never marked and takes no time.
+#
+# The last stage is marked by the colorstrip itself, the first time
+# anything but off is written to it after start(). summary() then gives
+# the 50th, 95th and 99th percentile of the whole thing and each stage:
+#
+#   motion to light ms n=12 p50=32 p95=41 p99=41 | wake p50=2 p95=3 ...
+#
+# It uses ticks_ms(), so it works the same on the board and with the
+# fake hardware in host/. The last SAMPLES traces are kept, in arrays
+# allocated once.
+
+import array
+
+from hohoho.scheduler import ticks_ms
+
+SAMPLES = 100  # Traces kept for the percentiles
+_LONGEST_MS = 65535  # Longest time an array("H") can hold
+
+
+def percentile(values, count, percent):
+    """The value that percent of the first count values are at or below.
+
+        values : array
+            The measurements, in any order
+        count : int
+            How many of them to use
+        percent : int
+            50 for the median, 95, 99...
+
+    :rtype: int, or 0 if count is 0
+    """
+    if not count:
+        return 0
+    ordered = sorted(values[:count])
+    # Nearest rank: the smallest value with at least percent% at or below it
+    rank = (count * percent + 99) // 100
+    return ordered[max(rank, 1) - 1]
+
+
+class LatencyTracer:
+    """Times each stage from an input edge to the colorstrip lighting up.
+
+        colorstrip : PWMStrip or NeoPixelStrip
+            Strip to watch for the first light after start()
+        stages : tuple of str
+            Name of each stage. The last one is the strip lighting up.
+        name : str
+            Label used in summary()
+    """
+
+    def __init__(self, colorstrip, stages, name="motion to light ms"):
+        self.colorstrip = colorstrip
+        self.stages = stages
+        self.name = name
+        self.started_ms = None   # When the traced edge happened, or None if not tracing
+        self.marks = array.array("l", [0] * len(stages))  # When each stage finished
+        self.marked = bytearray(len(stages))
+        self.traces = 0          # Finished traces, including ones that no longer fit
+        self.cancelled = 0
+        # The newest SAMPLES totals, and each stage's part of them
+        self.totals = array.array("H", [0] * SAMPLES)
+        self.parts = [array.array("H", [0] * SAMPLES) for stage in stages]
+
+    def start(self, timestamp=None):
+        """Start timing from an edge, unless a trace is already running.
+
+            timestamp : int
+                ticks_ms() when the edge happened. Defaults to now.
+        """
+        if self.started_ms is not None:
+            return
+        self.started_ms = ticks_ms() if timestamp is None else timestamp
+        for i in range(len(self.marked)):
+            self.marked[i] = 0
+        self.colorstrip.tracer = self
+
+    def mark(self, stage, now=None):
+        """Note that a stage finished. Only the first mark of each stage counts.
+
+            stage : int
+                Index into stages
+        """
+        if self.started_ms is None or self.marked[stage]:
+            return
+        self.marks[stage] = ticks_ms() if now is None else now
+        self.marked[stage] = 1
+
+    def lit(self):
+        """Called by the colorstrip the first time it lights up. Finishes the trace."""
+        self.colorstrip.tracer = None
+        last = len(self.stages) - 1
+        self.mark(last)
+        if self.started_ms is None:
+            return
+        slot = self.traces % SAMPLES
+        previous = self.started_ms
+        for i in range(last + 1):
+            # A stage that was never marked took no time
+            if not self.marked[i]:
+                self.marks[i] = previous
+            self.parts[i][slot] = min(max(self.marks[i] - previous, 0), _LONGEST_MS)
+            previous = self.marks[i]
+        self.totals[slot] = min(max(self.marks[last] - self.started_ms, 0), _LONGEST_MS)
+        self.traces += 1
+        self.started_ms = None
+
+    def cancel(self):
+        """Stop the trace without counting it, for example when the light
+        was turned on by the button instead."""
+        if self.started_ms is not None:
+            self.cancelled += 1
+        self.started_ms = None
+        self.colorstrip.tracer = None
+
+    def summary(self):
+        """The percentiles of the traces kept, on one line."""
+        count = min(self.traces, SAMPLES)
+        text = "%s n=%d p50=%d p95=%d p99=%d" % (
+            self.name, self.traces, percentile(self.totals, count, 50),
+            percentile(self.totals, count, 95), percentile(self.totals, count, 99))
+        for i in range(len(self.stages)):
+            text += " | %s p50=%d p95=%d p99=%d" % (
+                self.stages[i], percentile(self.parts[i], count, 50),
+                percentile(self.parts[i], count, 95), percentile(self.parts[i], count, 99))
+        return text
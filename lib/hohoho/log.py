@@ -0,0 +1,204 @@
+# Messages for the Serial window, without slowing the loop down.
+#
+# Every print() waits for the text to go out over USB. Printing a
+# character every second (or every quarter second) adds up, and when no
+# computer is listening the text has nowhere to go. The Logger keeps
+# messages in a bytearray that is allocated once and sends them all
+# together when flush() is called, usually from flush_task() once a
+# second. When no computer is connected the messages are thrown away
+# instead of being sent.
+#
+#   log = Logger()
+#   log.info("Turning on light.")
+#   log.rate_limit("Pushbutton is: %s", 10000)   # at most once every 10 seconds
+#   log.info("Pushbutton is: %s", pushbutton.value)
+#   scheduler.add(log.flush_task())
+#
+# RunLengthTrace squeezes a stream of status characters like "++++--"
+# into "+x4 -x2 ".
+
+import sys
+
+from hohoho.scheduler import ticks_ms
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+_PREFIXES = {DEBUG: "DEBUG: ", INFO: "", WARNING: "WARNING: ", ERROR: "ERROR: "}
+
+BUFFER_SIZE = 1024  # Bytes of messages kept between flushes
+FLUSH_MS = 1000     # How often flush_task() sends the messages
+
+
+def _serial_connected():
+    try:
+        import supervisor
+    except ImportError:
+        # Not on a board, so there is always somewhere for the text to go
+        return True
+    return supervisor.runtime.serial_connected
+
+
+class Logger:
+    """Collects messages in a ring buffer and sends them in batches.
+
+    When the buffer fills up the oldest text is overwritten, so the
+    newest messages are the ones that get sent.
+
+        level : int
+            Messages below this level (DEBUG, INFO, WARNING, ERROR) are ignored
+        size : int
+            Bytes of text to keep between flushes
+        output : file
+            Where flush() writes to. Defaults to sys.stdout.
+    """
+
+    def __init__(self, level=INFO, size=BUFFER_SIZE, output=None):
+        self.level = level
+        self.output = output if output is not None else sys.stdout
+        self.buffer = bytearray(size)
+        self._view = memoryview(self.buffer)
+        self.start = 0         # Index of the oldest byte waiting to be sent
+        self.length = 0        # Bytes waiting to be sent
+        self.overwritten = 0   # Bytes lost because the buffer was full
+        self.discarded = 0     # Bytes thrown away because no computer was connected
+        self.suppressed = 0    # Messages left out by rate_limit()
+        self.mid_line = False  # The last text written didn't end with a newline
+        # format string -> [minimum ms between messages, ticks_ms() of last one, suppressed count]
+        self._limits = {}
+
+    def rate_limit(self, fmt, interval_ms):
+        """Only let a message through once every interval_ms milliseconds.
+
+            fmt : str
+                The format string passed to info(), warning() and so on
+            interval_ms : int
+                Minimum time between two of these messages
+        """
+        self._limits[fmt] = [interval_ms, ticks_ms() - interval_ms, 0]
+
+    def log(self, level, fmt, *args):
+        """Add a message if its level is high enough and it isn't rate limited.
+
+            level : int
+                DEBUG, INFO, WARNING or ERROR
+            fmt : str
+                The message. If args are given, it is a % format string.
+        """
+        if level < self.level:
+            return
+        limit = self._limits.get(fmt)
+        extra = ""
+        if limit is not None:
+            now = ticks_ms()
+            if now - limit[1] < limit[0]:
+                limit[2] += 1
+                self.suppressed += 1
+                return
+            if limit[2]:
+                extra = " (%d more not shown)" % limit[2]
+            limit[1] = now
+            limit[2] = 0
+        text = fmt % args if args else fmt
+        # Like print(), start on a new line if write() left one unfinished
+        start = "\n" if self.mid_line else ""
+        self.write(start + _PREFIXES.get(level, "") + text + extra + "\n")
+
+    def debug(self, fmt, *args):
+        self.log(DEBUG, fmt, *args)
+
+    def info(self, fmt, *args):
+        self.log(INFO, fmt, *args)
+
+    def warning(self, fmt, *args):
+        self.log(WARNING, fmt, *args)
+
+    def error(self, fmt, *args):
+        self.log(ERROR, fmt, *args)
+
+    def write(self, text):
+        """Add text to the buffer exactly as given, without a newline."""
+        data = text.encode() if isinstance(text, str) else text
+        size = len(self.buffer)
+        count = len(data)
+        if count:
+            self.mid_line = data[count - 1] != 10  # 10 is "\n"
+        if count > size:
+            # Only the end of a huge message fits
+            self.overwritten += count - size
+            data = data[count - size:]
+            count = size
+        extra = self.length + count - size
+        if extra > 0:
+            # Make room by dropping the oldest text
+            self.start = (self.start + extra) % size
+            self.length -= extra
+            self.overwritten += extra
+        end = (self.start + self.length) % size
+        first = min(count, size - end)
+        self._view[end:end + first] = data[:first]
+        if first < count:
+            self._view[0:count - first] = data[first:]
+        self.length += count
+
+    def flush(self):
+        """Send everything in the buffer in one go."""
+        if not self.length:
+            return
+        if not _serial_connected():
+            self.discarded += self.length
+        else:
+            size = len(self.buffer)
+            end = self.start + self.length
+            if end <= size:
+                text = bytes(self._view[self.start:end])
+            else:
+                text = bytes(self._view[self.start:size]) + bytes(self._view[0:end - size])
+            self.output.write(text.decode())
+        self.start = 0
+        self.length = 0
+
+    def flush_task(self, interval_ms=FLUSH_MS):
+        """Task: flush() every interval_ms milliseconds."""
+        while True:
+            yield interval_ms
+            self.flush()
+
+
+class RunLengthTrace:
+    """Turns a stream of one character statuses into short runs.
+
+    Adding '+' 42 times and then '-' 17 times logs "+x42 -x17 ".
+
+        log : Logger
+            Where to send each run when it ends
+    """
+
+    def __init__(self, log):
+        self.log = log
+        self.symbol = None
+        self.count = 0
+
+    def add(self, symbol):
+        """Count one more status character."""
+        if symbol == self.symbol:
+            self.count += 1
+            return
+        self.end_run()
+        self.symbol = symbol
+        self.count = 1
+
+    def end_run(self):
+        """Log the current run, if there is one."""
+        if self.count:
+            self.log.write("%sx%d " % (self.symbol, self.count))
+        self.symbol = None
+        self.count = 0
+
+    def finish(self):
+        """Log the current run and end the line."""
+        if self.count:
+            self.end_run()
+            self.log.write("\n")
@@ -0,0 +1,164 @@
+# Timing numbers you can print to the Serial window.
+#
+# Is the loop keeping up? Do fade frames come out on time? How long after
+# someone walks by does the light start to come on? A Histogram counts
+# how many measurements fell into each of a fixed set of ranges, so it
+# never needs more memory no matter how long the board runs, and adding
+# a measurement is just a few comparisons and an integer add.
+#
+#   metrics = Metrics()
+#   metrics.loop_us.add(350)
+#   metrics.pir_events += 1
+#   metrics.print_summary()
+#
+# prints something like:
+#
+#   loop us n=90000 avg=41 p95<=100 max=912 | jitter us n=201 avg=380 p95<=1000 max=1420
+#   | latency ms n=1 avg=10 p95<=10 max=10 | pir=2 button=0 dropped=0
+
+import array
+
+# Bucket upper limits used when you don't pick your own. Each bucket
+# counts the values up to and including its limit, and the last bucket
+# counts everything bigger.
+DEFAULT_BOUNDS = (10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000)
+
+
+class Histogram:
+    """Counts measurements into fixed ranges.
+
+        name : str
+            Label used in summary()
+        bounds : tuple of int
+            Upper limit of each bucket, smallest first
+    """
+
+    def __init__(self, name, bounds=DEFAULT_BOUNDS):
+        self.name = name
+        self.bounds = array.array("L", bounds)
+        # One extra bucket for values bigger than the last bound
+        self.buckets = array.array("L", [0] * (len(bounds) + 1))
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        """Count one measurement."""
+        if value < 0:
+            value = 0
+        bounds = self.bounds
+        i = 0
+        last = len(bounds)
+        while i < last and value > bounds[i]:
+            i += 1
+        self.buckets[i] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def average(self):
+        """The average of every measurement, rounded down."""
+        return self.total // self.count if self.count else 0
+
+    def percentile(self, percent):
+        """The upper limit of the bucket the given percentile falls in.
+
+        For example percentile(95) == 200 means at least 95% of the
+        measurements were 200 or less.
+
+        :rtype: int, or the largest measurement if it is past the last bucket
+        """
+        if not self.count:
+            return 0
+        needed = (self.count * percent + 99) // 100
+        seen = 0
+        for i in range(len(self.bounds)):
+            seen += self.buckets[i]
+            if seen >= needed:
+                return self.bounds[i]
+        return self.max
+
+    def reset(self):
+        """Forget every measurement."""
+        for i in range(len(self.buckets)):
+            self.buckets[i] = 0
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def summary(self):
+        """One short line like 'loop us n=10 avg=4 p95<=10 max=12'."""
+        return "%s n=%d avg=%d p95<=%d max=%d" % (
+            self.name, self.count, self.average(), self.percentile(95), self.max)
+
+
+class Metrics:
+    """The timing numbers for the night light, all in one place.
+
+        loop_us : Histogram
+            Time spent running tasks on each pass through loop()
+        jitter_us : Histogram
+            How late each fade or show frame was drawn
+        latency_ms : Histogram
+            Time from a PIR or button event to the light starting to change
+        pir_events, button_events : int
+            Number of times motion started and the button went down
+        dropped_frames : int
+            Frames skipped because an effect was running late
+        idle : IdleSleeper
+            Set this to add the light sleep numbers to summary()
+        allocs : AllocTracker
+            Set this to add the memory each effect allocates to summary()
+        latency : LatencyTracer
+            Set this to add the motion to light stages to summary()
+    """
+
+    def __init__(self):
+        self.loop_us = Histogram("loop us")
+        self.jitter_us = Histogram("jitter us")
+        self.latency_ms = Histogram("latency ms", (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000))
+        self.pir_events = 0
+        self.button_events = 0
+        self.dropped_frames = 0
+        self.idle = None
+        self.allocs = None
+        self.latency = None
+
+    def reset(self):
+        """Start all the numbers over from zero."""
+        self.loop_us.reset()
+        self.jitter_us.reset()
+        self.latency_ms.reset()
+        self.pir_events = 0
+        self.button_events = 0
+        self.dropped_frames = 0
+
+    def summary(self):
+        """Everything on one line."""
+        text = "%s | %s | %s | pir=%d button=%d dropped=%d" % (
+            self.loop_us.summary(), self.jitter_us.summary(), self.latency_ms.summary(),
+            self.pir_events, self.button_events, self.dropped_frames)
+        if self.idle is not None:
+            text += " | " + self.idle.summary()
+        if self.allocs is not None:
+            text += " | " + self.allocs.summary()
+        if self.latency is not None:
+            text += " | " + self.latency.summary()
+        return text
+
+    def print_summary(self):
+        print(self.summary())
+
+    def report_task(self, interval_secs, log=None):
+        """Task: print the summary every interval_secs seconds.
+
+            log : Logger
+                Send the summary to this log instead of printing it
+        """
+        while True:
+            yield interval_secs * 1000
+            if log is None:
+                self.print_summary()
+            else:
+                log.info(self.summary())
@@ -0,0 +1,166 @@
+# A "smart" NeoPixel (WS2812) strip that works like PWMStrip.
+#
+# Every LED on a NeoPixel strip can be a different color. The colors for
+# the whole strip are kept in one bytearray, the frame buffer, which is
+# allocated once. Changing colors only changes the frame buffer, like
+# auto_write=False in the neopixel library, and show() sends the whole
+# buffer down the wire in one go.
+#
+# NeoPixelStrip has the same set_color(), set_rgb(), write_rgb() and
+# off() as PWMStrip, so set_colorstrip(), fades and Timeline shows work
+# on either one without changes:
+#
+#   colorstrip = NeoPixelStrip(board.D2, 60)   # 60 LEDs on pin D2
+#   colorstrip.set_color((0xFF, 0x30, 0x05), 1.0)
+#
+# Or give each LED its own color and show them all at once:
+#
+#   for i in range(colorstrip.count):
+#       colorstrip.set_pixel(i, colorwheel(i * 256 // colorstrip.count), 1.0)
+#   colorstrip.show()
+
+import digitalio
+import neopixel_write
+
+from hohoho.colorscale import ColorScaler
+
+GRB = "GRB"  # Most WS2812 strips
+RGB = "RGB"
+
+
+class NeoPixelStrip:
+    """An addressable strip of count LEDs with a preallocated frame buffer.
+
+        pin : microcontroller.Pin
+            Pin wired to the strip's data input
+        count : int
+            Number of LEDs on the strip
+        pixel_order : str
+            Order the strip expects the colors in, usually GRB
+        scaler : ColorScaler
+            Lookup tables for turning colors into intensities. A new one
+            is made if you don't pass one in.
+    """
+
+    def __init__(self, pin, count, pixel_order=GRB, scaler=None):
+        self.count = count
+        self.scaler = scaler if scaler is not None else ColorScaler()
+        # Where red, green and blue go inside each 3 byte pixel
+        self.offsets = (pixel_order.index("R"), pixel_order.index("G"), pixel_order.index("B"))
+        self.buffer = bytearray(3 * count)
+        self._view = memoryview(self.buffer)
+        self._pin = digitalio.DigitalInOut(pin)
+        self._pin.direction = digitalio.Direction.OUTPUT
+        self.dirty = True  # The buffer has changes show() hasn't sent yet
+        self._fill = 0     # Color of every LED packed as 0xRRGGBB, or -1 if they differ
+        self.writes = 0    # Frames sent to the strip
+        self.skipped = 0   # show() calls left out because nothing changed
+        self.tracer = None  # A LatencyTracer waiting for the strip to light up
+
+    def set_color(self, color, brightness):
+        """Set every LED to a color and brightness and show it.
+
+            color : tuple of (int, int, int)
+                An r,g,b color tuple with values 0-255 for each color
+            brightness : float
+                Intensity of the lightstrip. 1.0 is brightest, 0.0 is off
+        """
+        self.write(self.scaler.scale(color, brightness))
+
+    def set_rgb(self, red, green, blue, level):
+        """Like set_color(), without making a tuple or doing float math.
+
+            red, green, blue : int
+                Color values from 0-255
+            level : int
+                Brightness level from scaler.level(), 0 (off) to FULL_LEVEL (full on)
+        """
+        self.write(self.scaler.scale_rgb(red, green, blue, level))
+
+    def off(self):
+        """Turn every LED off."""
+        self.write_rgb(0, 0, 0)
+
+    def write(self, intensity):
+        """Set every LED to intensities from ColorScaler and show it.
+
+            intensity : sequence of (int, int, int)
+                Red, green and blue from 0 (off) to 65535 (full on)
+        """
+        self.write_rgb(intensity[0], intensity[1], intensity[2])
+
+    def write_rgb(self, red, green, blue):
+        """Set every LED to three intensities from 0 (off) to 65535 (full on)
+        and show it."""
+        self.fill_pixels(red >> 8, green >> 8, blue >> 8)
+        self.show()
+
+    def fill_pixels(self, red, green, blue):
+        """Set every LED in the frame buffer to one 0-255 color. Call show() to see it."""
+        buffer = self.buffer
+        size = len(buffer)
+        if size == 0:
+            return
+        packed = (red << 16) | (green << 8) | blue
+        if packed == self._fill:
+            # Every LED is already this color
+            return
+        self._fill = packed
+        offsets = self.offsets
+        buffer[offsets[0]] = red
+        buffer[offsets[1]] = green
+        buffer[offsets[2]] = blue
+        # Copy the first pixel, then the first two, then the first four...
+        # so filling hundreds of LEDs takes only a handful of steps.
+        view = self._view
+        filled = 3
+        while filled < size:
+            step = min(filled, size - filled)
+            view[filled:filled + step] = view[0:step]
+            filled += step
+        self.dirty = True
+
+    def set_pixel(self, index, color, brightness):
+        """Set one LED in the frame buffer. Call show() to see it.
+
+            index : int
+                Which LED, 0 is the one closest to the board
+            color : tuple of (int, int, int)
+                An r,g,b color tuple with values 0-255 for each color
+            brightness : float
+                Intensity of the LED. 1.0 is brightest, 0.0 is off
+        """
+        intensity = self.scaler.scale(color, brightness)
+        self.set_pixel_rgb(index, intensity[0] >> 8, intensity[1] >> 8, intensity[2] >> 8)
+
+    def set_pixel_rgb(self, index, red, green, blue):
+        """Set one LED in the frame buffer to a 0-255 color. Call show() to see it."""
+        i = index * 3
+        offsets = self.offsets
+        buffer = self.buffer
+        buffer[i + offsets[0]] = red
+        buffer[i + offsets[1]] = green
+        buffer[i + offsets[2]] = blue
+        self._fill = -1
+        self.dirty = True
+
+    def show(self):
+        """Send the frame buffer to the strip, if anything changed."""
+        if not self.dirty:
+            self.skipped += 1
+            return
+        if self.tracer is not None and self._fill != 0:
+            self.tracer.lit()
+        neopixel_write.neopixel_write(self._pin, self.buffer)
+        self.dirty = False
+        self.writes += 1
+
+    def reset_counts(self):
+        """Start counting frames sent and skipped from zero."""
+        self.writes = 0
+        self.skipped = 0
+
+    def deinit(self):
+        """Turn the LEDs off and release the pin."""
+        self.off()
+        self._pin.deinit()
@@ -0,0 +1,171 @@
+# Is anybody still here?
+#
+# Counting passes through a loop to measure time only works if every
+# pass takes exactly as long as you think it does. Instead, the
+# OccupancyTracker remembers when the PIR sensor's edges happened and
+# compares those times with the clock, so the answers stay right no
+# matter how often it is asked.
+#
+#   occupancy = OccupancyTracker(timeout_secs=60, min_on_secs=600)
+#   occupancy.motion(True, event.timestamp)    # from each PIR event
+#   occupancy.update()                         # every tick
+#   if occupancy.starts != starts:             # motion that lasted long enough
+#       turn_on_the_light()
+#   occupancy.start()                          # when the light turns on
+#   if not occupancy.occupied():
+#       turn_off_the_light()
+#
+# Two filters clean up what the sensor reports:
+#
+#   hysteresis_ms - A change of the pin only counts once it has lasted
+#                   this long, so a short glitch on the wire is ignored.
+#   retrigger_ms  - Motion that starts again this soon after the last
+#                   motion ended is counted as the same visit. Many PIR
+#                   sensors drop low for a moment between detections.
+
+from hohoho.scheduler import ticks_ms
+
+HYSTERESIS_MS = 50   # Ignore changes of the PIR pin shorter than this
+RETRIGGER_MS = 2000  # Motion this soon after the last is the same visit
+
+
+class OccupancyTracker:
+    """Keeps track of when the PIR sensor last saw motion.
+
+        timeout_secs : int
+            The room counts as empty this long after the last motion
+        min_on_secs : int
+            The room counts as occupied for at least this long after start()
+        hysteresis_ms : int
+            A change of the pin must last this long to count
+        retrigger_ms : int
+            Motion starting this soon after the last ended is the same visit
+    """
+
+    def __init__(self, timeout_secs, min_on_secs=0, hysteresis_ms=HYSTERESIS_MS,
+                 retrigger_ms=RETRIGGER_MS):
+        self.timeout_ms = timeout_secs * 1000
+        self.min_on_ms = min_on_secs * 1000
+        self.hysteresis_ms = hysteresis_ms
+        self.retrigger_ms = retrigger_ms
+        self.active = False      # Motion right now, after filtering
+        self.started_ms = None   # ticks_ms() of the last start()
+        self.last_motion_ms = None  # When motion was last seen
+        self.visits = 0          # Separate times motion started
+        self.retriggers = 0      # Motion that was folded into the visit before it
+        self.glitches = 0        # Changes that didn't last hysteresis_ms
+        self.starts = 0          # Times motion was accepted, visits and retriggers together
+        self._level = False      # What the pin last reported, before filtering
+        self._changed_ms = 0     # When it reported it
+        self._ended_ms = None    # When the last motion ended
+
+    def motion(self, active, timestamp=None):
+        """Tell the tracker the PIR sensor started or stopped seeing motion.
+
+            active : bool
+                True when motion started, False when it stopped
+            timestamp : int
+                ticks_ms() when it happened. Defaults to now.
+        """
+        if timestamp is None:
+            timestamp = ticks_ms()
+        self._update(timestamp)
+        if active == self._level:
+            return
+        if active == self.active:
+            # Changed back before the last change lasted long enough
+            self.glitches += 1
+        self._level = active
+        self._changed_ms = timestamp
+        self._update(timestamp)
+
+    def _update(self, now):
+        # Accept the pin's level once it has lasted hysteresis_ms
+        if self._level == self.active or now - self._changed_ms < self.hysteresis_ms:
+            return
+        self.active = self._level
+        if self.active:
+            self.starts += 1
+            if self._ended_ms is not None and self._changed_ms - self._ended_ms <= self.retrigger_ms:
+                self.retriggers += 1
+            else:
+                self.visits += 1
+        else:
+            self._ended_ms = self._changed_ms
+        self.last_motion_ms = self._changed_ms
+
+    def update(self, now=None):
+        """Accept a change of the pin once it has lasted hysteresis_ms.
+
+        motion() only looks at the clock when the pin changes, so call
+        this every so often. starts goes up as soon as motion has lasted
+        long enough to count.
+
+        :rtype: int milliseconds until a change of the pin that is still
+                waiting counts, or 0 if there is none
+        """
+        if now is None:
+            now = ticks_ms()
+        self._update(now)
+        if self._level == self.active:
+            return 0
+        return self._changed_ms + self.hysteresis_ms - now
+
+    def start(self, now=None):
+        """Start the min_on_secs and timeout_secs clocks, usually when the light turns on."""
+        if now is None:
+            now = ticks_ms()
+        self._update(now)
+        self.started_ms = now
+        if not self.active:
+            # Count from now, like motion was just seen
+            self.last_motion_ms = now
+
+    def secs_since_motion(self, now=None):
+        """Whole seconds since motion was last seen, 0 if there is motion now.
+
+        :rtype: int, or None if there has never been motion or a start()
+        """
+        if now is None:
+            now = ticks_ms()
+        self._update(now)
+        if self.active:
+            return 0
+        if self.last_motion_ms is None:
+            return None
+        return (now - self.last_motion_ms) // 1000
+
+    def occupied(self, now=None):
+        """True until min_on_secs have passed since start() and there has
+        been no motion for timeout_secs."""
+        if now is None:
+            now = ticks_ms()
+        self._update(now)
+        if self.active:
+            return True
+        if self.started_ms is not None and now - self.started_ms <= self.min_on_ms:
+            return True
+        return self.last_motion_ms is not None and now - self.last_motion_ms <= self.timeout_ms
+
+    def ms_until_empty(self, now=None):
+        """How long until occupied() turns False, if no more motion comes.
+
+        :rtype: int, 0 if it already is, or None while there is motion
+        """
+        if now is None:
+            now = ticks_ms()
+        self._update(now)
+        if self._level != self.active:
+            # The pin changed but that hasn't counted yet. Ask again once it does.
+            return self._changed_ms + self.hysteresis_ms - now
+        if self.active:
+            return None
+        ends = None
+        if self.started_ms is not None:
+            ends = self.started_ms + self.min_on_ms
+        if self.last_motion_ms is not None:
+            ends = max(ends or 0, self.last_motion_ms + self.timeout_ms)
+        if ends is None:
+            return 0
+        # occupied() is still True at exactly ends
+        return max(ends + 1 - now, 0)
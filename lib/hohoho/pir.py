@@ -0,0 +1,65 @@
+# Waiting for the PIR sensor.
+#
+#   if wait_for_pir_sensor(pir_sensor, 10):   # wait up to 10 seconds
+#       print("Someone is here")
+#
+# or, inside a task, so the other tasks keep running while it waits:
+#
+#   motion_detected = yield from pir_sensor_task(pir_sensor, 10)
+
+from hohoho.log import RunLengthTrace
+from hohoho.scheduler import TICK_MS, run_task, ticks_ms
+
+
+def wait_for_pir_sensor(pir_sensor, max_wait, log=None):
+    """Wait for the PIR sensor to be active.
+
+        pir_sensor : digitalio.DigitalInOut
+            The PIR sensor pin, for example from setup_pir_sensor()
+        max_wait : float
+            Time to wait for the sensor to become active in seconds
+        log : Logger
+            Where to send the messages. Prints them if left out.
+
+    :rtype: True if the sensor detects something, False if it times out
+    """
+    return run_task(pir_sensor_task(pir_sensor, max_wait, log))
+
+
+def pir_sensor_task(pir_sensor, max_wait, log=None):
+    """Task version of wait_for_pir_sensor(). Use it with 'yield from'.
+
+    The arguments are the same as wait_for_pir_sensor(). While waiting
+    it adds a '.' every 250 ms, which a Logger squeezes into runs like ".x40".
+
+    :rtype: True if the sensor detects something, False if it times out
+    """
+    trace = RunLengthTrace(log) if log is not None else None
+    deadline = ticks_ms() + int(max_wait * 1000)
+    next_dot = ticks_ms() + 250  # Print a '.' every 250 ms while waiting
+    if log is not None:
+        log.info("Waiting for PIR Sensor")
+    else:
+        print("Waiting for PIR Sensor", end='')
+    while (ticks_ms() < deadline):
+        if (pir_sensor.value is True):
+            _say(log, trace, "Detected!")
+            return True
+        yield TICK_MS
+        if ticks_ms() >= next_dot:
+            next_dot += 250
+            if trace is not None:
+                trace.add(".")
+            else:
+                print(".", end='')
+
+    _say(log, trace, "Timeout")
+    return False
+
+
+def _say(log, trace, message):
+    if log is None:
+        print(message)
+        return
+    trace.finish()
+    log.info(message)
@@ -0,0 +1,291 @@
+# Recording what the sensors and the light did, to replay on a computer.
+#
+# Watching the '+'/'-' trace in the Serial window only works while you
+# are there. The TraceRecorder writes every pushbutton and PIR sensor
+# edge, and every change of the light's state, to a file on CIRCUITPY,
+# so a false trigger in the night can be looked at the next morning with
+# host/replay.py.
+#
+#   recorder = TraceRecorder("trace.bin")
+#   recorder.input(event.source, event.pressed, event.timestamp)
+#   recorder.state(controller.state, controller.cause)
+#   scheduler.add(recorder.flush_task(log))
+#
+# Flash memory wears out after being written some tens of thousands of
+# times, and every write makes the loop wait. So records are kept in RAM
+# and written one block of BLOCK_SIZE bytes at a time, the size of a
+# sector of the drive: when the block fills up, and every FLUSH_SECS so a
+# quiet night still gets saved.
+#
+# Each record is one byte saying what happened, followed by the
+# milliseconds since the record before it as a variable length number:
+# one byte up to 127 ms, two bytes up to 16 seconds, three up to half an
+# hour. Most records take 2 or 3 bytes, so a 512 byte block holds around
+# 200 of them.
+#
+# The file holds a fixed number of blocks and starts over at the first
+# one when it is full, so it never grows past blocks * BLOCK_SIZE bytes.
+# Each block starts with a header, so it can be read without the blocks
+# before it:
+#
+#   magic     1 byte   0xB7
+#   version   1 byte
+#   used      2 bytes  Bytes of records in the block
+#   sequence  4 bytes  Counts up with every new block, across restarts
+#   boot      2 bytes  Counts up every time the board starts
+#   base_ms   4 bytes  ticks_ms() of the first record
+#
+# CircuitPython only lets code.py write to CIRCUITPY when boot.py says
+# so, see boot.py. flash_writable() checks.
+
+import struct
+import time
+
+from hohoho.controller import BUTTON as BUTTON_CAUSE
+from hohoho.controller import FINISHED, MOTION, TIMEOUT
+from hohoho.inputs import BUTTON
+from hohoho.scheduler import ticks_ms
+
+BLOCK_SIZE = 512   # Bytes written to flash at a time
+BLOCKS = 128       # Blocks in the file before it starts over, 64 KB
+FLUSH_SECS = 300   # Save a partly full block this often
+
+MAGIC = 0xB7
+VERSION = 1
+HEADER = "<BBHLHL"
+HEADER_SIZE = struct.calcsize(HEADER)
+_LONGEST_RECORD = 6  # One byte plus a delta up to 2**35
+
+# What a record is, in the top 4 bits of its first byte
+BUTTON_EDGE = 1  # Low bits: 1 for pressed, 0 for let go
+PIR_EDGE = 2     # Low bits: 1 for motion started, 0 for stopped
+STATE = 3        # Low bits: the new state, plus its cause times 4
+
+# The cause of a state change, as a number from 0 to 3
+CAUSES = (MOTION, BUTTON_CAUSE, TIMEOUT, FINISHED)
+
+
+def flash_writable():
+    """True if code.py can write files on CIRCUITPY.
+
+    :rtype: bool
+    """
+    import storage
+
+    return not storage.getmount("/").readonly
+
+
+class TraceRecorder:
+    """Records input edges and state changes to a ring of blocks in a file.
+
+        path : str
+            The file, for example "trace.bin" at the top of CIRCUITPY
+        blocks : int
+            Blocks the file holds before the oldest are written over
+    """
+
+    def __init__(self, path, blocks=BLOCKS):
+        self.path = path
+        self.blocks = blocks
+        self.block = bytearray(BLOCK_SIZE)
+        self.used = HEADER_SIZE  # Bytes of block filled so far
+        self.records = 0         # Records added since starting
+        self.writes = 0          # Blocks written to the file
+        self.write_us = 0        # How long the last write took
+        self.errors = 0          # Writes that failed. Recording stops after one.
+        self.warned = False      # flush_task() has said so
+        self.boot = 0
+        self.sequence = 0
+        self._base_ms = None     # ticks_ms() of the block's first record
+        self._last_ms = 0        # ticks_ms() of the block's last record
+        self._dirty = False      # Records added since the block was last written
+        self._resume()
+
+    def _resume(self):
+        # Carry on after the newest block already in the file, so the
+        # ring order and the boot numbers survive a restart
+        newest = None
+        try:
+            with open(self.path, "rb") as f:
+                header = bytearray(HEADER_SIZE)
+                for slot in range(self.blocks):
+                    f.seek(slot * BLOCK_SIZE)
+                    if f.readinto(header) != HEADER_SIZE:
+                        break
+                    magic, version, used, sequence, boot, base_ms = struct.unpack(HEADER, header)
+                    if magic == MAGIC and (newest is None or sequence > newest[0]):
+                        newest = (sequence, boot)
+        except OSError:
+            # No file yet
+            pass
+        if newest is not None:
+            self.sequence = newest[0] + 1
+            self.boot = (newest[1] + 1) & 0xFFFF
+
+    def input(self, source, pressed, timestamp=None):
+        """Record a pushbutton or PIR sensor edge.
+
+            source : int
+                BUTTON or PIR, from hohoho.inputs
+            pressed : bool
+                True when the button went down or motion started
+            timestamp : int
+                ticks_ms() when it happened. Defaults to now.
+        """
+        kind = BUTTON_EDGE if source == BUTTON else PIR_EDGE
+        self.add(kind, 1 if pressed else 0, timestamp)
+
+    def state(self, state, cause, timestamp=None):
+        """Record a change of the LightController's state.
+
+            state : int
+                IDLE, FADING_IN, ON or FADING_OUT
+            cause : str
+                MOTION, BUTTON, TIMEOUT or FINISHED
+        """
+        self.add(STATE, state | CAUSES.index(cause) << 2, timestamp)
+
+    def add(self, kind, value, timestamp=None):
+        """Add one record to the block, writing the block out if it is full.
+
+            kind : int
+                BUTTON_EDGE, PIR_EDGE or STATE
+            value : int
+                0 to 15
+            timestamp : int
+                ticks_ms() when it happened. Defaults to now.
+        """
+        if self.errors:
+            return
+        if timestamp is None:
+            timestamp = ticks_ms()
+        if self.used + _LONGEST_RECORD > BLOCK_SIZE:
+            self.flush()
+            self._next_block()
+        if self._base_ms is None:
+            self._base_ms = timestamp
+            self._last_ms = timestamp
+        # Edges from keypad can be stamped a little before the record
+        # added just ahead of them
+        delta = max(timestamp - self._last_ms, 0)
+        self._last_ms += delta
+        block = self.block
+        i = self.used
+        block[i] = kind << 4 | value
+        i += 1
+        # 7 bits at a time, with the top bit set on every byte but the last
+        while delta >= 0x80:
+            block[i] = (delta & 0x7F) | 0x80
+            delta >>= 7
+            i += 1
+        block[i] = delta
+        self.used = i + 1
+        self.records += 1
+        self._dirty = True
+
+    def flush(self):
+        """Write the block to its place in the file, if anything was added
+        since the last time."""
+        if not self._dirty or self.errors:
+            return
+        started_ns = time.monotonic_ns()
+        struct.pack_into(HEADER, self.block, 0, MAGIC, VERSION, self.used - HEADER_SIZE,
+                         self.sequence, self.boot, self._base_ms)
+        offset = (self.sequence % self.blocks) * BLOCK_SIZE
+        try:
+            try:
+                f = open(self.path, "r+b")
+            except OSError:
+                f = open(self.path, "wb")
+            with f:
+                f.seek(offset)
+                f.write(self.block)
+        except OSError:
+            # Read only, or the drive is full
+            self.errors += 1
+            return
+        self.writes += 1
+        self.write_us = (time.monotonic_ns() - started_ns) // 1000
+        self._dirty = False
+
+    def _next_block(self):
+        self.sequence += 1
+        block = self.block
+        for i in range(BLOCK_SIZE):
+            block[i] = 0
+        self.used = HEADER_SIZE
+        self._base_ms = None
+
+    def flush_task(self, log=None, interval_secs=FLUSH_SECS):
+        """Task: write the block out every interval_secs.
+
+            log : Logger
+                Where to say if writing failed, or None to keep quiet
+        """
+        while True:
+            yield interval_secs * 1000
+            self.flush()
+            if self.errors and not self.warned and log is not None:
+                log.warning("Can't write %s, recording stopped", self.path)
+                self.warned = True
+
+    def summary(self):
+        """How much has been recorded, on one line."""
+        return "trace %s boot=%d records=%d blocks written=%d last write us=%d" % (
+            self.path, self.boot, self.records, self.writes, self.write_us)
+
+
+def decode_block(data):
+    """Read one block of a trace file.
+
+        data : bytes
+            BLOCK_SIZE bytes
+
+    :rtype: tuple of (sequence, boot, list of (ticks_ms, kind, value)),
+            or None if the block was never written
+    """
+    if len(data) < HEADER_SIZE:
+        return None
+    magic, version, used, sequence, boot, base_ms = struct.unpack_from(HEADER, data)
+    if magic != MAGIC or version != VERSION:
+        return None
+    records = []
+    now = base_ms
+    i = HEADER_SIZE
+    end = HEADER_SIZE + used
+    while i < end:
+        byte = data[i]
+        i += 1
+        delta = 0
+        shift = 0
+        while True:
+            part = data[i]
+            i += 1
+            delta |= (part & 0x7F) << shift
+            shift += 7
+            if not part & 0x80:
+                break
+        now += delta
+        records.append((now, byte >> 4, byte & 0x0F))
+    return sequence, boot, records
+
+
+def read_trace(path, blocks=BLOCKS):
+    """Read every block of a trace file, oldest first.
+
+        path : str
+            The file TraceRecorder wrote
+
+    :rtype: list of (sequence, boot, list of (ticks_ms, kind, value))
+    """
+    found = []
+    with open(path, "rb") as f:
+        for slot in range(blocks):
+            data = f.read(BLOCK_SIZE)
+            if not data:
+                break
+            block = decode_block(data)
+            if block is not None:
+                found.append(block)
+    found.sort()
+    return found
@@ -0,0 +1,176 @@
+# A tiny cooperative scheduler.
+#
+# time.sleep() stops the whole program, so while a fade is running
+# nobody is watching the pushbutton or the PIR sensor. Instead, each job
+# is written as a "task": a function that uses 'yield' where it would
+# have slept. The scheduler runs a little bit of every task in turn, so
+# a fade, a blinking LED and the sensors all take turns.
+#
+# A task yields the number of milliseconds it wants to wait:
+#
+#   def blink():
+#       while True:
+#           board_led.value = False
+#           yield 500           # instead of time.sleep(.5)
+#           board_led.value = True
+#           yield 500
+#
+# Yielding 0 or None gives the other tasks a turn and comes back on the
+# next tick. A task can run another task to the end with 'yield from'.
+
+import time
+
+try:
+    from supervisor import ticks_ms as _board_ticks_ms
+except ImportError:
+    # Not on a board
+    _board_ticks_ms = None
+
+TICK_MS = 10  # How often tasks that poll sensors should run
+
+# supervisor.ticks_ms() counts up to 2**29 and starts over at 0
+_TICKS_PERIOD = 1 << 29
+_ticks_base = 0  # Added to supervisor.ticks_ms() so counting starts at 0
+_ticks_last = 0
+
+
+def _start_ticks():
+    # Count ticks_ms() from 0 starting now
+    global _ticks_base
+    global _ticks_last
+
+    if _board_ticks_ms is not None:
+        _ticks_last = _board_ticks_ms()
+        _ticks_base = -_ticks_last
+
+
+def ticks_ms():
+    """Milliseconds since this module was imported.
+
+    time.monotonic_ns() is too big to fit in a small int, so every call
+    makes a new long int that the garbage collector has to clean up.
+    supervisor.ticks_ms() fits, but it starts over every 6 days (and
+    the first time about a minute after the board starts). This counts
+    up from 0 using supervisor.ticks_ms() and keeps going when it starts
+    over, so the answer is a small int for the first 12 days or so. It
+    needs to be called at least every few days to notice the restarts,
+    which the scheduler does.
+
+    :rtype: int
+    """
+    global _ticks_base
+    global _ticks_last
+
+    if _board_ticks_ms is None:
+        return time.monotonic_ns() // 1000000
+    now = _board_ticks_ms()
+    if now < _ticks_last:
+        _ticks_base += _TICKS_PERIOD
+    _ticks_last = now
+    return _ticks_base + now
+
+
+def ticks_from_board(board_ms):
+    """Turn a supervisor.ticks_ms() reading into ticks_ms() time.
+
+    keypad stamps its events with supervisor.ticks_ms(). This works out
+    how long ago that was and takes it off ticks_ms(). Something from
+    before this module was imported comes out as 0.
+
+        board_ms : int
+            A supervisor.ticks_ms() reading from the last few days
+
+    :rtype: int
+    """
+    age = (_board_ticks_ms() - board_ms) & (_TICKS_PERIOD - 1)
+    return max(ticks_ms() - age, 0)
+
+
+# Start counting now, so everything that uses ticks_ms() (or keypad,
+# which is only set up after this is imported) is counted from here
+_start_ticks()
+
+
+def run_task(task):
+    """Run a single task to the end, sleeping wherever it yields.
+
+    This lets a task be used like a normal function that blocks.
+
+        task : generator
+            The task to run
+
+    :rtype: The value the task returned, if any
+    """
+    try:
+        while True:
+            delay = next(task)
+            if delay:
+                time.sleep(delay / 1000)
+    except StopIteration as stop:
+        return stop.args[0] if stop.args else None
+
+
+class Scheduler:
+    """Takes turns running tasks until they finish.
+
+        tick_ms : int
+            Time to wait when a task yields 0 or None
+    """
+
+    def __init__(self, tick_ms=TICK_MS):
+        self.tick_ms = tick_ms
+        self.tasks = []
+        # When each task wants to run next, in ticks_ms() time
+        self.wake_times = []
+        # Microseconds spent running tasks in the last run_once(), not
+        # counting sleep. Only measured when timing is True, since reading
+        # the clock that precisely makes a long int each time.
+        self.busy_us = 0
+        self.timing = False
+
+    def add(self, task):
+        """Start running a task on the next tick.
+
+            task : generator
+                The task to run. Call the task function to create one,
+                for example scheduler.add(blink())
+        """
+        self.tasks.append(task)
+        self.wake_times.append(ticks_ms())
+        return task
+
+    def run_once(self):
+        """Run every task that is due, then sleep until the next one is.
+
+        :rtype: True if there are still tasks left to run
+        """
+        if self.timing:
+            started_ns = time.monotonic_ns()
+        tasks = self.tasks
+        wake_times = self.wake_times
+        i = 0
+        while i < len(tasks):
+            now = ticks_ms()
+            if wake_times[i] <= now:
+                try:
+                    delay = next(tasks[i])
+                except StopIteration:
+                    tasks.pop(i)
+                    wake_times.pop(i)
+                    continue
+                wake_times[i] = now + (delay or self.tick_ms)
+            i += 1
+        if self.timing:
+            self.busy_us = (time.monotonic_ns() - started_ns) // 1000
+
+        if not tasks:
+            return False
+        wait = min(wake_times) - ticks_ms()
+        if wait > 0:
+            time.sleep(wait / 1000)
+        return True
+
+    def run(self):
+        """Run tasks until all of them have finished."""
+        while self.run_once():
+            pass
@@ -0,0 +1,221 @@
+# Settings you can change while the code is running.
+#
+# Saving code.py restarts the whole program: the light goes out, a fade
+# stops halfway and the occupancy timer starts over. Settings kept in
+# settings.toml on the CIRCUITPY drive can be changed without that:
+#
+#   settings = LiveSettings("settings.toml", {"COLOR": 0xFF3005, "PIR_TIMEOUT_SECS": 60})
+#   settings.load()
+#   scheduler.add(settings.watch_task(apply_settings, log))
+#
+# watch_task() checks the file's size and modification time once a
+# second, which is cheap, and only reads the file again when one of them
+# changed. apply_settings() is then called with the new values.
+#
+# settings.toml holds one setting per line, the same format CircuitPython
+# uses for os.getenv(): a whole number (hex like 0xFF3005 is fine) or a
+# string in double quotes. Lines starting with # are comments.
+#
+#   PIR_TIMEOUT_SECS = 90
+#   COLOR = "GOLD"
+#
+# Watch out: CircuitPython restarts the program whenever any file on the
+# drive is saved, settings.toml too. disable_autoreload() turns that off,
+# but then saving code.py doesn't restart it either. Press Ctrl-D in the
+# Serial window, or the reset button, to run your new code.
+
+import os
+import time
+
+CHECK_MS = 1000  # How often watch_task() looks at the file
+
+
+def disable_autoreload():
+    """Stop CircuitPython restarting the program when a file is saved.
+
+    :rtype: bool, False if there is no autoreload to turn off
+    """
+    try:
+        import supervisor
+    except ImportError:
+        # Not on a board
+        return False
+    runtime = getattr(supervisor, "runtime", None)
+    if runtime is not None and hasattr(runtime, "autoreload"):
+        runtime.autoreload = False       # CircuitPython 8 and later
+    else:
+        supervisor.disable_autoreload()  # CircuitPython 7
+    return True
+
+
+def parse_value(text):
+    """Turn the text after the = into a value.
+
+        text : str
+            A whole number like 60 or 0xFF3005, or a string in double quotes
+
+    :rtype: int or str
+    """
+    text = text.strip()
+    if len(text) >= 2 and text[0] == '"' and text[-1] == '"':
+        return text[1:-1]
+    return int(text, 0)
+
+
+def color_value(value):
+    """Turn a COLOR setting into a color tuple.
+
+        value : int, str or tuple
+            0xRRGGBB, the name of a color in hohoho.colors like "GOLD", or
+            already a tuple of (red, green, blue)
+
+    :rtype: tuple of (int, int, int)
+    """
+    if isinstance(value, tuple):
+        return value
+    if isinstance(value, str):
+        from hohoho import colors
+
+        color = getattr(colors, value.upper(), None)
+        if not isinstance(color, tuple):
+            raise ValueError("no color called %r in hohoho.colors" % value)
+        return color
+    if not 0 <= value <= 0xFFFFFF:
+        raise ValueError("color 0x%X is bigger than 0xFFFFFF" % value)
+    return ((value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF)
+
+
+def read_settings(path):
+    """Read every setting in a settings.toml file.
+
+        path : str
+            The file to read
+
+    :rtype: tuple of (dict of name -> value, list of lines that couldn't be read)
+    """
+    values = {}
+    bad_lines = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line[0] == "#" or line[0] == "[":
+                continue
+            if "=" not in line:
+                bad_lines.append(line)
+                continue
+            name, value = line.split("=", 1)
+            # A # after a number starts a comment. Strings are left alone.
+            value = value.strip()
+            if value[:1] != '"':
+                value = value.split("#", 1)[0]
+            try:
+                values[name.strip()] = parse_value(value)
+            except ValueError:
+                bad_lines.append(line)
+    return values, bad_lines
+
+
+class LiveSettings:
+    """Settings from a file, read again whenever the file changes.
+
+        path : str
+            The settings file, usually "settings.toml" at the top of CIRCUITPY
+        defaults : dict
+            Every setting to look for, and its value when the file doesn't
+            have it. Other settings in the file are left alone.
+    """
+
+    def __init__(self, path, defaults):
+        self.path = path
+        self.defaults = defaults
+        self.values = dict(defaults)
+        self.reloads = 0
+        self.reload_us = 0    # How long the last reload in watch_task() took
+        self.bad_lines = []   # Lines load() couldn't read
+        self._stamp = None    # (size, modification time) when last read
+
+    def _file_stamp(self):
+        try:
+            info = os.stat(self.path)
+        except OSError:
+            # No file. Use the defaults.
+            return None
+        return (info[6], info[8])
+
+    def changed(self):
+        """True if the file was changed, added or removed since the last load().
+
+        Only asks for the file's size and modification time, so it is
+        cheap to call often.
+        """
+        return self._file_stamp() != self._stamp
+
+    def load(self):
+        """Read the file and work out which settings changed.
+
+        :rtype: dict of name -> value for each setting that changed
+        """
+        self._stamp = self._file_stamp()
+        found = {}
+        self.bad_lines = []
+        if self._stamp is not None:
+            try:
+                found, self.bad_lines = read_settings(self.path)
+            except OSError:
+                # Removed between os.stat() and open(). Try again next time.
+                self._stamp = None
+        changes = {}
+        for name, default in self.defaults.items():
+            value = found.get(name, default)
+            if value != self.values[name]:
+                self.values[name] = value
+                changes[name] = value
+        return changes
+
+    def watch_task(self, apply, log=None, interval_ms=CHECK_MS):
+        """Task: load() the file when it changes and pass on what changed.
+
+        Each reload is reported with how long reading the file and
+        applying the changes took.
+
+            apply : function
+                Called with the dict of changed settings
+            log : Logger
+                Where to report each reload. print() is used if this is None.
+            interval_ms : int
+                How often to check the file
+        """
+        while True:
+            yield interval_ms
+            if not self.changed():
+                continue
+            started_ns = time.monotonic_ns()
+            changes = self.load()
+            if changes:
+                apply(changes)
+            self.reloads += 1
+            self.reload_us = (time.monotonic_ns() - started_ns) // 1000
+            message = "%s reloaded in %d us: %s" % (self.path, self.reload_us, _describe(changes))
+            if log is None:
+                print(message)
+            else:
+                log.info("%s", message)
+            self.report_bad_lines(log)
+
+    def report_bad_lines(self, log=None):
+        """Say which lines the last load() couldn't read.
+
+            log : Logger
+                Where to report them. print() is used if this is None.
+        """
+        for line in self.bad_lines:
+            if log is None:
+                print("Can't read %r in %s" % (line, self.path))
+            else:
+                log.warning("Can't read %r in %s", line, self.path)
+
+
+def _describe(changes):
+    if not changes:
+        return "nothing changed"
+    return ", ".join("%s=%r" % (name, changes[name]) for name in sorted(changes))
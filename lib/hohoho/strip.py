@@ -0,0 +1,121 @@
+# The analog LED strip as one object.
+#
+# The strip has a red, a green and a blue wire, each driven by a PWM pin.
+# Writing a pin's duty_cycle takes time even when the value is the same
+# as last time, and during a fade one color often barely moves. PWMStrip
+# remembers what it last wrote to each pin and only writes the pins
+# that actually change. It counts both so you can see how many writes
+# were saved.
+#
+#   colorstrip = PWMStrip(board.D3, board.D5, board.D4)  # red, green, blue
+#   colorstrip.set_color((0xFF, 0x30, 0x05), 1.0)
+#   print(colorstrip.writes, "writes,", colorstrip.skipped, "skipped")
+
+import array
+
+import pwmio
+
+from hohoho.colorscale import MAX_DUTY, ColorScaler
+
+
+class PWMStrip:
+    """A strip of LEDs that are all the same color, one PWM pin per color.
+
+        red_pin, green_pin, blue_pin : microcontroller.Pin
+            Pins wired to the R, G and B lines of the strip
+        frequency : int
+            PWM frequency in Hz
+        active_low : bool
+            True if the LEDs light up when the pin is low. The strip in
+            this kit is wired this way, so a duty cycle of 0 is full on.
+        scaler : ColorScaler
+            Lookup tables for turning colors into intensities. A new one
+            is made if you don't pass one in.
+    """
+
+    def __init__(self, red_pin, green_pin, blue_pin, frequency=5000, active_low=True, scaler=None):
+        self.active_low = active_low
+        off = MAX_DUTY if active_low else 0
+        self.pins = (
+            pwmio.PWMOut(red_pin, frequency=frequency, duty_cycle=off),
+            pwmio.PWMOut(green_pin, frequency=frequency, duty_cycle=off),
+            pwmio.PWMOut(blue_pin, frequency=frequency, duty_cycle=off),
+        )
+        self.scaler = scaler if scaler is not None else ColorScaler()
+        # The duty cycle last written to each pin
+        self.duty = array.array("H", (off, off, off))
+        self.writes = 0   # duty_cycle writes sent to the pins
+        self.skipped = 0  # writes left out because the pin already had that value
+        self.tracer = None  # A LatencyTracer waiting for the strip to light up
+
+    def set_color(self, color, brightness):
+        """Set the strip to a color and brightness.
+
+            color : tuple of (int, int, int)
+                An r,g,b color tuple with values 0-255 for each color
+            brightness : float
+                Intensity of the lightstrip. 1.0 is brightest, 0.0 is off
+        """
+        self.write(self.scaler.scale(color, brightness))
+
+    def set_rgb(self, red, green, blue, level):
+        """Like set_color(), without making a tuple or doing float math.
+
+            red, green, blue : int
+                Color values from 0-255
+            level : int
+                Brightness level from scaler.level(), 0 (off) to FULL_LEVEL (full on)
+        """
+        self.write(self.scaler.scale_rgb(red, green, blue, level))
+
+    def off(self):
+        """Turn every LED off."""
+        self.write_rgb(0, 0, 0)
+
+    def write(self, intensity):
+        """Send intensities straight to the pins.
+
+            intensity : sequence of (int, int, int)
+                Red, green and blue from 0 (off) to 65535 (full on)
+        """
+        self.write_rgb(intensity[0], intensity[1], intensity[2])
+
+    def write_rgb(self, red, green, blue):
+        """Send three intensities from 0 (off) to 65535 (full on) to the pins,
+        skipping any pin that already has that value."""
+        if self.tracer is not None and (red or green or blue):
+            self.tracer.lit()
+        if self.active_low:
+            red = MAX_DUTY - red
+            green = MAX_DUTY - green
+            blue = MAX_DUTY - blue
+        duty = self.duty
+        pins = self.pins
+        if duty[0] != red:
+            pins[0].duty_cycle = red
+            duty[0] = red
+            self.writes += 1
+        else:
+            self.skipped += 1
+        if duty[1] != green:
+            pins[1].duty_cycle = green
+            duty[1] = green
+            self.writes += 1
+        else:
+            self.skipped += 1
+        if duty[2] != blue:
+            pins[2].duty_cycle = blue
+            duty[2] = blue
+            self.writes += 1
+        else:
+            self.skipped += 1
+
+    def reset_counts(self):
+        """Start counting writes and skipped writes from zero."""
+        self.writes = 0
+        self.skipped = 0
+
+    def deinit(self):
+        """Release the pins so they can be used for something else."""
+        for pin in self.pins:
+            pin.deinit()
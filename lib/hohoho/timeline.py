@@ -0,0 +1,134 @@
+# Light shows written as data.
+#
+# Instead of writing loops full of set_colorstrip() and sleeps, list the
+# steps of the show as keyframes. Each keyframe says which color and
+# brightness to reach, how many seconds to take getting there and how
+# to get there (the easing):
+#
+#   SHOW = (
+#       # (color,  brightness, seconds, easing)
+#       (PURPLE,   1.0,        2,       STEP),    # jump to purple, stay 2 seconds
+#       (PURPLE,   0.0,        2,       LINEAR),  # fade out over 2 seconds
+#       (RED,      1.0,        1,       EASE_IN), # fade up to red, slow at first
+#   )
+#
+# Timeline() works out every frame of the show once, at startup, and
+# keeps just the three pin intensities for each frame in an array.
+# Playing the show is then only a matter of reading the array.
+#
+#   show = Timeline(SHOW, colorstrip.scaler)
+#   ...
+#   yield from show.play(colorstrip)
+
+import array
+
+from hohoho.frames import FrameTimer
+
+FPS = 50  # Frames per second when compiling a show
+
+# Easings: how to get from the previous keyframe to this one
+STEP = 0         # Jump straight there and stay for the whole time
+LINEAR = 1       # Move at a steady speed
+EASE_IN = 2      # Start slow and speed up
+EASE_OUT = 3     # Start fast and slow down
+EASE_IN_OUT = 4  # Start slow, speed up, slow down again
+
+
+def ease(easing, t):
+    """How far along a transition is after easing.
+
+        easing : int
+            STEP, LINEAR, EASE_IN, EASE_OUT or EASE_IN_OUT
+        t : float
+            Fraction of the keyframe's time that has passed, 0.0 to 1.0
+
+    :rtype: float from 0.0 (previous keyframe) to 1.0 (this keyframe)
+    """
+    if easing == STEP:
+        return 1.0
+    if easing == LINEAR:
+        return t
+    if easing == EASE_IN:
+        return t * t
+    if easing == EASE_OUT:
+        return t * (2 - t)
+    if easing == EASE_IN_OUT:
+        return t * t * (3 - 2 * t)
+    raise ValueError("Unknown easing %r" % (easing,))
+
+
+class Timeline:
+    """A show compiled into one (red, green, blue) intensity triple per frame.
+
+        keyframes : sequence of (color, brightness, seconds[, easing])
+            The steps of the show. easing defaults to LINEAR. A keyframe
+            that takes 0 seconds sets where the next one starts from.
+        scaler : ColorScaler
+            Turns colors into intensities, usually colorstrip.scaler
+        fps : int
+            Frames per second
+        start : tuple of (color, brightness)
+            Where the show starts before the first keyframe. Defaults to off.
+    """
+
+    def __init__(self, keyframes, scaler, fps=FPS, start=((0, 0, 0), 0.0)):
+        self.fps = fps
+        self.frames = array.array("H")
+
+        color, brightness = start
+        self._add_frame(scaler, color, brightness)
+        seconds = 0.0
+        for keyframe in keyframes:
+            target_color, target_brightness, duration = keyframe[0], keyframe[1], keyframe[2]
+            easing = keyframe[3] if len(keyframe) > 3 else LINEAR
+            if duration <= 0:
+                # Takes no time, so it just sets where the next keyframe starts from
+                color, brightness = target_color, target_brightness
+                continue
+            # Work out frame numbers from the total time so far so rounding
+            # doesn't add up over a long show.
+            first = round(seconds * fps)
+            seconds += duration
+            count = max(1, round(seconds * fps) - first)
+            for i in range(1, count + 1):
+                amount = ease(easing, i / count)
+                self._add_frame(
+                    scaler,
+                    [c + (target - c) * amount for c, target in zip(color, target_color)],
+                    brightness + (target_brightness - brightness) * amount,
+                )
+            color, brightness = target_color, target_brightness
+
+        # The frame array has 3 numbers per frame
+        self.count = len(self.frames) // 3
+
+    def _add_frame(self, scaler, color, brightness):
+        intensity = scaler.scale_rgb(
+            int(color[0] + 0.5), int(color[1] + 0.5), int(color[2] + 0.5),
+            scaler.level(brightness))
+        self.frames.extend(intensity)
+
+    @property
+    def duration(self):
+        """How long the show takes to play in seconds."""
+        return (self.count - 1) / self.fps
+
+    def play(self, strip):
+        """Task: stream the frames to a strip, on time.
+
+        Use it from inside another task with 'yield from'.
+
+            strip : PWMStrip
+                The strip to play the show on
+
+        :rtype: The number of frames skipped because playback was running late
+        """
+        frames = self.frames
+        timer = FrameTimer(self.duration, self.count - 1)
+        while True:
+            i = timer.next_frame() * 3
+            strip.write_rgb(frames[i], frames[i + 1], frames[i + 2])
+            if timer.done():
+                break
+            yield timer.wait_ms()
+        return timer.dropped
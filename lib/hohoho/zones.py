@@ -0,0 +1,259 @@
+# More than one light from one board.
+#
+# A zone is one strip with its own PIR sensor, timeouts and color, and
+# optionally its own pushbutton. Each zone has its own OccupancyTracker
+# and LightController, so the hallway can be fading out while the
+# kitchen is still on:
+#
+#   kitchen = Zone("kitchen", setup_colorstrip(pins=(board.D3, board.D4, board.D5)),
+#                  board.D7, WARM, button_pin=board.D6)
+#   hallway = Zone("hallway", setup_colorstrip(pins=(board.D8, board.D9, board.D10)),
+#                  board.A0, GOLD, timeout_secs=30, min_on_secs=60)
+#   zones = ZoneGroup((kitchen, hallway))
+#   zones.add_to(scheduler)
+#
+# One scheduler runs everything: a task for all the sensors and
+# pushbuttons together, plus one task for each zone's controller. A zone
+# that is off only wakes every TICK_MS to look for motion, and a zone
+# that is fading only runs on its own frames, so each zone adds the same
+# small amount of work no matter how many others there are.
+#
+# Every pin is watched by keypad in the background when it is available,
+# the same as create_inputs() in lib/hohoho/inputs.py. Events are
+# numbered zone * 2 + BUTTON or PIR, so one EventQueue holds them all.
+
+from hohoho.controller import FADE_SECS, STATE_NAMES, LightController
+from hohoho.inputs import BUTTON, PIR, QUEUE_SIZE, EventQueue, InputEvent
+from hohoho.occupancy import OccupancyTracker
+from hohoho.scheduler import TICK_MS, ticks_from_board, ticks_ms
+
+
+def event_source(zone_index, kind):
+    """The EventQueue source number for one zone's button or PIR sensor.
+
+        zone_index : int
+            Position of the zone in the ZoneGroup
+        kind : int
+            BUTTON or PIR
+
+    :rtype: int
+    """
+    return zone_index * 2 + kind
+
+
+class Zone:
+    """One light with its own strip, PIR sensor, timeouts and color.
+
+        name : str
+            What to call the zone in the Serial window
+        colorstrip : PWMStrip or NeoPixelStrip
+            The zone's strip, from setup_colorstrip()
+        pir_pin : microcontroller.Pin
+            The zone's PIR sensor. Reads high while it sees motion.
+        color : tuple of (int, int, int)
+            Color of the light
+        timeout_secs : int
+            Turn off after this long with no motion
+        min_on_secs : int
+            Stay on at least this long once on
+        fade_secs : float
+            Length of a fade all the way from off to full on
+        button_pin : microcontroller.Pin
+            The zone's pushbutton, or None if it doesn't have one. Reads
+            low while pressed.
+    """
+
+    def __init__(self, name, colorstrip, pir_pin, color, timeout_secs=60, min_on_secs=600,
+                 fade_secs=FADE_SECS, button_pin=None):
+        self.name = name
+        self.colorstrip = colorstrip
+        self.pir_pin = pir_pin
+        self.button_pin = button_pin
+        self.occupancy = OccupancyTracker(timeout_secs, min_on_secs)
+        self.controller = LightController(colorstrip, color, self.occupancy, fade_secs)
+
+    def task(self, log=None):
+        """Task: give the zone's controller a turn on every frame.
+
+            log : Logger
+                Where to report each change of state, or None to keep quiet
+        """
+        controller = self.controller
+        while True:
+            before = controller.state
+            delay = controller.step()
+            if log is not None and controller.state != before:
+                log.info("%s: %s (%s)", self.name, STATE_NAMES[controller.state],
+                         controller.cause)
+            yield delay
+
+    def status(self):
+        """The zone's state and counters on one line."""
+        controller = self.controller
+        return "%s: %s visits=%d reversals=%d dropped=%d" % (
+            self.name, STATE_NAMES[controller.state], self.occupancy.visits,
+            controller.reversals, controller.dropped)
+
+
+class KeypadZoneInputs:
+    """Every zone's pins, captured in the background by the keypad module.
+
+        zones : list of Zone
+            The zones to watch
+    """
+
+    def __init__(self, zones, size=QUEUE_SIZE):
+        import keypad
+
+        self.events = EventQueue(size)
+        self._key_event = keypad.Event()
+        # Key numbers count the pins given to each Keys object, so
+        # remember which zone each button belongs to
+        self._button_zones = bytes(i for i in range(len(zones)) if zones[i].button_pin is not None)
+        self._pirs = keypad.Keys(tuple(zone.pir_pin for zone in zones),
+                                 value_when_pressed=True, pull=False, max_events=size)
+        self._buttons = None
+        if self._button_zones:
+            self._buttons = keypad.Keys(tuple(zones[i].button_pin for i in self._button_zones),
+                                        value_when_pressed=False, pull=True, max_events=size)
+
+    def update(self):
+        """Move the events keypad has collected into the events queue."""
+        key_event = self._key_event
+        keys = self._pirs
+        while keys.events.get_into(key_event):
+            self.events.put(event_source(key_event.key_number, PIR), key_event.pressed,
+                            ticks_from_board(key_event.timestamp))
+        self._check_overflow(keys)
+        keys = self._buttons
+        if keys is None:
+            return
+        while keys.events.get_into(key_event):
+            zone_index = self._button_zones[key_event.key_number]
+            self.events.put(event_source(zone_index, BUTTON), key_event.pressed,
+                            ticks_from_board(key_event.timestamp))
+        self._check_overflow(keys)
+
+    def _check_overflow(self, keys):
+        if keys.events.overflowed:
+            keys.events.clear()
+            self.events.overflowed = True
+
+    def deinit(self):
+        """Release the pins so they can be used for something else."""
+        self._pirs.deinit()
+        if self._buttons is not None:
+            self._buttons.deinit()
+
+
+class PollingZoneInputs:
+    """Every zone's pins, read with digitalio each time update() is called.
+
+        zones : list of Zone
+            The zones to watch
+    """
+
+    def __init__(self, zones, size=QUEUE_SIZE):
+        import digitalio
+
+        self.events = EventQueue(size)
+        # What each source read last time, indexed by event_source()
+        self.active = bytearray(len(zones) * 2)
+        self._pins = []
+        for i in range(len(zones)):
+            pir_sensor = digitalio.DigitalInOut(zones[i].pir_pin)
+            pir_sensor.direction = digitalio.Direction.INPUT
+            self._pins.append((event_source(i, PIR), pir_sensor, True))
+            if zones[i].button_pin is not None:
+                pushbutton = digitalio.DigitalInOut(zones[i].button_pin)
+                pushbutton.direction = digitalio.Direction.INPUT
+                pushbutton.pull = digitalio.Pull.UP
+                self._pins.append((event_source(i, BUTTON), pushbutton, False))
+
+    def update(self):
+        """Read every pin and queue an event for each one that changed."""
+        now = ticks_ms()
+        active = self.active
+        for source, pin, value_when_pressed in self._pins:
+            pressed = pin.value is value_when_pressed
+            if pressed != (active[source] == 1):
+                active[source] = 1 if pressed else 0
+                self.events.put(source, pressed, now)
+
+    def deinit(self):
+        """Release the pins so they can be used for something else."""
+        for source, pin, value_when_pressed in self._pins:
+            pin.deinit()
+
+
+def create_zone_inputs(zones, size=QUEUE_SIZE):
+    """Watch every zone's PIR sensor and pushbutton the best way this board can.
+
+        zones : list of Zone
+            The zones to watch
+        size : int
+            Number of events to keep before dropping new ones
+
+    :rtype: KeypadZoneInputs, or PollingZoneInputs if keypad isn't available
+    """
+    try:
+        return KeypadZoneInputs(zones, size)
+    except ImportError:
+        return PollingZoneInputs(zones, size)
+
+
+class ZoneGroup:
+    """All the zones, sharing one scheduler.
+
+        zones : list of Zone
+            The zones, each with its own pins
+    """
+
+    def __init__(self, zones):
+        self.zones = tuple(zones)
+        self.inputs = create_zone_inputs(self.zones)
+
+    def add_to(self, scheduler, log=None):
+        """Add the inputs task and a task for each zone to a Scheduler.
+
+            log : Logger
+                Where to report each zone's changes of state, or None
+        """
+        scheduler.add(self.input_task())
+        for zone in self.zones:
+            scheduler.add(zone.task(log))
+
+    def input_task(self):
+        """Task: pass each PIR sensor and pushbutton event to its zone.
+
+        A zone's controller is told about motion once its occupancy
+        tracker has seen it last long enough, not on every edge.
+        """
+        zones = self.zones
+        inputs = self.inputs
+        event = InputEvent()
+        # Each zone's occupancy.starts the last time its controller was told
+        starts = [zone.occupancy.starts for zone in zones]
+        while True:
+            inputs.update()
+            while inputs.events.get_into(event):
+                zone = zones[event.source >> 1]
+                if event.source & 1 == PIR:
+                    zone.occupancy.motion(event.pressed, event.timestamp)
+                elif event.pressed:
+                    zone.controller.button()
+            for i in range(len(zones)):
+                occupancy = zones[i].occupancy
+                occupancy.update()
+                if occupancy.starts != starts[i]:
+                    starts[i] = occupancy.starts
+                    zones[i].controller.motion()
+            yield TICK_MS
+
+    def dropped(self):
+        """Fade frames skipped in every zone put together."""
+        return sum(zone.controller.dropped for zone in self.zones)
+
+    def summary(self):
+        """Each zone's status, one line each."""
+        return "\n".join(zone.status() for zone in self.zones)